@@ -1,69 +1,212 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_caching import Cache
+from flask_compress import Compress
 import os
+import importlib
 from datetime import timedelta
 import logging
-from app.scheduler import init_scheduler
-from flask import request
+import uuid
+from app.config import Config
+from app.json_provider import ORJSONProvider
+from app.log import configure_logging
+from flask import request, g
+from flask.sessions import SessionInterface, SecureCookieSessionInterface
 
 # ✅ Initialize Cache
 cache = Cache()
 
+# Response compression (Brotli when accepted, else gzip)
+compress = Compress()
+
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_app():
+# CORS settings, normalized once at import time
+CORS_ORIGINS = ["http://thestockai.online"]
+CORS_ALLOW_HEADERS = ["Content-Type", "Authorization", "X-Request-ID"]
+CORS_EXPOSE_HEADERS = ["Content-Range", "X-Content-Range", "X-Request-ID"]
+CORS_MAX_AGE = 86400  # Let browsers cache preflight results for 24 hours
+
+# Redis connections per worker process, shared by request threads and the background executors
+REDIS_MAX_CONNECTIONS = 32
+REDIS_POOL_TIMEOUT = 5  # Seconds to wait for a free connection before raising
+
+# Prebuilt preflight headers; flask-cors skips responses that already carry
+# Access-Control-Allow-Origin, so OPTIONS requests avoid its per-request work
+_CORS_HEADERS = (
+    ('Access-Control-Allow-Origin', CORS_ORIGINS[0]),
+    ('Access-Control-Allow-Headers', ', '.join(CORS_ALLOW_HEADERS)),
+    ('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS'),
+    ('Access-Control-Allow-Credentials', 'true'),
+    ('Access-Control-Max-Age', str(CORS_MAX_AGE)),
+)
+
+class _PreflightShortCircuit:
+    """WSGI middleware answering CORS preflight requests before Flask routing runs"""
+    def __init__(self, wsgi_app, headers):
+        self.wsgi_app = wsgi_app
+        # WSGI expects native strings; build the list once
+        self.headers = [(name, value) for name, value in headers] + [('Content-Length', '0')]
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') == 'OPTIONS' and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in environ:
+            start_response('204 No Content', self.headers)
+            return [b'']
+        return self.wsgi_app(environ, start_response)
+
+# Paths that never touch the session (load-balancer health checks)
+SESSIONLESS_PATHS = frozenset(['/ping'])
+
+class _FastPathSessionInterface(SessionInterface):
+    """Skip session loading and cookie re-signing for health checks and OPTIONS requests"""
+    def __init__(self, inner=None):
+        # Wraps whichever interface is active (cookie, or Flask-Session's Redis store)
+        self.inner = inner or SecureCookieSessionInterface()
+
+    def open_session(self, app, request):
+        if request.path in SESSIONLESS_PATHS or request.method == 'OPTIONS':
+            return None  # Flask falls back to a null session, which is never saved
+        return self.inner.open_session(app, request)
+
+    def save_session(self, app, session, response):
+        return self.inner.save_session(app, session, response)
+
+# Blueprint registration table: (module, blueprint attribute, url prefix).
+# Modules are imported lazily in create_app; set DISABLE_<ATTR>=1 (e.g.
+# DISABLE_PREDICTION_BP=1) to skip importing and registering a blueprint.
+BLUEPRINTS = [
+    ('app.routes.stock_routes', 'stock_bp', '/api/stocks'),
+    ('app.routes.news_routes', 'news_bp', '/api/news'),
+    ('app.routes.social_routes', 'social_bp', '/api/social'),
+    ('app.routes.user_routes', 'user_bp', '/api/users'),
+    ('app.routes.prediction_routes', 'prediction_bp', '/api/prediction'),
+    ('app.routes.finnhub_routes', 'finnhub_bp', '/api/finnhub'),
+    ('app.routes.multistep_prediction_routes', 'multistep_prediction_bp', '/api/prediction/multistep'),
+    ('app.routes.multistep_prediction_routes', 'followup_bp', '/api/prediction/multistep'),
+]
+
+def register_blueprints(app, extra_blueprints=()):
+    """Import and register every enabled blueprint from BLUEPRINTS plus any extra entries"""
+    for module_name, attr, url_prefix in (*BLUEPRINTS, *extra_blueprints):
+        if os.getenv(f"DISABLE_{attr.upper()}"):
+            logger.info(f"Skipping disabled blueprint {attr}")
+            continue
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, attr), url_prefix=url_prefix)
+
+def configure_cache_and_sessions(app):
+    """Use Redis for the cache and sessions when REDIS_URL is set so all workers share them"""
+    if not Config.REDIS_URL:
+        # Per-process cache; fine for local development and tests
+        app.config['CACHE_TYPE'] = 'simple'
+        return
+
+    import redis
+    from flask_session import Session
+
+    # One bounded pool for the cache, sessions and raw client; when every connection is busy
+    # a thread waits for one (up to REDIS_POOL_TIMEOUT) instead of failing with "Too many connections"
+    pool = redis.BlockingConnectionPool.from_url(
+        Config.REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, timeout=REDIS_POOL_TIMEOUT
+    )
+    redis_client = redis.Redis(connection_pool=pool)
+    app.config.update(
+        # JSON-like values and raw bytes skip pickle (see app.cache_backend)
+        CACHE_TYPE='app.cache_backend.JSONRedisCache',
+        # A client rather than CACHE_REDIS_URL, which would make Flask-Caching build its own pool
+        CACHE_REDIS_HOST=redis_client,
+        CACHE_DEFAULT_TIMEOUT=300,
+        CACHE_KEY_PREFIX='sai:',
+        SESSION_TYPE='redis',
+        SESSION_REDIS=redis_client,
+        SESSION_KEY_PREFIX='sai:session:'
+    )
+    Session(app)
+    # Raw client for structures the cache API can't express (e.g. per-step hashes)
+    app.extensions['redis'] = redis_client
+    logger.info("Using Redis for cache and sessions")
+
+def create_app(*, enable_scheduler=None, extra_blueprints=()):
+    """Application factory
+    
+    Args:
+        enable_scheduler: Start the background news jobs; defaults to ENABLE_SCHEDULER (on unless set to 0), in gunicorn worker 0 only
+        extra_blueprints: Additional (module, attribute, url_prefix) entries to register
+        
+    Returns:
+        The configured Flask app
+    """
+    # Logging is configured by the application, not on package import; level from LOG_LEVEL
+    configure_logging()
+    
     app = Flask(__name__)
+    app.json = ORJSONProvider(app)
     
     # Configure CORS to properly support credentials with specific origins
     CORS(app,
-        origins=["http://thestockai.online"],
-        allow_headers=["Content-Type", "Authorization"],
-        expose_headers=["Content-Range", "X-Content-Range"],
-        supports_credentials=True)
+        origins=CORS_ORIGINS,
+        allow_headers=CORS_ALLOW_HEADERS,
+        expose_headers=CORS_EXPOSE_HEADERS,
+        supports_credentials=True,
+        max_age=CORS_MAX_AGE)
 
 
+    # Preflights never reach Flask; plain OPTIONS requests still hit this hook
+    app.wsgi_app = _PreflightShortCircuit(app.wsgi_app, _CORS_HEADERS)
+
     @app.before_request
     def handle_options():
         if request.method == "OPTIONS":
-            return '', 200
+            return '', 200, _CORS_HEADERS
     # Configure Flask
     app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
-    app.config['CACHE_TYPE'] = 'simple'
     
     # Configure session timeout
     app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(minutes=30)  # Session expires after 30 minutes of inactivity
     app.config['SESSION_REFRESH_EACH_REQUEST'] = True  # Refresh session on each request
     
+    configure_cache_and_sessions(app)
+    app.session_interface = _FastPathSessionInterface(app.session_interface)
     cache.init_app(app)
+    
+    # Echo the caller's X-Request-ID (or mint one) so logs can be correlated across services
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def add_request_id(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        return response
+    
+    # Compress responses over 1 KB; streamed (NDJSON) responses are left uncompressed so they flush per line
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
+    app.config['COMPRESS_STREAMS'] = False
+    compress.init_app(app)
 
     # Initialize database (this will create the tables if they don't exist)
     from app.database import db
     
-    # Register all blueprints
-    from app.routes.stock_routes import stock_bp
-    from app.routes.news_routes import news_bp
-    from app.routes.social_routes import social_bp
-    from app.routes.user_routes import user_bp
-    from app.routes.prediction_routes import prediction_bp
-    from app.routes.finnhub_routes import finnhub_bp
-    from app.routes.multistep_prediction_routes import multistep_prediction_bp, followup_bp
-
-    app.register_blueprint(stock_bp, url_prefix='/api/stocks')
-    app.register_blueprint(news_bp, url_prefix='/api/news')
-    app.register_blueprint(social_bp, url_prefix='/api/social')
-    app.register_blueprint(user_bp, url_prefix='/api/users')
-    app.register_blueprint(prediction_bp, url_prefix='/api/prediction')
-    app.register_blueprint(finnhub_bp, url_prefix='/api/finnhub')
-    app.register_blueprint(multistep_prediction_bp, url_prefix='/api/prediction/multistep')
-    app.register_blueprint(followup_bp, url_prefix='/api/prediction/multistep')
+    # Register all enabled blueprints
+    register_blueprints(app, extra_blueprints)
     
-    # Initialize the scheduler for background tasks
-    init_scheduler(app)
+    # Initialize the scheduler for background tasks; APScheduler is only imported when used.
+    # Under gunicorn only worker 0 runs it, otherwise every worker would repeat the jobs.
+    if enable_scheduler is None:
+        enable_scheduler = (os.getenv('ENABLE_SCHEDULER', '1') == '1'
+                            and os.getenv('GUNICORN_WORKER_ID', '0') == '0')
+    if enable_scheduler:
+        from app.scheduler import init_scheduler
+        init_scheduler(app)
     
-    @app.route("/ping")
+    # Health checks skip Flask's automatic OPTIONS handling and the session
+    @app.route("/ping", provide_automatic_options=False)
     def ping():
         return "pong", 200
     
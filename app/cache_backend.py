@@ -0,0 +1,40 @@
+import pickle
+import orjson
+from cachelib.serializers import RedisSerializer
+from flask_caching.backends import RedisCache
+
+# One-byte tags for values stored without pickle; cachelib pickles behind b"!"
+# and writes integers as plain digits, so neither clashes with these
+_JSON_TAG = b"j"
+_BYTES_TAG = b"b"
+
+# datetimes and dataclasses would come back as str/dict, so those values are pickled instead;
+# nested tuples do come back as lists, which is fine for the JSON-shaped payloads cached here
+_JSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+
+class JSONRedisSerializer(RedisSerializer):
+    """Store JSON-shaped values as orjson and bytes as-is; everything else falls back to pickle"""
+    def dumps(self, value, protocol=pickle.HIGHEST_PROTOCOL):
+        value_type = type(value)
+        if value_type is bytes:
+            return _BYTES_TAG + value
+        if value_type in (dict, list, str):
+            try:
+                return _JSON_TAG + orjson.dumps(value, option=_JSON_OPTIONS)
+            except TypeError:
+                pass
+        return super().dumps(value, protocol)
+
+    def loads(self, value):
+        if value is None:
+            return None
+        tag = value[:1]
+        if tag == _JSON_TAG:
+            return orjson.loads(memoryview(value)[1:])
+        if tag == _BYTES_TAG:
+            return value[1:]
+        return super().loads(value)
+
+class JSONRedisCache(RedisCache):
+    """Flask-Caching Redis backend using JSONRedisSerializer instead of pickle for JSON-like values"""
+    serializer = JSONRedisSerializer()
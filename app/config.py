@@ -1,37 +1,61 @@
 import os
+from typing import NamedTuple, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-class Config:
+class _Config(NamedTuple):
+    """Immutable application settings, read from the environment once at import time"""
     # AWS Cognito Configuration
-    AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
-    COGNITO_USER_POOL_ID = os.getenv('COGNITO_USER_POOL_ID')
-    COGNITO_APP_CLIENT_ID = os.getenv('COGNITO_APP_CLIENT_ID')
-    COGNITO_APP_CLIENT_SECRET = os.getenv('COGNITO_APP_CLIENT_SECRET')
+    AWS_REGION: str
+    COGNITO_USER_POOL_ID: Optional[str]
+    COGNITO_APP_CLIENT_ID: Optional[str]
+    COGNITO_APP_CLIENT_SECRET: Optional[str]
     
     # AWS RDS Configuration
-    RDS_HOST = os.getenv('RDS_HOST')
-    RDS_USER = os.getenv('RDS_USER')
-    RDS_PASSWORD = os.getenv('RDS_PASSWORD')
-    RDS_DB_NAME = os.getenv('RDS_DB_NAME', 'stocks_db')
+    RDS_HOST: Optional[str]
+    RDS_USER: Optional[str]
+    RDS_PASSWORD: Optional[str]
+    RDS_DB_NAME: str
     
     # Alpha Vantage API Configuration
-    ALPHA_VANTAGE_API_KEY = os.getenv('ALPHA_VANTAGE_API_KEY', 'demo')
+    ALPHA_VANTAGE_API_KEY: str
     
     # AWS DynamoDB Configuration
-    AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
-    AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-    DYNAMODB_CHAT_TABLE = os.getenv('DYNAMODB_CHAT_TABLE', 'stock_app_chat_history')
+    AWS_ACCESS_KEY_ID: Optional[str]
+    AWS_SECRET_ACCESS_KEY: Optional[str]
+    DYNAMODB_CHAT_TABLE: str
     
     # LLM API Configuration
-    API_URL = os.getenv('API_URL')
-    HF_TOKEN = os.getenv('HF_TOKEN')
+    API_URL: Optional[str]
+    HF_TOKEN: Optional[str]
 
-    GROQ_API_KEY = os.getenv('GROQ_API_KEY')
+    GROQ_API_KEY: Optional[str]
     
-    # Current Price API Configuration
-    CURRENT_PRICE_API_URL = os.getenv('CURRENT_PRICE_API_URL', 'http://stockmarket-alb-1487408875.us-east-1.elb.amazonaws.com/current-price')
+    # Redis Configuration (shared cache and sessions across workers)
+    REDIS_URL: Optional[str]
     
-    # Other configuration... 
\ No newline at end of file
+    # Current Price API Configuration
+    CURRENT_PRICE_API_URL: str
+
+# Frozen at import time; attribute reads are plain tuple lookups
+Config = _Config(
+    AWS_REGION=os.getenv('AWS_REGION', 'us-east-1'),
+    COGNITO_USER_POOL_ID=os.getenv('COGNITO_USER_POOL_ID'),
+    COGNITO_APP_CLIENT_ID=os.getenv('COGNITO_APP_CLIENT_ID'),
+    COGNITO_APP_CLIENT_SECRET=os.getenv('COGNITO_APP_CLIENT_SECRET'),
+    RDS_HOST=os.getenv('RDS_HOST'),
+    RDS_USER=os.getenv('RDS_USER'),
+    RDS_PASSWORD=os.getenv('RDS_PASSWORD'),
+    RDS_DB_NAME=os.getenv('RDS_DB_NAME', 'stocks_db'),
+    ALPHA_VANTAGE_API_KEY=os.getenv('ALPHA_VANTAGE_API_KEY', 'demo'),
+    AWS_ACCESS_KEY_ID=os.getenv('AWS_ACCESS_KEY_ID'),
+    AWS_SECRET_ACCESS_KEY=os.getenv('AWS_SECRET_ACCESS_KEY'),
+    DYNAMODB_CHAT_TABLE=os.getenv('DYNAMODB_CHAT_TABLE', 'stock_app_chat_history'),
+    API_URL=os.getenv('API_URL'),
+    HF_TOKEN=os.getenv('HF_TOKEN'),
+    GROQ_API_KEY=os.getenv('GROQ_API_KEY'),
+    REDIS_URL=os.getenv('REDIS_URL'),
+    CURRENT_PRICE_API_URL=os.getenv('CURRENT_PRICE_API_URL', 'http://stockmarket-alb-1487408875.us-east-1.elb.amazonaws.com/current-price')
+)
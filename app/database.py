@@ -1,181 +1,260 @@
 import os
-import pymysql
 import logging
-from pymysql.cursors import DictCursor
+from contextlib import contextmanager
+
+# Prefer mysqlclient (C extension) for protocol parsing; fall back to pure-Python PyMySQL
+try:
+    import MySQLdb as mysql_driver
+    from MySQLdb.cursors import DictCursor
+    from MySQLdb.connections import Connection as DriverConnection
+except ImportError:
+    import pymysql as mysql_driver
+    from pymysql.cursors import DictCursor
+    from pymysql.connections import Connection as DriverConnection
+from dbutils.pooled_db import PooledDB
 from app.config import Config
 
 logger = logging.getLogger(__name__)
 
+# PyMySQL's begin() sends BEGIN; mysqlclient has no begin(), so DBUtils' begin() only marks the
+# connection as in a transaction and, with the pool's autocommit, each statement would commit on its own
+_DRIVER_BEGINS_TRANSACTION = hasattr(DriverConnection, 'begin')
+
+# Schema DDL, built once at import; entries are created in order so foreign keys resolve
+SCHEMA_DDL = (
+    ('users', """
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        cognito_sub VARCHAR(255) NOT NULL UNIQUE,
+        username VARCHAR(255) NOT NULL UNIQUE,
+        email VARCHAR(255) NOT NULL UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    );
+    """),
+    ('portfolios', """
+    CREATE TABLE IF NOT EXISTS portfolios (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    );
+    """),
+    ('portfolio_stocks', """
+    CREATE TABLE IF NOT EXISTS portfolio_stocks (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        portfolio_id INT NOT NULL,
+        symbol VARCHAR(20) NOT NULL,
+        quantity DECIMAL(10,2) NOT NULL,
+        purchase_price DECIMAL(10,2) NOT NULL,
+        purchase_date DATE NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (portfolio_id) REFERENCES portfolios(id) ON DELETE CASCADE
+    );
+    """),
+    ('user_preferences', """
+    CREATE TABLE IF NOT EXISTS user_preferences (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        default_dashboard VARCHAR(255),
+        theme VARCHAR(50) DEFAULT 'light',
+        email_notifications BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    );
+    """),
+)
+
 class Database:
     def __init__(self):
-        self.connection = None
+        self.pool = None
         self.connect()
         
     def connect(self):
-        """Establish a connection to the MySQL RDS database"""
+        """Create a pool of connections to the MySQL RDS database"""
         try:
-            # First connect without specifying a database
-            initial_connection = pymysql.connect(
-                host=Config.RDS_HOST,
-                user=Config.RDS_USER,
-                password=Config.RDS_PASSWORD,
-                charset='utf8mb4',
-                connect_timeout=5
-            )
-            
-            # Create the database if it doesn't exist
-            with initial_connection.cursor() as cursor:
-                cursor.execute(f"CREATE DATABASE IF NOT EXISTS {Config.RDS_DB_NAME}")
-                logger.info(f"Database {Config.RDS_DB_NAME} created or verified")
-            
-            initial_connection.close()
+            # First connect without specifying a database (skipped once the schema exists)
+            if not os.getenv('SKIP_SCHEMA_INIT'):
+                initial_connection = mysql_driver.connect(
+                    host=Config.RDS_HOST,
+                    user=Config.RDS_USER,
+                    password=Config.RDS_PASSWORD,
+                    charset='utf8mb4',
+                    connect_timeout=5
+                )
+                
+                # Create the database if it doesn't exist
+                with initial_connection.cursor() as cursor:
+                    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {Config.RDS_DB_NAME}")
+                    logger.info("Database %s created or verified", Config.RDS_DB_NAME)
+                
+                initial_connection.close()
             
-            # Now connect to the specific database
-            self.connection = pymysql.connect(
+            # Now pool connections to the specific database; ping=1 checks a
+            # connection before handing it out so dead ones are replaced.
+            # autocommit avoids a COMMIT round-trip after every statement;
+            # use transaction() when several writes must succeed together.
+            self.pool = PooledDB(
+                creator=mysql_driver,
+                mincached=2,
+                maxcached=10,
+                maxconnections=20,
+                blocking=True,
+                ping=1,
                 host=Config.RDS_HOST,
                 user=Config.RDS_USER,
                 password=Config.RDS_PASSWORD,
                 db=Config.RDS_DB_NAME,
                 charset='utf8mb4',
                 cursorclass=DictCursor,
+                autocommit=True,
                 connect_timeout=5
             )
-            logger.info("Database connection established")
+            logger.info("Database connection pool established (%s)", mysql_driver.__name__)
             
             # Create tables if they don't exist
             self._create_tables()
             
         except Exception as e:
-            logger.error(f"Failed to connect to database: {str(e)}")
-            self.connection = None
+            logger.error("Failed to connect to database: %s", e)
+            self.pool = None
+    
+    def _get_connection(self):
+        """Borrow a connection from the pool, creating the pool if needed"""
+        if not self.pool:
+            self.connect()
+            
+        if not self.pool:
+            return None
+            
+        try:
+            return self.pool.connection()
+        except Exception as e:
+            logger.error("Failed to get pooled connection: %s", e)
+            return None
     
     def _create_tables(self):
         """Create necessary tables if they don't exist"""
+        # Set SKIP_SCHEMA_INIT=1 on workers that run against an initialized schema
+        if os.getenv('SKIP_SCHEMA_INIT'):
+            logger.info("Skipping schema initialization (SKIP_SCHEMA_INIT is set)")
+            return
+            
+        connection = self.pool.connection()
         try:
-            with self.connection.cursor() as cursor:
-                # Create users table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    cognito_sub VARCHAR(255) NOT NULL UNIQUE,
-                    username VARCHAR(255) NOT NULL UNIQUE,
-                    email VARCHAR(255) NOT NULL UNIQUE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                );
-                """)
+            with connection.cursor() as cursor:
+                # One round-trip to find which tables already exist
+                table_names = [name for name, _ in SCHEMA_DDL]
+                placeholders = ', '.join(['%s'] * len(table_names))
+                cursor.execute(
+                    "SELECT table_name AS name FROM information_schema.tables "
+                    f"WHERE table_schema = %s AND table_name IN ({placeholders})",
+                    (Config.RDS_DB_NAME, *table_names)
+                )
+                existing = {row['name'] for row in cursor.fetchall()}
                 
-                # Create portfolios table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS portfolios (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT NOT NULL,
-                    name VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                );
-                """)
+                # Only run DDL for the tables that are missing
+                for name, ddl in SCHEMA_DDL:
+                    if name not in existing:
+                        cursor.execute(ddl)
+                        logger.info("Created table %s", name)
                 
-                # Create portfolio_stocks table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS portfolio_stocks (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    portfolio_id INT NOT NULL,
-                    symbol VARCHAR(20) NOT NULL,
-                    quantity DECIMAL(10,2) NOT NULL,
-                    purchase_price DECIMAL(10,2) NOT NULL,
-                    purchase_date DATE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    FOREIGN KEY (portfolio_id) REFERENCES portfolios(id) ON DELETE CASCADE
-                );
-                """)
-                
-                # Create user_preferences table
-                cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_preferences (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT NOT NULL,
-                    default_dashboard VARCHAR(255),
-                    theme VARCHAR(50) DEFAULT 'light',
-                    email_notifications BOOLEAN DEFAULT FALSE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-                );
-                """)
-                
-                self.connection.commit()
                 logger.info("Database tables created or verified")
                 
         except Exception as e:
-            logger.error(f"Error creating tables: {str(e)}")
+            logger.error("Error creating tables: %s", e)
+        finally:
+            connection.close()
     
     def query(self, sql, params=None):
         """Execute a query and return results"""
-        if not self.connection:
-            self.connect()
-            
-        if not self.connection:
+        connection = self._get_connection()
+        if not connection:
             logger.error("Cannot execute query - no database connection")
             return None
             
         try:
-            with self.connection.cursor() as cursor:
+            with connection.cursor() as cursor:
                 cursor.execute(sql, params or ())
-                self.connection.commit()
                 return cursor.fetchall()
         except Exception as e:
-            logger.error(f"Query error: {str(e)}, SQL: {sql}")
-            self.connection.rollback()
+            logger.error("Query error: %s, SQL: %s", e, sql)
+            connection.rollback()
             return None
+        finally:
+            connection.close()  # Returns the connection to the pool
     
     def execute(self, sql, params=None):
         """Execute a command (like INSERT, UPDATE, DELETE)"""
-        if not self.connection:
-            self.connect()
-            
-        if not self.connection:
+        connection = self._get_connection()
+        if not connection:
             logger.error("Cannot execute command - no database connection")
             return False
             
         try:
-            with self.connection.cursor() as cursor:
-                result = cursor.execute(sql, params or ())
-                self.connection.commit()
-                return result
+            with connection.cursor() as cursor:
+                return cursor.execute(sql, params or ())
         except Exception as e:
-            logger.error(f"Execution error: {str(e)}, SQL: {sql}")
-            self.connection.rollback()
+            logger.error("Execution error: %s, SQL: %s", e, sql)
+            connection.rollback()
             return False
+        finally:
+            connection.close()  # Returns the connection to the pool
     
     def insert(self, sql, params=None):
         """Insert data and return the last inserted ID"""
-        if not self.connection:
-            self.connect()
-            
-        if not self.connection:
+        connection = self._get_connection()
+        if not connection:
             logger.error("Cannot execute insert - no database connection")
             return None
             
         try:
-            with self.connection.cursor() as cursor:
+            with connection.cursor() as cursor:
                 cursor.execute(sql, params or ())
-                self.connection.commit()
                 return cursor.lastrowid
         except Exception as e:
-            logger.error(f"Insert error: {str(e)}, SQL: {sql}")
-            self.connection.rollback()
+            logger.error("Insert error: %s, SQL: %s", e, sql)
+            connection.rollback()
             return None
+        finally:
+            connection.close()  # Returns the connection to the pool
+    
+    @contextmanager
+    def transaction(self):
+        """Run several statements atomically: yields a cursor, commits on success, rolls back on error"""
+        connection = self._get_connection()
+        if not connection:
+            raise RuntimeError("Cannot start transaction - no database connection")
+            
+        try:
+            # Also tells DBUtils not to transparently reconnect in the middle of the transaction
+            connection.begin()
+            with connection.cursor() as cursor:
+                if not _DRIVER_BEGINS_TRANSACTION:
+                    cursor.execute("START TRANSACTION")
+                yield cursor
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()  # Returns the connection to the pool
     
     def close(self):
-        """Close the database connection"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
-            logger.info("Database connection closed")
+        """Close all pooled database connections"""
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+            logger.info("Database connection pool closed")
 
 # Create a singleton instance
-db = Database() 
\ No newline at end of file
+db = Database()
+
+def get_db():
+    """Return the shared pooled Database instance"""
+    return db
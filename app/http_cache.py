@@ -0,0 +1,53 @@
+import hashlib
+import logging
+from functools import wraps
+from flask import request, current_app, make_response
+from app import cache
+
+logger = logging.getLogger(__name__)
+
+def cached_json(ttl=300, stale_while_revalidate=60):
+    """Decorator for read-only JSON routes: caches the body server-side and adds HTTP caching headers
+    
+    Successful bodies are kept in the app cache for `ttl` seconds, keyed by
+    path and query string. Responses carry Cache-Control and an ETag, so a
+    client sending a matching If-None-Match gets an empty 304.
+    Error responses (non-200 or a 'status': 'error' body) are not cached.
+    
+    Args:
+        ttl: Seconds to keep the body in the cache and max-age for clients
+        stale_while_revalidate: Seconds clients may serve a stale copy while refreshing
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            cache_key = f"http_cache:{request.full_path}"
+            body = cache.get(cache_key)
+            
+            if body is None:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                    
+                payload = response.get_json(silent=True)
+                if isinstance(payload, dict) and payload.get('status') == 'error':
+                    return response
+                    
+                body = response.get_data()
+                cache.set(cache_key, body, timeout=ttl)
+            
+            response = current_app.response_class(body, mimetype='application/json')
+            response.headers['Cache-Control'] = f"public, max-age={ttl}, stale-while-revalidate={stale_while_revalidate}"
+            response.set_etag(hashlib.md5(body).hexdigest())
+            return response.make_conditional(request)
+        return decorated_function
+    return decorator
+
+def no_store(f):
+    """Decorator for GET routes with side effects (fetch-and-store): forbid any cache from reusing the response"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    return decorated_function
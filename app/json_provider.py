@@ -0,0 +1,20 @@
+import decimal
+import orjson
+from flask.json.provider import JSONProvider, DefaultJSONProvider
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster serialization of large payloads"""
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    @staticmethod
+    def _default(obj):
+        # orjson has no Decimal support; match Flask's default of emitting a string
+        if isinstance(obj, decimal.Decimal):
+            return str(obj)
+        return DefaultJSONProvider.default(obj)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self._default, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
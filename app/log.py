@@ -0,0 +1,13 @@
+import os
+import logging
+
+LOG_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s'
+
+def configure_logging(level=None):
+    """Configure root logging once for the process; LOG_LEVEL defaults to INFO"""
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+def get_logger(name):
+    """Return the module logger; handlers and level come from configure_logging"""
+    return logging.getLogger(name)
@@ -1,14 +1,64 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
-import logging
-import json
-from flask import Blueprint, jsonify, request
+from app.log import get_logger
+import orjson
+import threading
+from collections import OrderedDict
+from cachetools import LRUCache
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, TimeoutError as FutureTimeoutError
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from app.config import Config
 from app.services.vector_service import VectorService
+from app.services.registry import get_service
+from app.http_cache import cached_json, no_store
 import hashlib
 
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# Connect/read timeouts (seconds) for Finnhub API calls
+FINNHUB_TIMEOUT = (3, 10)
+
+# One process-wide pool for symbol fan-out: threads are reused across requests and
+# concurrent bulk fetches share the same cap, keeping us under Finnhub's rate limit
+FINNHUB_MAX_WORKERS = 8
+_fetch_executor = ThreadPoolExecutor(max_workers=FINNHUB_MAX_WORKERS, thread_name_prefix='finnhub')
+
+# How long a coalesced caller waits on an in-flight fetch before fetching itself (seconds)
+INFLIGHT_WAIT_TIMEOUT = 30
+
+# Max article URL hashes remembered for de-duplication before the oldest are evicted
+SEEN_ARTICLES_MAX = 100000
+
+# Max (symbol, weeks) entries kept for conditional GETs; each holds that window's processed articles
+ETAG_CACHE_MAX = 256
+
+# News windows are clamped to 1..MAX_NEWS_WEEKS, so request parameters map onto a small set of cache keys
+MAX_NEWS_WEEKS = 12
+
+def _normalize_weeks(weeks):
+    """Clamp a requested news window to 1..MAX_NEWS_WEEKS weeks"""
+    try:
+        weeks = int(weeks)
+    except (TypeError, ValueError):
+        return 3
+    return min(max(weeks, 1), MAX_NEWS_WEEKS)
+
+def _url_hash(url):
+    """Short stable key for an article URL"""
+    return hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+
+def _published_iso(timestamp, default):
+    """ISO date for a Finnhub epoch timestamp, or default when it is missing or invalid"""
+    if not timestamp:
+        return default
+    try:
+        return datetime.fromtimestamp(timestamp).isoformat()
+    except (TypeError, ValueError, OverflowError, OSError) as e:
+        logger.error(f"Error processing Finnhub article timestamp {timestamp!r}: {str(e)}")
+        return default
 
 # Define Blueprint
 finnhub_bp = Blueprint('finnhub', __name__)
@@ -16,9 +66,33 @@ finnhub_bp = Blueprint('finnhub', __name__)
 class FinnhubService:
     def __init__(self):
         self.api_key = os.getenv("FINNHUB_API_KEY")
-        self.vector_service = VectorService()
+        self.vector_service = get_service(VectorService)
         logger.info("FinnhubService initialized with VectorService")
         
+        # One keep-alive session per service so TLS handshakes are reused across calls;
+        # pool_maxsize covers the concurrent fetches in iter_all_company_news
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self._session.mount('https://', adapter)
+        
+        # Last ETag and processed articles per (symbol, weeks), for conditional GETs; least recently
+        # used entries are evicted so arbitrary request symbols cannot grow it without bound
+        self._etags = LRUCache(maxsize=ETAG_CACHE_MAX)
+        self._etags_lock = threading.Lock()
+        
+        # LRU of URL hashes already in VectorDB, primed per symbol on first fetch
+        self._seen = OrderedDict()
+        self._seen_symbols = set()
+        self._seen_lock = threading.Lock()
+        
+        # In-flight fetches by (symbol, weeks); concurrent identical requests share one upstream call
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        
         # List of companies to track
         self.companies = [
             'AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA', 'BRKB', 'META', 'TSLA',
@@ -26,8 +100,82 @@ class FinnhubService:
             'PFE', 'KO', 'CVX', 'PEP', 'ABBV', 'WMT', 'COST'
         ]
 
-    def fetch_company_news(self, symbol, weeks=3):
-        """Fetch news for a specific company and store in VectorDB"""
+    def _prime_seen(self, symbol):
+        """Load URL hashes already stored for a symbol so other processes' writes are not repeated"""
+        if symbol in self._seen_symbols:
+            return
+        stored = self.vector_service.get_news_by_symbol(symbol, limit=1000)
+        with self._seen_lock:
+            for item in stored:
+                if item.get('url'):
+                    self._seen[_url_hash(item['url'])] = None
+            self._seen_symbols.add(symbol)
+            while len(self._seen) > SEEN_ARTICLES_MAX:
+                self._seen.popitem(last=False)
+
+    def _filter_unseen(self, symbol, articles):
+        """Return the articles not stored yet and mark them as seen"""
+        self._prime_seen(symbol)
+        unseen = []
+        with self._seen_lock:
+            for article in articles:
+                key = _url_hash(article['link'])
+                if key in self._seen:
+                    self._seen.move_to_end(key)
+                    continue
+                self._seen[key] = None
+                unseen.append(article)
+            while len(self._seen) > SEEN_ARTICLES_MAX:
+                self._seen.popitem(last=False)
+        return unseen
+
+    def _forget_articles(self, articles):
+        """Unmark articles whose storage failed so the next fetch retries them"""
+        with self._seen_lock:
+            for article in articles:
+                self._seen.pop(_url_hash(article['link']), None)
+
+    def fetch_company_news(self, symbol, weeks=3, defer_store=False):
+        """Fetch news for a specific company and store in VectorDB
+        
+        With defer_store=True nothing is written; the articles to store are
+        returned under 'to_store' so the caller can batch them across symbols.
+        Concurrent calls for the same (symbol, weeks) share a single upstream
+        request; deferred fetches are never shared, as each caller stores its own.
+        """
+        weeks = _normalize_weeks(weeks)
+        if defer_store:
+            return self._fetch_company_news(symbol, weeks, defer_store=True)
+        
+        key = (symbol, weeks)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not leader:
+            try:
+                # Copy so callers can't mutate each other's result
+                return dict(future.result(timeout=INFLIGHT_WAIT_TIMEOUT))
+            except FutureTimeoutError:
+                logger.warning(f"Timed out waiting on in-flight Finnhub fetch for {symbol}; fetching directly")
+                return self._fetch_company_news(symbol, weeks)
+        
+        try:
+            result = self._fetch_company_news(symbol, weeks)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    def _fetch_company_news(self, symbol, weeks=3, defer_store=False):
+        """Upstream fetch behind fetch_company_news"""
         try:
             if not self.api_key:
                 logger.error("Finnhub API key not configured")
@@ -55,7 +203,22 @@ class FinnhubService:
                 'token': self.api_key
             }
             
-            response = requests.get(url, params=params)
+            # Ask Finnhub to skip the body if nothing changed since the last poll
+            with self._etags_lock:
+                cached = self._etags.get((symbol, weeks))
+            headers = {'If-None-Match': cached[0]} if cached else None
+            
+            response = self._session.get(url, params=params, headers=headers, timeout=FINNHUB_TIMEOUT)
+            
+            if response.status_code == 304 and cached:
+                # Unchanged: skip JSON parsing and VectorDB writes
+                logger.info(f"Finnhub news for {symbol} unchanged since last fetch")
+                return {
+                    'status': 'success',
+                    'data': cached[1],
+                    'message': f'News for {symbol} unchanged, stored 0 in VectorDB',
+                    'articles_stored': 0
+                }
             
             if response.status_code != 200:
                 logger.error(f"Finnhub API error: {response.status_code} - {response.text}")
@@ -64,7 +227,8 @@ class FinnhubService:
                     'message': f'Finnhub API error: {response.status_code}'
                 }
             
-            news_data = response.json()
+            # orjson parses the multi-KB article arrays several times faster than stdlib json
+            news_data = orjson.loads(response.content)
             
             if not news_data:
                 logger.warning(f"No news found for {symbol}")
@@ -74,49 +238,42 @@ class FinnhubService:
                     'message': f'No news found for {symbol}'
                 }
             
-            # Process and store articles
-            processed_articles = []
+            # Skip articles without required fields in one pass
+            valid_articles = [a for a in news_data if a.get('headline') and a.get('url')]
+            if not valid_articles:
+                logger.warning(f"No usable news found for {symbol}")
+                return {
+                    'status': 'success',
+                    'data': [],
+                    'message': f'No news found for {symbol}'
+                }
+            
             articles_stored = 0
             storage_failures = 0
             
-            # Create a list of news items for bulk storage
-            news_items_to_store = []
+            # One ingest time for the whole batch; every article has the same dict shape
+            now_iso = datetime.now().isoformat()
+            processed_articles = [
+                {
+                    'title': article['headline'],
+                    'summary': article.get('summary', ''),
+                    'link': article['url'],
+                    'source': article.get('source', 'Finnhub'),
+                    'published': _published_iso(article.get('datetime'), now_iso),
+                    'symbol': symbol,
+                    'timestamp': now_iso,
+                    'related': article.get('related', ''),
+                    'image': article.get('image', ''),
+                    'category': article.get('category', '')
+                }
+                for article in valid_articles
+            ]
             
-            for article in news_data:
-                try:
-                    # Skip articles without required fields
-                    if not article.get('headline') or not article.get('url'):
-                        continue
-                    
-                    # Format timestamp to datetime
-                    if article.get('datetime'):
-                        date = datetime.fromtimestamp(article['datetime'])
-                    else:
-                        date = datetime.now()
-                    
-                    # Create article object
-                    formatted_article = {
-                        'title': article.get('headline', ''),
-                        'summary': article.get('summary', ''),
-                        'link': article.get('url', ''),
-                        'source': article.get('source', 'Finnhub'),
-                        'published': date.isoformat(),
-                        'symbol': symbol,
-                        'timestamp': datetime.now().isoformat(),
-                        'related': article.get('related', ''),
-                        'image': article.get('image', ''),
-                        'category': article.get('category', '')
-                    }
-                    
-                    processed_articles.append(formatted_article)
-                    news_items_to_store.append(formatted_article)
-                
-                except Exception as e:
-                    logger.error(f"Error processing Finnhub article: {str(e)}")
-                    continue
+            # Overlapping polling windows return mostly known articles; only embed new ones
+            news_items_to_store = self._filter_unseen(symbol, processed_articles)
             
             # Store all articles in vector database at once
-            if news_items_to_store:
+            if news_items_to_store and not defer_store:
                 try:
                     logger.info(f"Storing {len(news_items_to_store)} Finnhub articles in VectorDB")
                     success = self.vector_service.store_news(news_items_to_store)
@@ -129,15 +286,27 @@ class FinnhubService:
                 except Exception as storage_error:
                     storage_failures = len(news_items_to_store)
                     logger.error(f"Exception storing Finnhub articles in VectorDB: {str(storage_error)}")
+                if storage_failures:
+                    self._forget_articles(news_items_to_store)
             
             logger.info(f"Finnhub news summary for {symbol}: {len(processed_articles)} articles found, {articles_stored} stored in VectorDB, {storage_failures} storage failures")
             
+            # Remember the ETag only once the articles were stored, so failures are retried
+            etag = response.headers.get('ETag')
+            if etag and not storage_failures:
+                with self._etags_lock:
+                    self._etags[(symbol, weeks)] = (etag, processed_articles)
+            
             # Return the processed articles
-            return {
+            result = {
                 'status': 'success',
                 'data': processed_articles,
-                'message': f'Fetched {len(processed_articles)} articles for {symbol}, stored {articles_stored} in VectorDB'
+                'message': f'Fetched {len(processed_articles)} articles for {symbol}, stored {articles_stored} in VectorDB',
+                'articles_stored': articles_stored
             }
+            if defer_store:
+                result['to_store'] = news_items_to_store
+            return result
             
         except Exception as e:
             logger.error(f"Error in fetch_company_news: {str(e)}")
@@ -146,31 +315,83 @@ class FinnhubService:
                 'message': str(e)
             }
 
-    def fetch_all_company_news(self):
-        """Fetch news for all tracked companies"""
+    def _summarize_company_result(self, result):
+        """Reduce a fetch_company_news result to the per-symbol counts reported by the bulk fetch"""
+        if result['status'] != 'success':
+            return {
+                'error': result.get('message', 'Unknown error')
+            }
+            
+        return {
+            'count': len(result.get('data', [])),
+            'stored': result.get('articles_stored', 0)
+        }
+
+    def iter_all_company_news(self, weeks=3):
+        """Fetch news for all tracked companies concurrently, yielding (symbol, summary) as each completes"""
+        futures = {
+            _fetch_executor.submit(self.fetch_company_news, symbol, weeks): symbol
+            for symbol in self.companies
+        }
+        for future in as_completed(futures):
+            yield futures[future], self._summarize_company_result(future.result())
+
+    def store_deferred(self, pending, weeks):
+        """Store articles returned by fetch_company_news(defer_store=True) in one VectorDB batch
+        
+        Args:
+            pending: Dictionary mapping symbol to its 'to_store' articles
+            weeks: The window the articles were fetched with
+            
+        Returns:
+            Number of articles stored (0 if the batch failed)
+        """
+        # One embed + upsert (and one old-news cleanup) instead of one per symbol
+        all_items = [item for items in pending.values() for item in items]
+        if not all_items:
+            return 0
+            
+        logger.info(f"Storing {len(all_items)} Finnhub articles for {len(pending)} companies in VectorDB")
         try:
+            success = self.vector_service.store_news(all_items)
+        except Exception as e:
+            logger.error(f"Exception storing Finnhub articles in VectorDB: {str(e)}")
+            success = False
+            
+        if success:
+            return len(all_items)
+            
+        logger.error("Failed to store Finnhub articles in VectorDB - returned False")
+        self._forget_articles(all_items)
+        # Forget the ETags so the next poll downloads and stores these again
+        with self._etags_lock:
+            for symbol in pending:
+                self._etags.pop((symbol, weeks), None)
+        return 0
+
+    def fetch_all_company_news(self, weeks=3):
+        """Fetch news for all tracked companies, storing every symbol's articles in one VectorDB batch"""
+        try:
+            # Same key as fetch_company_news uses, so store_deferred clears the right ETags
+            weeks = _normalize_weeks(weeks)
             results = {}
-            total_stored = 0
+            pending = {}
+            
+            futures = {
+                _fetch_executor.submit(self.fetch_company_news, symbol, weeks, defer_store=True): symbol
+                for symbol in self.companies
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                result = future.result()
+                results[symbol] = self._summarize_company_result(result)
+                if result.get('to_store'):
+                    pending[symbol] = result['to_store']
             
-            for symbol in self.companies:
-                result = self.fetch_company_news(symbol)
-                if result['status'] == 'success':
-                    # Extract just the number of articles stored from the message
-                    import re
-                    stored_count = 0
-                    match = re.search(r'stored (\d+) in VectorDB', result['message'])
-                    if match:
-                        stored_count = int(match.group(1))
-                    
-                    results[symbol] = {
-                        'count': len(result.get('data', [])),
-                        'stored': stored_count
-                    }
-                    total_stored += stored_count
-                else:
-                    results[symbol] = {
-                        'error': result.get('message', 'Unknown error')
-                    }
+            total_stored = self.store_deferred(pending, weeks)
+            if total_stored:
+                for symbol, items in pending.items():
+                    results[symbol]['stored'] = len(items)
             
             return {
                 'status': 'success',
@@ -212,9 +433,10 @@ class FinnhubService:
             }
 
 # Initialize service for route handlers
-finnhub_service = FinnhubService()
+finnhub_service = get_service(FinnhubService)
 
 @finnhub_bp.route('/news/<symbol>', methods=['GET'])
+@cached_json(ttl=300)
 def get_finnhub_news(symbol):
     """Get stored Finnhub news for a specific symbol"""
     try:
@@ -229,6 +451,7 @@ def get_finnhub_news(symbol):
         }), 500
 
 @finnhub_bp.route('/fetch/<symbol>', methods=['GET'])
+@no_store
 def fetch_finnhub_news(symbol):
     """Fetch and store news from Finnhub API for a specific symbol"""
     try:
@@ -243,6 +466,7 @@ def fetch_finnhub_news(symbol):
         }), 500
 
 @finnhub_bp.route('/fetch/all', methods=['GET'])
+@no_store
 def fetch_all_finnhub_news():
     """Fetch and store news for all tracked companies"""
     try:
@@ -253,4 +477,20 @@ def fetch_all_finnhub_news():
         return jsonify({
             'status': 'error',
             'message': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@finnhub_bp.route('/fetch/all/stream', methods=['GET'])
+@no_store
+def stream_all_finnhub_news():
+    """Fetch and store news for all tracked companies, streaming one NDJSON line per symbol as it completes"""
+    weeks = request.args.get('weeks', default=3, type=int)
+    
+    def generate():
+        try:
+            for symbol, summary in finnhub_service.iter_all_company_news(weeks):
+                yield orjson.dumps({'symbol': symbol, **summary}, option=orjson.OPT_APPEND_NEWLINE)
+        except Exception as e:
+            logger.error(f"Error in stream_all_finnhub_news: {str(e)}")
+            yield orjson.dumps({'status': 'error', 'message': str(e)}, option=orjson.OPT_APPEND_NEWLINE)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -1,6 +1,6 @@
-from flask import Blueprint, request, jsonify, session
-import logging
-from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, session, current_app, has_app_context, Response, stream_with_context
+from app.log import get_logger
+from datetime import datetime, timedelta, date
 from app.services.stock_service import StockService
 from app.services.news_service import NewsService
 from app.services.social_service import SocialService
@@ -8,21 +8,75 @@ from app.services.llm_service import LLMService
 from app.services.chat_history_service import chat_history_service
 from app.services.llm_endpoint import generate_prediction
 from app.routes.finnhub_routes import FinnhubService
+from app.services.registry import get_service as _get_service
 from app import cache
 from app.routes.user_routes import jwt_required  # Import the jwt_required decorator
 import re
 import json
-from datetime import datetime
+import hashlib
+import heapq
+import orjson
+import threading
+import queue
+import atexit
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import zip_longest
+from functools import lru_cache
+from cachetools import TTLCache
 from groq import Groq
 import requests  # Add this import for HTTP requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from app.config import Config
 
+# zstd shrinks large step-data blobs (prices, articles, posts) before they go to the cache
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bounded timeout/retries so a stalled Groq call cannot pin a worker thread for minutes
 client = Groq(
-    api_key=Config.GROQ_API_KEY
+    api_key=Config.GROQ_API_KEY,
+    timeout=30.0,
+    max_retries=1
 )
 
 # Set up logging
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# Pooled keep-alive session for the current-price API, shared by all requests
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+)
+http_session.mount('http://', _http_adapter)
+http_session.mount('https://', _http_adapter)
+
+@dataclass
+class FormattedArticle:
+    """News article as returned by the /news step; orjson serializes dataclasses natively"""
+    __slots__ = ('title', 'published', 'source', 'link', 'summary')
+    title: str
+    published: str
+    source: str
+    link: str
+    summary: str
+
+@dataclass
+class FormattedPost:
+    """Reddit post as returned by the /socialmedia step; the JSON provider writes datetimes in ISO format"""
+    __slots__ = ('title', 'score', 'created', 'author', 'sentiment', 'body')
+    title: str
+    score: int
+    created: datetime  # '' when the post has no timestamp
+    author: str
+    sentiment: float
+    body: str
 
 # Create blueprint
 multistep_prediction_bp = Blueprint('multistep_prediction', __name__)
@@ -30,10 +84,103 @@ multistep_prediction_bp = Blueprint('multistep_prediction', __name__)
 # Cache duration for storing step data (15 minutes)
 CACHE_DURATION = 900
 
+# Cache duration for LLM results keyed by prompt content (1 hour)
+LLM_CACHE_DURATION = 3600
+
+# Shared (cross-user) caches for pipeline inputs: daily prices, and semantic news per 5-minute bucket
+HISTORICAL_CACHE_DURATION = 6 * 3600
+NEWS_SEARCH_CACHE_DURATION = 300
+SOCIAL_CACHE_DURATION = 300
+
+# Per-process L1 in front of those shared (L2) caches; a hit skips the cache round-trip and deserialization
+L1_CACHE_SIZE = 1024
+L1_CACHE_TTL = 300
+_hist_cache = TTLCache(maxsize=L1_CACHE_SIZE, ttl=L1_CACHE_TTL)
+_news_cache = TTLCache(maxsize=L1_CACHE_SIZE, ttl=L1_CACHE_TTL)
+_social_cache = TTLCache(maxsize=L1_CACHE_SIZE, ttl=L1_CACHE_TTL)
+_l1_lock = threading.Lock()  # TTLCache is not thread-safe
+
+# zip_longest fill value; distinct from None, which is a legitimate (missing) volume
+_MISSING = object()
+
+# Reciprocal-rank-fusion constant for merging batched semantic searches
+RRF_K = 60
+
+# Shared pool for running independent step I/O (Finnhub, news, social) concurrently
+_step_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='multistep')
+
+def _submit_in_app_context(fn, *args, **kwargs):
+    """Run fn on the step executor inside an app context, so it can use the cache"""
+    app = current_app._get_current_object()
+    def run():
+        with app.app_context():
+            return fn(*args, **kwargs)
+    return _step_executor.submit(run)
+
+def _log_prefetch_error(future):
+    if future.exception() is not None:
+        logger.warning("Prefetch failed: %s", future.exception())
+
+def _prefetch(fn, *args):
+    """Warm a shared cache for the step the client is expected to call next; the result is not awaited"""
+    _submit_in_app_context(fn, *args).add_done_callback(_log_prefetch_error)
+
 def get_cache_key(user_id, symbol):
     """Generate a cache key for storing step data"""
     return f"multistep_prediction:{user_id}:{symbol}"
 
+def _llm_cache_key(prompt):
+    return 'llm:' + hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+def cached_llm_call(prompt, llm_call, timeout=LLM_CACHE_DURATION):
+    """Return llm_call(prompt), reusing a cached result for an identical prompt
+    
+    Args:
+        prompt: The full prompt text; its hash is the cache key
+        llm_call: Function taking the prompt and returning the LLM result
+        timeout: Seconds to keep a result
+        
+    Returns:
+        The LLM result (failed calls returning None are not cached)
+    """
+    prompt_key = _llm_cache_key(prompt)
+    cached = cache.get(prompt_key)
+    if cached is not None:
+        logger.info("Using cached LLM result")
+        return cached
+    
+    result = llm_call(prompt)
+    if result is not None:
+        cache.set(prompt_key, result, timeout=timeout)
+    return result
+
+def _prompt_cache_key(user_id, symbol, step_data, user_query):
+    """Key for a built /result prompt; the step-data timestamp changes whenever /historical restarts the analysis"""
+    digest = hashlib.blake2b(f"{step_data.get('timestamp')}:{user_query}".encode(), digest_size=16).hexdigest()
+    return f"prompt_prefix:{user_id}:{symbol}:{digest}"
+
+def build_result_prompt(user_id, symbol, user_query, step_data):
+    """Multi-step prompt for /result, built once per analysis
+    
+    A retried or reconnecting /result (the step data is only cleared once a
+    result is stored) reuses the cached prompt instead of re-reading chat
+    history and re-formatting the step data. The identical text also keeps
+    the LLM result cache key stable.
+    """
+    prompt_key = _prompt_cache_key(user_id, symbol, step_data, user_query)
+    prompt = cache.get(prompt_key)
+    if prompt is not None:
+        logger.info("Using cached multi-step prompt for %s", symbol)
+        return prompt
+    
+    prompt = _get_service(LLMService).generate_multistep_prompt(
+        data=step_data,
+        user_query=user_query,
+        user_id=user_id
+    )
+    cache.set(prompt_key, prompt, timeout=CACHE_DURATION)
+    return prompt
+
 def fetch_historical_data(symbol, period='3w'):
     """Helper function to fetch historical stock data
     
@@ -46,10 +193,10 @@ def fetch_historical_data(symbol, period='3w'):
     """
     try:
         # Fetch historical stock data
-        stock_service = StockService()
+        stock_service = _get_service(StockService)
         return stock_service.get_historical_prices(symbol, period=period)
     except Exception as e:
-        logger.error(f"Error fetching historical data: {str(e)}")
+        logger.error("Error fetching historical data: %s", e)
         return {
             'status': 'error',
             'message': f"Error fetching historical data: {str(e)}"
@@ -67,14 +214,14 @@ def fetch_news_data(symbol, user_query):
     """
     try:
         # Initialize services
-        news_service = NewsService()
+        news_service = _get_service(NewsService)
         
         # Try semantic search for relevant articles
         similar_news_result = news_service.search_similar_news(user_query, symbol, limit=5)
         
         # If semantic search fails, try fallback to Finnhub
         if similar_news_result['status'] != 'success' or not similar_news_result.get('data'):
-            finnhub_service = FinnhubService()
+            finnhub_service = _get_service(FinnhubService)
             finnhub_result = finnhub_service.fetch_company_news(symbol, weeks=2)
             
             if finnhub_result['status'] == 'success' and finnhub_result.get('data'):
@@ -91,12 +238,95 @@ def fetch_news_data(symbol, user_query):
         
         return similar_news_result
     except Exception as e:
-        logger.error(f"Error fetching news data: {str(e)}")
+        logger.error("Error fetching news data: %s", e)
         return {
             'status': 'error',
             'message': f"Error fetching news data: {str(e)}"
         }
 
+def search_news_fused(news_service, user_query, symbol, limit=5):
+    """Semantic search for the user query plus keyword variants in one vector DB request
+    
+    Results are merged with reciprocal-rank fusion; returns the same shape as
+    NewsService.search_similar_news.
+    """
+    queries = [user_query, f"{symbol} earnings", f"{symbol} news"]
+    batch_result = news_service.search_similar_news_batch(queries, symbol, limit=limit)
+    if batch_result['status'] != 'success':
+        return batch_result
+    
+    scores = {}
+    articles = {}
+    for hits in batch_result['data']:
+        for rank, article in enumerate(hits):
+            article_id = article.get('id') or article.get('title')
+            scores[article_id] = scores.get(article_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            articles.setdefault(article_id, article)
+    
+    top_ids = heapq.nlargest(limit, scores, key=scores.get)
+    return {
+        'status': 'success',
+        'data': [articles[article_id] for article_id in top_ids],
+        'message': f'Found {len(top_ids)} similar news items'
+    }
+
+def _is_success(result):
+    """Only successful service results are worth memoizing"""
+    return isinstance(result, dict) and result.get('status') == 'success'
+
+@cache.memoize(timeout=HISTORICAL_CACHE_DURATION, response_filter=_is_success)
+def _get_historical_cached(symbol, day):
+    """3 weeks of prices for symbol, shared across users for the given calendar day"""
+    return _get_service(StockService).get_historical_prices(symbol, period="3w")
+
+@cache.memoize(timeout=NEWS_SEARCH_CACHE_DURATION, response_filter=_is_success)
+def _get_news_cached(symbol, user_query, bucket):
+    """Fused semantic news search, shared across users within one time bucket
+    
+    memoize keys on an md5 of the arguments, so long queries don't grow the key.
+    """
+    return search_news_fused(_get_service(NewsService), user_query, symbol, limit=5)
+
+def _has_posts(result):
+    return isinstance(result, dict) and bool(result.get('posts'))
+
+@cache.memoize(timeout=SOCIAL_CACHE_DURATION, response_filter=_has_posts)
+def _get_social_cached(symbol):
+    """Reddit posts and sentiment for symbol, shared across users"""
+    return _get_service(SocialService).fetch_reddit_posts(symbol)
+
+def _two_level(l1, key, loader, keep):
+    """Return l1[key], else load through the shared (memoized) cache and keep results passing keep()"""
+    with _l1_lock:
+        value = l1.get(key)
+    if value is not None:
+        return value
+    value = loader()
+    if keep(value):
+        with _l1_lock:
+            l1[key] = value
+    return value
+
+def clear_local_caches():
+    """Drop this process's L1 entries; the shared caches are left alone"""
+    with _l1_lock:
+        for l1 in (_hist_cache, _news_cache, _social_cache):
+            l1.clear()
+
+def get_historical(symbol):
+    """3 weeks of prices for symbol: in-process cache, then the shared per-day cache, then StockService"""
+    day = date.today().isoformat()
+    return _two_level(_hist_cache, (symbol, day), lambda: _get_historical_cached(symbol, day), _is_success)
+
+def get_news_search(symbol, user_query):
+    """Fused semantic news search: in-process cache, then the shared 5-minute cache, then the vector DB"""
+    bucket = int(time.time() // NEWS_SEARCH_CACHE_DURATION)
+    return _two_level(_news_cache, (symbol, user_query, bucket), lambda: _get_news_cached(symbol, user_query, bucket), _is_success)
+
+def get_social(symbol):
+    """Reddit posts: in-process cache, then the shared cache, then SocialService"""
+    return _two_level(_social_cache, symbol, lambda: _get_social_cached(symbol), _has_posts)
+
 def fetch_social_data(symbol):
     """Helper function to fetch social media data
     
@@ -108,12 +338,12 @@ def fetch_social_data(symbol):
     """
     try:
         # Initialize services
-        social_service = SocialService()
+        social_service = _get_service(SocialService)
         
         # Fetch social media data
         return social_service.fetch_reddit_posts(symbol)
     except Exception as e:
-        logger.error(f"Error fetching social media data: {str(e)}")
+        logger.error("Error fetching social media data: %s", e)
         return {
             'status': 'error',
             'message': f"Error fetching social media data: {str(e)}"
@@ -141,7 +371,7 @@ def generate_prediction_from_data(user_id, data):
             }
         
         # Initialize LLM service
-        llm_service = LLMService()
+        llm_service = _get_service(LLMService)
         
         # Generate prompt for LLM
         prompt = llm_service.generate_multistep_prompt(
@@ -185,12 +415,12 @@ def generate_prediction_from_data(user_id, data):
                         
                         # Calculate the predicted price and update it in the LLM response
                         recalculated_price = round(current_price * (1 + percentage_change), 2)
-                        logger.info(f"Recalculated predicted price for {symbol}: {recalculated_price} based on current price {current_price} and percentage change {percentage_change * 100}%")
+                        logger.info("Recalculated predicted price for %s: %s based on current price %s and percentage change %s%%", symbol, recalculated_price, current_price, percentage_change * 100)
                         
                         # Update the predicted price in the LLM response
                         refined_json['predicted_price'] = str(recalculated_price)
                     except (ValueError, TypeError) as e:
-                        logger.error(f"Error calculating predicted price: {str(e)}")
+                        logger.error("Error calculating predicted price: %s", e)
             
             response_data = {
                 'status': 'success',
@@ -208,7 +438,7 @@ def generate_prediction_from_data(user_id, data):
             else:
                 # Use a dummy price when current price is not available
                 response_data['data']['currentPrice'] = 100.00
-                logger.warning(f"Using dummy price for {symbol} as current price data is not available")
+                logger.warning("Using dummy price for %s as current price data is not available", symbol)
                 
             return response_data
         else:
@@ -228,85 +458,216 @@ def generate_prediction_from_data(user_id, data):
             else:
                 # Use a dummy price when current price is not available
                 response_data['data']['currentPrice'] = 100.00
-                logger.warning(f"Using dummy price for {symbol} as current price data is not available")
+                logger.warning("Using dummy price for %s as current price data is not available", symbol)
                 
             return response_data
     except Exception as e:
-        logger.error(f"Error generating prediction: {str(e)}")
+        logger.error("Error generating prediction: %s", e)
         return {
             'status': 'error',
             'message': f"Error generating prediction: {str(e)}"
         }
 
+REFINE_MODEL = "llama-3.3-70b-versatile"
+REFINE_SYSTEM_PROMPT = (
+    "You are a helpful assistant. Given the following instructions, respond with following analysis strictly into single line JSON with keys and values in double quotes only and no /\n entire json should be in one line so i can use json.loads on the string. Your output should ONLY be a JSON object with these 6 fields and double quotes keys and values:\n predicted_price: \n predicted_percentage_change: \n predicted_direction: Up or Down \n analysis: \n positive_developments: <2 or 3 always give in array of strings format>\n potential_concerns: <2 or 3 always give in array of strings format>\n Do not return anything except valid JSON. Do not write anything outside JSON format."
+)
+
+def _refine_messages(raw_llm_text):
+    return [
+        {"role": "system", "content": REFINE_SYSTEM_PROMPT},
+        {"role": "user", "content": raw_llm_text}
+    ]
+
+def _parse_refined(response_text):
+    """JSON object from Groq's reply when it parses, else the raw text"""
+    # Only parse if not already a dict
+    if isinstance(response_text, dict):
+        cleaned_text = response_text
+    else:
+        try:
+            cleaned_text = json.loads(response_text)
+        except Exception as e:
+            print(f"[Groq JSON fallback] Error: {e}")
+            cleaned_text = None
+    if cleaned_text:
+        return cleaned_text
+    else:
+        return response_text
+
 def refine_with_groq(raw_llm_text):
     """Try to get structured JSON from Groq. Return None on failure."""
     try:
-        logger.info(f"raw-llm-text - {raw_llm_text}")
+        logger.info("raw-llm-text - %s", raw_llm_text)
         chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a helpful assistant. Given the following instructions, respond with following analysis strictly into single line JSON with keys and values in double quotes only and no /\n entire json should be in one line so i can use json.loads on the string. Your output should ONLY be a JSON object with these 6 fields and double quotes keys and values:\n predicted_price: \n predicted_percentage_change: \n predicted_direction: Up or Down \n analysis: \n positive_developments: <2 or 3 always give in array of strings format>\n potential_concerns: <2 or 3 always give in array of strings format>\n Do not return anything except valid JSON. Do not write anything outside JSON format."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": raw_llm_text
-                }
-            ],
-            model="llama-3.3-70b-versatile"
+            messages=_refine_messages(raw_llm_text),
+            model=REFINE_MODEL
         )
 
         response_text = chat_completion.choices[0].message.content
-        logging.info(f"response from groq {response_text}")
-        # Only parse if not already a dict
-        if isinstance(response_text, dict):
-            cleaned_text = response_text
-        else:
-            try:
-                cleaned_text = json.loads(response_text)
-            except Exception as e:
-                print(f"[Groq JSON fallback] Error: {e}")
-                cleaned_text = None
-        if cleaned_text:
-            return cleaned_text
-        else:
-            return response_text
+        logger.info("response from groq %s", response_text)
+        return _parse_refined(response_text)
     except Exception as e:
         print(f"[Groq JSON fallback] Error: {e}")
         return None
 
+def stream_refine_with_groq(raw_llm_text):
+    """Yield Groq's structured-output reply chunk by chunk as tokens arrive"""
+    stream = client.chat.completions.create(
+        messages=_refine_messages(raw_llm_text),
+        model=REFINE_MODEL,
+        stream=True
+    )
+    for chunk in stream:
+        content = chunk.choices[0].delta.content if chunk.choices else None
+        if content:
+            yield content
+
+FOLLOWUP_MODEL = "llama3-8b-8192"  # or "llama3-70b-8192" if you're on that tier
+FOLLOWUP_SYSTEM_PROMPT = (
+    "You are FinanceGPT, an expert stock analyst continuing a conversation. Use the conversation history and current question to give a short, informative response. Do NOT contradict or change any previous prediction prices you have given in the conversation history. Only answer the current question. Reply in a single paragraph. Avoid repeating the full history."
+)
+
+# User prompt for /followup; only the placeholders are filled per request
+FOLLOWUP_PROMPT_TEMPLATE = """You are an AI financial analyst and stock market expert specializing in providing insights about publicly traded companies.
+
+Answer the following question about {symbol} stock with accurate, up-to-date information.
+
+IMPORTANT INSTRUCTIONS:
+- If the chat history contains any previous price predictions or target prices, do NOT contradict or change these values.
+- Maintain consistency with all previously predicted values and analysis.
+- Your task is to CLARIFY and EXPAND upon previous predictions, not to revise them.
+- If asked specifically about predictions, refer to the ones already made in the previous conversation.
+
+Refer to this conversation history: 
+<conversation history>{history_section}</conversation history>
+
+Current Question about {symbol}: {user_query}
+
+Answer:
+"""
+
+def _followup_messages(prompt):
+    return [
+        {"role": "system", "content": FOLLOWUP_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt.strip()}
+    ]
 
 def get_followup_response_from_groq(prompt: str) -> str:
     """Sends a follow-up prompt to Groq LLM and returns a short, clean response."""
     try:
         chat_completion = client.chat.completions.create(
-            model="llama3-8b-8192",  # or "llama3-70b-8192" if you're on that tier
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are FinanceGPT, an expert stock analyst continuing a conversation. Use the conversation history and current question to give a short, informative response. Do NOT contradict or change any previous prediction prices you have given in the conversation history. Only answer the current question. Reply in a single paragraph. Avoid repeating the full history."
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": prompt.strip()
-                }
-            ]
+            model=FOLLOWUP_MODEL,
+            messages=_followup_messages(prompt)
         )
 
         response_text = chat_completion.choices[0].message.content.strip()
         return response_text
 
     except Exception as e:
-        logging.error(f"[Groq follow-up error] {e}")
+        logger.error("[Groq follow-up error] %s", e)
         return "Sorry, I couldn't generate a follow-up response at this time."
 
+def stream_followup_response_from_groq(prompt: str):
+    """Yield the follow-up response from Groq chunk by chunk as tokens arrive"""
+    try:
+        stream = client.chat.completions.create(
+            model=FOLLOWUP_MODEL,
+            messages=_followup_messages(prompt),
+            stream=True
+        )
+        for chunk in stream:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                yield content
+    except Exception as e:
+        logger.error("[Groq follow-up stream error] %s", e)
+        yield "Sorry, I couldn't generate a follow-up response at this time."
+
+def _sse(event):
+    """Format one server-sent event carrying a JSON payload"""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+# Payloads at least this large are zstd-compressed; a zstd frame never looks like JSON
+STEP_COMPRESS_MIN_BYTES = 1024
+ZSTD_FRAME_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# zstandard (de)compressor objects are not thread-safe, so each thread gets its own
+_zstd_local = threading.local()
+
+def _zstd():
+    if not hasattr(_zstd_local, 'compressor'):
+        _zstd_local.compressor = zstandard.ZstdCompressor(level=3)
+        _zstd_local.decompressor = zstandard.ZstdDecompressor()
+    return _zstd_local
+
+def _pack_step_data(data):
+    """Serialize step data for the cache; compact JSON bytes are smaller and faster than a pickled dict"""
+    payload = orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    if zstandard is not None and len(payload) >= STEP_COMPRESS_MIN_BYTES:
+        return _zstd().compressor.compress(payload)
+    return payload
+
+def _unpack_step_data(raw):
+    """Inverse of _pack_step_data; values cached as plain dicts are returned unchanged"""
+    if isinstance(raw, (bytes, bytearray)):
+        if raw[:4] == ZSTD_FRAME_MAGIC:
+            raw = _zstd().decompressor.decompress(raw)
+        return orjson.loads(raw)
+    return raw
+
+def _encode_historical(historical):
+    """Store trading dates as day offsets from the first date; prices and volumes are kept exact"""
+    dates = historical.get('dates') if isinstance(historical, dict) else None
+    if not dates:
+        return historical
+    try:
+        base = date.fromisoformat(dates[0])
+        offsets = [(date.fromisoformat(d) - base).days for d in dates]
+    except (TypeError, ValueError):
+        return historical
+    encoded = {k: v for k, v in historical.items() if k != 'dates'}
+    encoded['base_date'] = dates[0]
+    encoded['day_offsets'] = offsets
+    return encoded
+
+def _decode_historical(historical):
+    """Inverse of _encode_historical; plain historical dicts are returned unchanged"""
+    if not isinstance(historical, dict) or 'day_offsets' not in historical:
+        return historical
+    decoded = {k: v for k, v in historical.items() if k not in ('base_date', 'day_offsets')}
+    base = date.fromisoformat(historical['base_date'])
+    decoded['dates'] = [(base + timedelta(days=offset)).isoformat() for offset in historical['day_offsets']]
+    return decoded
+
+def _pack_step_field(field, value):
+    """Pack one Redis hash field; the historical dates shrink to small integers first"""
+    if field == 'historical':
+        value = _encode_historical(value)
+    return _pack_step_data(value)
+
+def _unpack_step_field(field, raw):
+    value = _unpack_step_data(raw)
+    if field == 'historical':
+        value = _decode_historical(value)
+    return value
+
+def _step_redis():
+    """Raw Redis client when Redis backs the cache (see configure_cache_and_sessions), else None"""
+    if has_app_context():
+        return current_app.extensions.get('redis')
+    return None
+
+def _step_hash_key(user_id, symbol):
+    """Redis hash holding one field per step"""
+    return f"sai:step:{get_cache_key(user_id, symbol)}"
+
 def cache_step_data(user_id, symbol, data):
     """Cache data between steps in the multistep prediction process
     
+    With Redis each top-level key is a separate hash field, so later steps
+    can read or update single fields instead of the whole blob.
+    
     Args:
         user_id: The user ID
         symbol: The stock symbol
@@ -315,21 +676,76 @@ def cache_step_data(user_id, symbol, data):
     Returns:
         None
     """
+    redis_client = _step_redis()
+    if redis_client is not None:
+        hash_key = _step_hash_key(user_id, symbol)
+        pipe = redis_client.pipeline()
+        pipe.delete(hash_key)
+        pipe.hset(hash_key, mapping={field: _pack_step_field(field, value) for field, value in data.items()})
+        pipe.expire(hash_key, CACHE_DURATION)
+        pipe.execute()
+        return
+        
     cache_key = get_cache_key(user_id, symbol)
-    cache.set(cache_key, data, timeout=CACHE_DURATION)
+    cache.set(cache_key, _pack_step_data(data), timeout=CACHE_DURATION)
 
-def get_cached_step_data(user_id, symbol):
+def update_step_data(user_id, symbol, step_data, **fields):
+    """Add fields to the cached step data, writing only those fields when Redis is used
+    
+    Without Redis the cache is the per-process simple cache, so rewriting the
+    whole entry there costs no network bandwidth.
+    
+    Args:
+        user_id: The user ID
+        symbol: The stock symbol
+        step_data: The step data as read by get_cached_step_data (updated in place)
+        **fields: Top-level keys to set, e.g. news=[...]
+        
+    Returns:
+        None
+    """
+    step_data.update(fields)
+    redis_client = _step_redis()
+    if redis_client is not None:
+        hash_key = _step_hash_key(user_id, symbol)
+        pipe = redis_client.pipeline()
+        pipe.hset(hash_key, mapping={field: _pack_step_field(field, value) for field, value in fields.items()})
+        pipe.expire(hash_key, CACHE_DURATION)
+        pipe.execute()
+        return
+        
+    cache_key = get_cache_key(user_id, symbol)
+    cache.set(cache_key, _pack_step_data(step_data), timeout=CACHE_DURATION)
+
+def get_cached_step_data(user_id, symbol, fields=None):
     """Get cached data from a previous step
     
     Args:
         user_id: The user ID
         symbol: The stock symbol
+        fields: Optional top-level keys to read; with Redis only these are transferred
         
     Returns:
         Cached data dictionary or None if not found
     """
+    redis_client = _step_redis()
+    if redis_client is not None:
+        hash_key = _step_hash_key(user_id, symbol)
+        if fields:
+            values = redis_client.hmget(hash_key, list(fields))
+            raw = {field: value for field, value in zip(fields, values) if value is not None}
+        else:
+            raw = redis_client.hgetall(hash_key)
+        if not raw:
+            return None
+        step_data = {}
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            step_data[field] = _unpack_step_field(field, value)
+        return step_data
+        
     cache_key = get_cache_key(user_id, symbol)
-    return cache.get(cache_key)
+    return _unpack_step_data(cache.get(cache_key))
 
 def clear_step_data(user_id, symbol):
     """Clear cached data after prediction is complete
@@ -341,9 +757,33 @@ def clear_step_data(user_id, symbol):
     Returns:
         None
     """
+    redis_client = _step_redis()
+    if redis_client is not None:
+        redis_client.delete(_step_hash_key(user_id, symbol))
+        return
+        
     cache_key = get_cache_key(user_id, symbol)
     cache.delete(cache_key)
 
+# Input bounds: the query is spliced into the LLM prompt, so its length bounds prompt tokens and latency
+MAX_QUERY_CHARS = 2000
+MAX_SYMBOL_LEN = 8
+_SYMBOL_RE = re.compile(r'[A-Za-z0-9.\-]{1,%d}' % MAX_SYMBOL_LEN)
+
+def _check_query_input(symbol, user_query):
+    """Return (user_query trimmed to MAX_QUERY_CHARS, None), or (None, error response) for a bad symbol or query"""
+    if not isinstance(symbol, str) or not _SYMBOL_RE.fullmatch(symbol):
+        return None, (jsonify({
+            'status': 'error',
+            'message': f'Symbol must be 1-{MAX_SYMBOL_LEN} letters, digits, "." or "-"'
+        }), 400)
+    if not isinstance(user_query, str) or not user_query.strip():
+        return None, (jsonify({
+            'status': 'error',
+            'message': 'user_query must be a non-empty string'
+        }), 400)
+    return user_query.strip()[:MAX_QUERY_CHARS], None
+
 @multistep_prediction_bp.route('/historical', methods=['POST'])
 @jwt_required
 def fetch_historical():
@@ -353,7 +793,7 @@ def fetch_historical():
         user_id = request.user['user_id']
         
         # Parse request
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data or 'symbol' not in data or 'user_query' not in data:
             return jsonify({
                 'status': 'error',
@@ -361,44 +801,63 @@ def fetch_historical():
             }), 400
             
         symbol = data['symbol']
-        user_query = data['user_query']
-        
-        # Fetch historical stock data - 3 weeks
-        stock_service = StockService()
+        user_query, error = _check_query_input(symbol, data['user_query'])
+        if error:
+            return error
         
         # Get data for past 3 weeks (21 days)
-        three_weeks_ago = (datetime.now() - timedelta(days=21)).strftime('%Y-%m-%d')
+        now = datetime.now()
+        now_iso = now.isoformat()
+        three_weeks_ago = (now - timedelta(days=21)).strftime('%Y-%m-%d')
         
-        logger.info(f"[HISTORICAL] Fetching 3 weeks of historical data for {symbol} from {three_weeks_ago} to today")
+        logger.info("[HISTORICAL] Fetching 3 weeks of historical data for %s from %s to today", symbol, three_weeks_ago)
         
         # You might need to adjust this if your service doesn't support start_date
         # This is a suggestion for implementation
-        historical_data = stock_service.get_historical_prices(symbol, period="3w")
+        historical_data = get_historical(symbol)
         
         if historical_data['status'] == 'error':
-            logger.error(f"[HISTORICAL] Error fetching data: {historical_data['message']}")
+            logger.error("[HISTORICAL] Error fetching data: %s", historical_data['message'])
             return jsonify(historical_data), 500
         
         # Log how much data we received
         if 'data' in historical_data and 'dates' in historical_data['data']:
             date_count = len(historical_data['data']['dates'])
-            logger.info(f"[HISTORICAL] Retrieved {date_count} days of data for {symbol}")
+            logger.info("[HISTORICAL] Retrieved %s days of data for %s", date_count, symbol)
             
             # Log the date range of the data
             if date_count > 0:
                 start_date = historical_data['data']['dates'][0]
                 end_date = historical_data['data']['dates'][-1]
-                logger.info(f"[HISTORICAL] Date range: {start_date} to {end_date}")
+                logger.info("[HISTORICAL] Date range: %s to %s", start_date, end_date)
         
         # Cache the data and query for subsequent steps
-        cache_key = get_cache_key(user_id, symbol)
         step_data = {
             'symbol': symbol,
             'user_query': user_query,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now_iso,
             'historical': historical_data.get('data', {})
         }
-        cache.set(cache_key, step_data, timeout=CACHE_DURATION)
+        cache_step_data(user_id, symbol, step_data)
+        
+        # The client calls /news and /socialmedia next; start their fetches now so those
+        # steps find the shared caches warm instead of waiting on the vector DB and Reddit
+        _prefetch(get_news_search, symbol, user_query)
+        _prefetch(get_social, symbol)
+        
+        # 'format': 'columns' returns parallel arrays instead of one object per day
+        columnar = data.get('format') == 'columns'
+        
+        # The ETag covers the dates, prices and volumes themselves (a refreshed bar keeps the same dates),
+        # but not the per-request timestamp; a client already holding the data gets an empty 304
+        # and the formatting below is skipped
+        hist = historical_data.get('data', {})
+        etag = hashlib.md5(orjson.dumps(
+            [symbol, int(columnar), hist.get('dates') or [], hist.get('prices') or [], hist.get('volumes') or []],
+            option=orjson.OPT_SERIALIZE_NUMPY
+        )).hexdigest()
+        if etag in request.if_none_match:
+            return '', 304, {'ETag': f'"{etag}"'}
         
         # Format a friendlier response for the frontend
         historical_prices = []
@@ -409,16 +868,23 @@ def fetch_historical():
             prices = historical_data['data']['prices']
             volumes = historical_data['data'].get('volumes', [])
             
-            for i in range(min(len(dates), len(prices))):
-                price_data = {
-                    'date': dates[i],
-                    'price': prices[i],
+            if columnar:
+                # No per-day key strings on the wire; the frontend zips the arrays
+                days = min(len(dates), len(prices))
+                historical_prices = {
+                    'dates': dates[:days],
+                    'prices': prices[:days],
+                    'volumes': volumes[:days]
                 }
-                if i < len(volumes):
-                    price_data['volume'] = volumes[i]
-                historical_prices.append(price_data)
-        
-        return jsonify({
+            else:
+                # Rows stop at the shorter of dates/prices; volume is added only where one exists
+                historical_prices = [
+                    {'date': d, 'price': p} if v is _MISSING else {'date': d, 'price': p, 'volume': v}
+                    for d, p, v in zip_longest(dates, prices, volumes, fillvalue=_MISSING)
+                    if d is not _MISSING and p is not _MISSING
+                ]
+        
+        response = jsonify({
             'status': 'success',
             'message': f'Historical data fetched for {symbol} (last 3 weeks)',
             'step': 1,
@@ -426,12 +892,14 @@ def fetch_historical():
                 'step_name': 'historical',
                 'symbol': symbol,
                 'historical_prices': historical_prices,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': now_iso
             }
         })
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
-        logger.error(f"Error in historical data step: {str(e)}")
+        logger.error("Error in historical data step: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e)
@@ -445,93 +913,89 @@ def fetch_news():
         # Get user ID from request.user (set by the jwt_required decorator)
         user_id = request.user['user_id']
         
-        logger.info(f"[NEWS-FETCH] Starting news fetch process for user {user_id}")
+        logger.info("[NEWS-FETCH] Starting news fetch process for user %s", user_id)
         
         # Parse request
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data or 'symbol' not in data or 'user_query' not in data:
-            logger.error(f"[NEWS-FETCH] Missing required parameters in request")
+            logger.error("[NEWS-FETCH] Missing required parameters in request")
             return jsonify({
                 'status': 'error',
                 'message': 'Symbol and user_query are required'
             }), 400
             
         symbol = data['symbol']
-        user_query = data['user_query']
+        user_query, error = _check_query_input(symbol, data['user_query'])
+        if error:
+            return error
         
-        logger.info(f"[NEWS-FETCH] Processing request for symbol: {symbol} with query: '{user_query}'")
+        logger.info("[NEWS-FETCH] Processing request for symbol: %s with query: '%s'", symbol, user_query)
         
-        # Get cached data from step 1
-        cache_key = get_cache_key(user_id, symbol)
-        step_data = cache.get(cache_key)
+        # Check step 1 ran; only a small field is read, not the historical data
+        step_data = get_cached_step_data(user_id, symbol, fields=('symbol',))
         
         if not step_data:
-            logger.error(f"[NEWS-FETCH] No cached data found for key: {cache_key}")
+            logger.error("[NEWS-FETCH] No cached data found for key: %s", get_cache_key(user_id, symbol))
             return jsonify({
                 'status': 'error',
                 'message': 'Historical data not found or expired. Please restart the analysis.'
             }), 400
         
         # Initialize services
-        news_service = NewsService()
-        finnhub_service = FinnhubService()
+        news_service = _get_service(NewsService)
+        finnhub_service = _get_service(FinnhubService)
         
         # FLOW STEP 1: Try semantic search first to find relevant articles for the user query
-        logger.info(f"[NEWS-FETCH] STEP 1: Attempting semantic search for '{user_query}' related to {symbol}")
-        similar_news_result = news_service.search_similar_news(user_query, symbol, limit=5)
+        logger.info("[NEWS-FETCH] STEP 1: Attempting semantic search for '%s' related to %s", user_query, symbol)
+        similar_news_result = get_news_search(symbol, user_query)
         
         has_relevant_articles = False
         articles_from_search = []
+        finnhub_result = {'status': 'skipped', 'data': []}
         
         if similar_news_result['status'] == 'success' and len(similar_news_result.get('data', [])) >= 1:
             articles_from_search = similar_news_result['data']
             has_relevant_articles = True
-            logger.info(f"[NEWS-FETCH] FLOW STEP 1 SUCCESS: Found {len(articles_from_search)} semantically relevant articles for the query")
+            logger.info("[NEWS-FETCH] FLOW STEP 1 SUCCESS: Found %s semantically relevant articles for the query", len(articles_from_search))
         else:
-            logger.info(f"[NEWS-FETCH] FLOW STEP 1 FAILED: No semantically relevant articles found, moving to step 2")
+            logger.info("[NEWS-FETCH] FLOW STEP 1 FAILED: No semantically relevant articles found, moving to step 2")
         
         # FLOW STEP 2: If no semantic search results, update VectorDB from Finnhub API and retry
         if not has_relevant_articles:
-            logger.info(f"[NEWS-FETCH] FLOW STEP 2: Updating VectorDB from Finnhub API")
+            logger.info("[NEWS-FETCH] FLOW STEP 2: Updating VectorDB from Finnhub API")
             
-            # Call Finnhub to fetch and store company news
+            # Only called once step 1 misses, so the common path makes no Finnhub request;
+            # concurrent misses for the same symbol share one upstream call
             finnhub_result = finnhub_service.fetch_company_news(symbol, weeks=2)
             
             if finnhub_result['status'] == 'success' and finnhub_result.get('data'):
                 finnhub_fetched_data = finnhub_result.get('data', [])
-                logger.info(f"[NEWS-FETCH] FLOW STEP 2: Finnhub API returned {len(finnhub_fetched_data)} articles")
+                logger.info("[NEWS-FETCH] FLOW STEP 2: Finnhub API returned %s articles", len(finnhub_fetched_data))
                 
                 # Now retry semantic search after updating VectorDB
-                logger.info(f"[NEWS-FETCH] FLOW STEP 2: Retrying semantic search after updating VectorDB")
-                similar_news_result = news_service.search_similar_news(user_query, symbol, limit=5)
+                logger.info("[NEWS-FETCH] FLOW STEP 2: Retrying semantic search after updating VectorDB")
+                similar_news_result = search_news_fused(news_service, user_query, symbol, limit=5)
                 
                 if similar_news_result['status'] == 'success' and len(similar_news_result.get('data', [])) >= 1:
                     articles_from_search = similar_news_result['data']
                     has_relevant_articles = True
-                    logger.info(f"[NEWS-FETCH] FLOW STEP 2 SUCCESS: Found {len(articles_from_search)} semantically relevant articles after VectorDB update")
+                    logger.info("[NEWS-FETCH] FLOW STEP 2 SUCCESS: Found %s semantically relevant articles after VectorDB update", len(articles_from_search))
                 else:
-                    logger.info(f"[NEWS-FETCH] FLOW STEP 2 FAILED: Still no semantically relevant articles, moving to step 3")
+                    logger.info("[NEWS-FETCH] FLOW STEP 2 FAILED: Still no semantically relevant articles, moving to step 3")
             else:
-                logger.warning(f"[NEWS-FETCH] FLOW STEP 2 FAILED: Finnhub API did not return articles")
+                logger.warning("[NEWS-FETCH] FLOW STEP 2 FAILED: Finnhub API did not return articles")
         
-        # FLOW STEP 3: If semantic search still fails, use direct Finnhub API results
+        # FLOW STEP 3: If semantic search still fails, use the articles Finnhub returned in step 2;
+        # no second Finnhub request is made, an empty step 2 result means there is nothing newer
         finnhub_direct_data = []
         if not has_relevant_articles:
-            logger.info(f"[NEWS-FETCH] FLOW STEP 3: Using direct Finnhub API results as fallback")
+            logger.info("[NEWS-FETCH] FLOW STEP 3: Using direct Finnhub API results as fallback")
             
-            # Use the data we already fetched in step 2 if available
-            if 'data' in finnhub_result and finnhub_result['data']:
+            if finnhub_result['status'] == 'success' and finnhub_result.get('data'):
                 finnhub_direct_data = finnhub_result['data']
-                logger.info(f"[NEWS-FETCH] FLOW STEP 3: Using {len(finnhub_direct_data)} articles from previous Finnhub API call")
+                logger.info("[NEWS-FETCH] FLOW STEP 3: Using %s articles from previous Finnhub API call", len(finnhub_direct_data))
             else:
-                # Try to fetch again if needed
-                finnhub_result = finnhub_service.fetch_company_news(symbol, weeks=1)
-                
-                if finnhub_result['status'] == 'success' and finnhub_result.get('data'):
-                    finnhub_direct_data = finnhub_result.get('data', [])
-                    logger.info(f"[NEWS-FETCH] FLOW STEP 3: Fresh Finnhub API call returned {len(finnhub_direct_data)} articles")
-                else:
-                    logger.error(f"[NEWS-FETCH] FLOW STEP 3 FAILED: Could not fetch articles from Finnhub API")
+                logger.error("[NEWS-FETCH] FLOW STEP 3 FAILED: Could not fetch articles from Finnhub API")
         
         # Determine which data source to use for the response
         articles_to_use = []
@@ -547,28 +1011,27 @@ def fetch_news():
             data_source = "finnhub_api"
         else:
             # This is a fallback if all approaches failed
-            logger.error(f"[NEWS-FETCH] All approaches failed to get articles")
+            logger.error("[NEWS-FETCH] All approaches failed to get articles")
             data_source = "none"
         
         # Update cache with the news data we're going to use
-        step_data['news'] = articles_to_use
-        cache.set(cache_key, step_data, timeout=CACHE_DURATION)
+        update_step_data(user_id, symbol, step_data, news=articles_to_use)
         
         # Format the articles for frontend display
         formatted_articles = []
         
         # If using semantic search results, preserve the relevance order
-        # Otherwise, sort by date (newest first)
-        sorted_articles = articles_to_use
+        # Otherwise, take the 10 newest (partial sort; same order as sorted()[:10])
+        top_articles = articles_to_use[:10]
         if data_source != "semantic_search" and articles_to_use:
-            sorted_articles = sorted(
+            top_articles = heapq.nlargest(
+                10,
                 articles_to_use,
-                key=lambda x: x.get('published', ''),
-                reverse=True
+                key=lambda x: x.get('published', '')
             )
         
         # Limit to 10 articles
-        for article in sorted_articles[:10]:
+        for article in top_articles:
             # Ensure we have a valid link
             link = "#"
             if article.get('link') and article.get('link') != "#":
@@ -576,16 +1039,16 @@ def fetch_news():
             elif article.get('url'):
                 link = article.get('url')
                 
-            formatted_articles.append({
-                'title': article.get('title', 'No title'),
-                'published': article.get('published', ''),
-                'source': article.get('source', 'Unknown'),
-                'link': link,
-                'summary': article.get('summary', 'No summary available')
-            })
+            formatted_articles.append(FormattedArticle(
+                title=article.get('title', 'No title'),
+                published=article.get('published', ''),
+                source=article.get('source', 'Unknown'),
+                link=link,
+                summary=article.get('summary', 'No summary available')
+            ))
         
-        logger.info(f"[NEWS-FETCH] Successfully formatted {len(formatted_articles)} articles for response")
-        logger.info(f"[NEWS-FETCH] DATA SOURCE: {data_source.upper()}")
+        logger.info("[NEWS-FETCH] Successfully formatted %s articles for response", len(formatted_articles))
+        logger.info("[NEWS-FETCH] DATA SOURCE: %s", data_source.upper())
         
         # Create appropriate message based on data source
         if data_source == "semantic_search":
@@ -604,12 +1067,12 @@ def fetch_news():
                 'step_name': 'news',
                 'symbol': symbol,
                 'articles': formatted_articles,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now()
             }
         })
         
     except Exception as e:
-        logger.error(f"[NEWS-FETCH] Error in news step: {str(e)}")
+        logger.error("[NEWS-FETCH] Error in news step: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e)
@@ -624,7 +1087,7 @@ def fetch_social():
         user_id = request.user['user_id']
         
         # Parse request
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data or 'symbol' not in data or 'user_query' not in data:
             return jsonify({
                 'status': 'error',
@@ -632,11 +1095,12 @@ def fetch_social():
             }), 400
             
         symbol = data['symbol']
-        user_query = data['user_query']
+        user_query, error = _check_query_input(symbol, data['user_query'])
+        if error:
+            return error
         
-        # Get cached data from previous steps
-        cache_key = get_cache_key(user_id, symbol)
-        step_data = cache.get(cache_key)
+        # Check previous steps ran; only a small field is read
+        step_data = get_cached_step_data(user_id, symbol, fields=('symbol',))
         
         if not step_data:
             return jsonify({
@@ -644,13 +1108,11 @@ def fetch_social():
                 'message': 'Previous steps data not found or expired. Please restart the analysis.'
             }), 400
         
-        # Fetch social media data
-        social_service = SocialService()
-        social_data = social_service.fetch_reddit_posts(symbol)
+        # Fetch social media data (shared across users for a few minutes)
+        social_data = get_social(symbol)
         
         # Update cache with social data
-        step_data['social'] = social_data
-        cache.set(cache_key, step_data, timeout=CACHE_DURATION)
+        update_step_data(user_id, symbol, step_data, social=social_data)
         
         # Format the top 10 Reddit posts for frontend display
         top_posts = []
@@ -658,42 +1120,40 @@ def fetch_social():
         # Get top 10 posts by score
         posts = social_data.get('posts', [])
         if posts:
-            # Sort by score (highest first)
-            sorted_posts = sorted(posts, key=lambda x: x.get('score', 0) if isinstance(x, dict) else 0, reverse=True)
+            # SocialService returns posts highest score first, so the top 10 is a slice
+            top_scored = posts[:10]
             
-            # Take top 10
-            for post in sorted_posts[:10]:
+            for post in top_scored:
                 # Convert timestamp to readable date if available
                 created_date = ''
-                if 'created_utc' in post and post['created_utc']:
+                created_utc = post.get('created_utc')
+                if created_utc:
                     try:
-                        created_date = datetime.fromtimestamp(post['created_utc']).isoformat()
+                        created_date = datetime.fromtimestamp(created_utc)
                     except Exception:
                         pass
                 
                 # Extract author - prefer 'author' field, fall back to subreddit or 'Unknown'
-                author = post.get('author', post.get('subreddit', 'Unknown'))
+                author = post['author'] if 'author' in post else post.get('subreddit', 'Unknown')
                 
                 # Get sentiment polarity directly if available in that format, or from the sentiment object
-                sentiment_value = 0
-                if isinstance(post.get('sentiment'), dict):
-                    sentiment_value = post.get('sentiment', {}).get('polarity', 0)
-                else:
-                    sentiment_value = post.get('sentiment', 0)
+                sentiment_value = post.get('sentiment', 0)
+                if isinstance(sentiment_value, dict):
+                    sentiment_value = sentiment_value.get('polarity', 0)
                 
-                # Extract selftext/body content if available
-                body = ''
-                if 'selftext' in post:
-                    body = post['selftext']
+                # Extract selftext/body content if available; only long posts are copied and truncated
+                body = post.get('selftext') or ''
+                if len(body) > 200:
+                    body = body[:200] + '...'
                 
-                top_posts.append({
-                    'title': post.get('title', 'No title'),
-                    'score': post.get('score', 0),
-                    'created': created_date,
-                    'author': author,
-                    'sentiment': sentiment_value,
-                    'body': body[:200] + ('...' if len(body) > 200 else '')  # Truncate long posts
-                })
+                top_posts.append(FormattedPost(
+                    title=post.get('title', 'No title'),
+                    score=post.get('score', 0),
+                    created=created_date,
+                    author=author,
+                    sentiment=sentiment_value,
+                    body=body
+                ))
         
         # Get sentiment summary
         sentiment_summary = social_data.get('sentiment_summary', {})
@@ -707,17 +1167,189 @@ def fetch_social():
                 'symbol': symbol,
                 'posts': top_posts,
                 'sentiment_summary': sentiment_summary,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now()
             }
         })
         
     except Exception as e:
-        logger.error(f"Error in social media step: {str(e)}")
+        logger.error("Error in social media step: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
+@multistep_prediction_bp.route('/prepare', methods=['POST'])
+@multistep_prediction_bp.route('/analyze', methods=['POST'])
+@jwt_required
+def prepare_analysis():
+    """Steps 1-3 in one call: fetch historical, news and social data concurrently"""
+    try:
+        # Get user ID from request.user (set by the jwt_required decorator)
+        user_id = request.user['user_id']
+        
+        # Parse request
+        data = request.get_json(silent=True)
+        if not data or 'symbol' not in data or 'user_query' not in data:
+            return jsonify({
+                'status': 'error',
+                'message': 'Symbol and user_query are required'
+            }), 400
+            
+        symbol = data['symbol']
+        user_query, error = _check_query_input(symbol, data['user_query'])
+        if error:
+            return error
+        
+        # The three sources are independent upstreams, so wall time is the slowest one.
+        # They go through the same in-process and shared caches as /historical, /news and /socialmedia
+        historical_future = _submit_in_app_context(get_historical, symbol)
+        news_future = _submit_in_app_context(get_news_search, symbol, user_query)
+        social_future = _submit_in_app_context(get_social, symbol)
+        historical_data = historical_future.result()
+        
+        try:
+            news_result = news_future.result()
+        except Exception as e:
+            logger.error("[PREPARE] Error searching news for %s: %s", symbol, e)
+            news_result = {'status': 'error', 'message': str(e)}
+        
+        try:
+            social_data = social_future.result()
+        except Exception as e:
+            logger.error("[PREPARE] Error fetching social media data for %s: %s", symbol, e)
+            social_data = {'status': 'error', 'message': str(e)}
+        
+        if historical_data['status'] == 'error':
+            logger.error("[PREPARE] Error fetching historical data: %s", historical_data['message'])
+            return jsonify(historical_data), 500
+        
+        articles = news_result.get('data', []) if news_result.get('status') == 'success' else []
+        
+        # Same fallback as /news: with no semantic match, use what Finnhub returns directly
+        if not articles:
+            finnhub_result = _get_service(FinnhubService).fetch_company_news(symbol, weeks=2)
+            if finnhub_result['status'] == 'success' and finnhub_result.get('data'):
+                articles = finnhub_result['data']
+                news_result = {'status': 'success', 'data': articles, 'source': 'finnhub_api'}
+        if social_data.get('status') == 'error':
+            logger.warning("[PREPARE] Social media data unavailable for %s: %s", symbol, social_data['message'])
+        
+        # Cache everything once for the /result step
+        step_data = {
+            'symbol': symbol,
+            'user_query': user_query,
+            'timestamp': datetime.now().isoformat(),
+            'historical': historical_data.get('data', {}),
+            'news': articles,
+            'social': social_data
+        }
+        cache_step_data(user_id, symbol, step_data)
+        
+        return jsonify({
+            'status': 'success',
+            'message': f'Historical, news and social media data fetched for {symbol}',
+            'step': 3,
+            'data': {
+                'step_name': 'prepare',
+                'symbol': symbol,
+                'price_points': len(step_data['historical'].get('dates', [])),
+                'article_count': len(articles),
+                'news_source': news_result.get('source', 'semantic_search') if articles else 'none',
+                'post_count': len(social_data.get('posts', [])),
+                'timestamp': step_data['timestamp']
+            }
+        })
+        
+    except Exception as e:
+        logger.error("Error in prepare step: %s", e)
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def _finish_result(user_id, symbol, user_query, refined_json, now_iso):
+    """Store the multi-step result in chat history and drop the step data"""
+    # Store in chat history
+    chat_history_service.store_chat(
+        user_id,
+        user_query,
+        refined_json,
+        metadata={
+            'symbol': symbol,
+            'timestamp': now_iso,
+            'analysis_type': 'multi-step'
+        }
+    )
+    
+    # Clear cache after successful completion
+    clear_step_data(user_id, symbol)
+
+def _fetch_current_price(symbol, auth_header):
+    """Current price payload from the price API, or None when unavailable"""
+    try:
+        # Set up headers with authentication
+        headers = {}
+        if auth_header:
+            headers['Authorization'] = auth_header
+        
+        current_price_url = f"{Config.CURRENT_PRICE_API_URL}?ticker={symbol}"
+        current_price_response = http_session.get(current_price_url, headers=headers, timeout=(3.05, 10))
+        if current_price_response.status_code == 200:
+            current_price_data = current_price_response.json()
+            logger.info("Retrieved current price for %s: %s", symbol, current_price_data)
+            return current_price_data
+        logger.warning("Failed to retrieve current price for %s: %s", symbol, current_price_response.status_code)
+    except Exception as e:
+        logger.error("Error fetching current price for %s: %s", symbol, e)
+    return None
+
+def _build_result_response(data, refined_json, current_price_data, now_iso):
+    """Final /result payload, with the predicted price recalculated from the current price"""
+    symbol = data['symbol']
+    
+    # 3. Fallback logic
+    if refined_json:
+        # Calculate predicted price based on current price and percentage change from LLM
+        if current_price_data and 'currentPrice' in current_price_data:
+            current_price = current_price_data['currentPrice']
+            percentage_change = 0.0
+            
+            # Try to extract percentage change from LLM response
+            if isinstance(refined_json, dict) and 'predicted_percentage_change' in refined_json:
+                try:
+                    # Remove % sign if present and convert to float
+                    percentage_str = str(refined_json['predicted_percentage_change']).replace('%', '')
+                    percentage_change = float(percentage_str) / 100.0
+                    
+                    # Calculate the predicted price and update it in the LLM response
+                    recalculated_price = round(current_price * (1 + percentage_change), 2)
+                    logger.info("Recalculated predicted price for %s: %s based on current price %s and percentage change %s%%", symbol, recalculated_price, current_price, percentage_change * 100)
+                    
+                    # Update the predicted price in the LLM response
+                    refined_json['predicted_price'] = str(recalculated_price)
+                except (ValueError, TypeError) as e:
+                    logger.error("Error calculating predicted price: %s", e)
+    
+    response_data = {
+        'status': 'success',
+        'data': {
+            'symbol': data['symbol'],
+            'user_query': data['user_query'],
+            'structured_output' if refined_json else 'llm_response': refined_json,
+            'timestamp': now_iso
+        }
+    }
+    
+    # Add current price to response if available, otherwise use dummy price
+    if current_price_data:
+        response_data['data']['currentPrice'] = current_price_data['currentPrice']
+    else:
+        # Use a dummy price when current price is not available
+        response_data['data']['currentPrice'] = 100.00
+        logger.warning("Using dummy price for %s as current price data is not available", symbol)
+        
+    return response_data
+
 @multistep_prediction_bp.route('/result', methods=['POST'])
 @jwt_required
 def generate_result():
@@ -727,7 +1359,7 @@ def generate_result():
         user_id = request.user['user_id']
         
         # Parse request
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data or 'symbol' not in data or 'user_query' not in data:
             return jsonify({
                 'status': 'error',
@@ -735,11 +1367,12 @@ def generate_result():
             }), 400
             
         symbol = data['symbol']
-        user_query = data['user_query']
+        user_query, error = _check_query_input(symbol, data['user_query'])
+        if error:
+            return error
         
-        # Get cached data from all previous steps
-        cache_key = get_cache_key(user_id, symbol)
-        step_data = cache.get(cache_key)
+        # Get cached data from all previous steps in one round-trip
+        step_data = get_cached_step_data(user_id, symbol)
         
         if not step_data:
             return jsonify({
@@ -766,178 +1399,197 @@ def generate_result():
                 'message': 'Missing social media data. Please complete all steps.'
             }), 400
         
-        # Generate LLM prompt using the multi-step format
-        llm_service = LLMService()
-        # --- LOGGING: Fetch and log chat history for this user and symbol ---
-        try:
-            history_result = chat_history_service.get_chat_history(user_id, limit=3)
-            if history_result.get('status') == 'success' and history_result.get('data'):
-                chat_history = history_result.get('data', [])
-                logger.info(f"[RESULT ROUTE] Raw chat history entries: {chat_history}")
-                chat_history_text = ""
-                for i, entry in enumerate(chat_history):
-                    symbol_in_metadata = None
-                    if 'metadata' in entry and entry['metadata']:
-                        try:
-                            metadata = json.loads(entry['metadata'])
-                            symbol_in_metadata = metadata.get('symbol')
-                        except Exception as e:
-                            logger.warning(f"[RESULT ROUTE] Could not parse metadata: {e}")
-                    if symbol_in_metadata == symbol:
-                        chat_history_text += f"Previous Question: {entry.get('query', '')}\n"
-                        chat_history_text += f"Previous Answer: {entry.get('response', '')}\n\n"
-                logger.info(f"[RESULT ROUTE] chat_history_text: {chat_history_text}")
-            else:
-                logger.info(f"[RESULT ROUTE] No chat history found for user {user_id}")
-        except Exception as e:
-            logger.warning(f"[RESULT ROUTE] Error retrieving chat history: {str(e)}")
-        # --- END LOGGING ---
-        prompt = llm_service.generate_multistep_prompt(
-            data=step_data,
-            user_query=user_query,
-            user_id=user_id
-        )
-        
-        logger.info(f"Generated multi-step prompt for {symbol}")
+        # Generate LLM prompt using the multi-step format; it and the chat history in it are only read on a cache miss
+        prompt = build_result_prompt(user_id, symbol, user_query, step_data)
         
-        # Call LLM to generate prediction
-        refined_json = refine_with_groq(prompt)
-
-        # Store in chat history
-        chat_history_service.store_chat(
-            user_id,
-            user_query,
-            refined_json,
-            metadata={
-                'symbol': symbol,
-                'timestamp': datetime.now().isoformat(),
-                'analysis_type': 'multi-step'
-            }
-        )
+        logger.info("Generated multi-step prompt for %s", symbol)
         
-        # Clear cache after successful completion
-        cache.delete(cache_key)
+        auth_header = request.headers.get('Authorization')
         
-        # Fetch current price from the API
-        current_price_data = None
-        try:
-            # Get the JWT token from the request
-            auth_header = request.headers.get('Authorization')
+        # Clients that accept text/event-stream see Groq's tokens as they arrive; the
+        # final event carries the same payload as the JSON response
+        if request.accept_mimetypes.best == 'text/event-stream':
+            # The current price lookup overlaps with generation
+            price_future = _step_executor.submit(_fetch_current_price, symbol, auth_header)
             
-            # Set up headers with authentication
-            headers = {}
-            if auth_header:
-                headers['Authorization'] = auth_header
-            
-            current_price_url = f"{Config.CURRENT_PRICE_API_URL}?ticker={symbol}"
-            current_price_response = requests.get(current_price_url, headers=headers)
-            if current_price_response.status_code == 200:
-                current_price_data = current_price_response.json()
-                logger.info(f"Retrieved current price for {symbol}: {current_price_data}")
-            else:
-                logger.warning(f"Failed to retrieve current price for {symbol}: {current_price_response.status_code}")
-        except Exception as e:
-            logger.error(f"Error fetching current price for {symbol}: {str(e)}")
-        
-        # 3. Fallback logic
-        if refined_json:
-            # Calculate predicted price based on current price and percentage change from LLM
-            if current_price_data and 'currentPrice' in current_price_data:
-                current_price = current_price_data['currentPrice']
-                percentage_change = 0.0
-                
-                # Try to extract percentage change from LLM response
-                if isinstance(refined_json, dict) and 'predicted_percentage_change' in refined_json:
+            def generate():
+                prompt_key = _llm_cache_key(prompt)
+                refined_json = cache.get(prompt_key)
+                if refined_json is None:
+                    chunks = []
                     try:
-                        # Remove % sign if present and convert to float
-                        percentage_str = str(refined_json['predicted_percentage_change']).replace('%', '')
-                        percentage_change = float(percentage_str) / 100.0
-                        
-                        # Calculate the predicted price and update it in the LLM response
-                        recalculated_price = round(current_price * (1 + percentage_change), 2)
-                        logger.info(f"Recalculated predicted price for {symbol}: {recalculated_price} based on current price {current_price} and percentage change {percentage_change * 100}%")
-                        
-                        # Update the predicted price in the LLM response
-                        refined_json['predicted_price'] = str(recalculated_price)
-                    except (ValueError, TypeError) as e:
-                        logger.error(f"Error calculating predicted price: {str(e)}")
-            
-            response_data = {
-                'status': 'success',
-                'data': {
-                    'symbol': data['symbol'],
-                    'user_query': data['user_query'],
-                    'structured_output': refined_json,
-                    'timestamp': datetime.now().isoformat()
-                }
-            }
-            
-            # Add current price to response if available, otherwise use dummy price
-            if current_price_data:
-                response_data['data']['currentPrice'] = current_price_data['currentPrice']
-            else:
-                # Use a dummy price when current price is not available
-                response_data['data']['currentPrice'] = 100.00
-                logger.warning(f"Using dummy price for {symbol} as current price data is not available")
+                        for chunk in stream_refine_with_groq(prompt):
+                            chunks.append(chunk)
+                            yield _sse({'delta': chunk})
+                        refined_json = _parse_refined(''.join(chunks))
+                    except Exception as e:
+                        logger.error("[Groq JSON stream] Error: %s", e)
+                        refined_json = None
+                    if refined_json is not None:
+                        cache.set(prompt_key, refined_json, timeout=LLM_CACHE_DURATION)
+                else:
+                    logger.info("Using cached LLM result")
                 
-            return response_data
-        else:
-            response_data = {
-                'status': 'success',
-                'data': {
-                    'symbol': data['symbol'],
-                    'user_query': data['user_query'],
-                    'llm_response': refined_json,
-                    'timestamp': datetime.now().isoformat()
-                }
-            }
+                now_iso = datetime.now().isoformat()
+                _finish_result(user_id, symbol, user_query, refined_json, now_iso)
+                yield _sse(_build_result_response(data, refined_json, price_future.result(), now_iso))
             
-            # Add current price to response if available, otherwise use dummy price
-            if current_price_data:
-                response_data['data']['currentPrice'] = current_price_data['currentPrice']
-            else:
-                # Use a dummy price when current price is not available
-                response_data['data']['currentPrice'] = 100.00
-                logger.warning(f"Using dummy price for {symbol} as current price data is not available")
-                
-            return response_data
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+        
+        # Call LLM to generate prediction; identical prompts reuse the cached result
+        refined_json = cached_llm_call(prompt, refine_with_groq)
+
+        # One timestamp for the chat record and the response
+        now_iso = datetime.now().isoformat()
+        _finish_result(user_id, symbol, user_query, refined_json, now_iso)
+        
+        # Fetch current price from the API
+        current_price_data = _fetch_current_price(symbol, auth_header)
+        
+        return _build_result_response(data, refined_json, current_price_data, now_iso)
         
     except Exception as e:
-        logger.error(f"Error in result generation step: {str(e)}")
+        logger.error("Error in result generation step: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
-def parse_llm_response(response):
-    """Parse the LLM response into sections for structured display"""
-    def extract_block(label, text):
-        """Extracts block content for a section like [Positive Developments]"""
-        pattern = rf"\[{label}\]:?\s*(.*?)(?=\n\[|\Z)"  # Until next block or end of string
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        return match.group(1).strip() if match else ''
-
-    def extract_prediction_analysis_block(text):
-        """Handles nested Prediction & Analysis structure"""
-        pattern = r"\[Prediction & Analysis\]\s*Prediction Price:\s*(.*?)\s*Analysis:\s*(.*?)(?=\n\[|\Z)"
-        match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-        if match:
-            return {
-                "prediction_price": match.group(1).strip(),
-                "analysis": match.group(2).strip()
-            }
+# "HEADER: text" sections; each runs to the next section header
+_SECTION_KEYS = {
+    'SUMMARY': 'summary',
+    'PRICE ANALYSIS': 'price_analysis',
+    'NEWS IMPACT': 'news_impact',
+    'SENTIMENT ANALYSIS': 'sentiment_analysis',
+    'PREDICTION': 'prediction',
+    'TARGET PRICE': 'target_price',
+    'CONFIDENCE LEVEL': 'confidence',
+    'RISK FACTORS': 'risk_factors'
+}
+
+# "[Label]" blocks, e.g. [Positive Developments]; each runs to the next block
+_BLOCK_KEYS = {
+    'positive developments': 'positive_developments',
+    'potential concerns': 'potential_concerns',
+    'prediction price': 'prediction_price',
+    'analysis': 'analysis'
+}
+
+# First characters a header line can start with; the lookahead rejects ordinary content lines
+# with one character-class test instead of trying every alternative
+_HEADER_FIRST_CHARS = '[' + ''.join(sorted({name[0] for name in _SECTION_KEYS}))
+
+# Both header kinds in one multiline alternation: group 1 is a block label (already trimmed), group 2 a
+# section name; either way dispatch is a single dict lookup per header
+_HEADER_RE = re.compile(
+    r'^[ \t]*(?=[' + re.escape(_HEADER_FIRST_CHARS) + r'])'
+    r'(?:\[[^\S\n]*([^\]\n]+?)[^\S\n]*\]:?|(' + '|'.join(map(re.escape, _SECTION_KEYS)) + r'):)[ \t]*',
+    re.MULTILINE
+)
+
+# Fields nested inside a [Prediction & Analysis] block
+_FIELD_RE = re.compile(r'^[ \t]*(Prediction Price|Prediction|Analysis|Target Price):[ \t]*', re.MULTILINE | re.IGNORECASE)
+_FIELD_KEYS = {
+    'prediction price': 'prediction_price',
+    'prediction': 'prediction',
+    'analysis': 'analysis',
+    'target price': 'target_price'
+}
+
+_PRICE_RE = re.compile(r'\$\d[\d,]*(?:\.\d+)?')
+
+def _set_field(key):
+    def handler(parsed, body):
+        parsed[key] = body
+    return handler
+
+def _parse_prediction_block(parsed, body):
+    for field, value in _split_sections(_FIELD_RE, body):
+        parsed[_FIELD_KEYS[field.lower()]] = value
+
+# Block label -> handler(parsed, body); add an entry here to support a new block
+_BLOCK_HANDLERS = {label: _set_field(key) for label, key in _BLOCK_KEYS.items()}
+_BLOCK_HANDLERS['prediction & analysis'] = _parse_prediction_block
+
+def _split_sections(pattern, text):
+    """Return (header, body) pairs for each header match, the body running to the next match
+    
+    pattern must have exactly one capturing group, so split() yields
+    [preamble, header1, body1, header2, body2, ...] in a single pass.
+    """
+    parts = pattern.split(text)
+    return zip(parts[1::2], [body.strip() for body in parts[2::2]])
+
+def _scan_headers(text):
+    """Return ([(block label, body)], [(section name, body)]) from a single pass of _HEADER_RE
+    
+    A block's body runs to the next block and a section's body to the next
+    section, exactly as if each kind were scanned on its own.
+    """
+    blocks, sections = [], []
+    open_block = open_section = None  # (name, body start)
+    for match in _HEADER_RE.finditer(text):
+        label, header = match.group(1, 2)
+        if label is not None:
+            if open_block:
+                blocks.append((open_block[0], text[open_block[1]:match.start()].strip()))
+            open_block = (label, match.end())
         else:
-            return {"prediction_price": "", "analysis": ""}
+            if open_section:
+                sections.append((open_section[0], text[open_section[1]:match.start()].strip()))
+            open_section = (header, match.end())
+    if open_block:
+        blocks.append((open_block[0], text[open_block[1]:].strip()))
+    if open_section:
+        sections.append((open_section[0], text[open_section[1]:].strip()))
+    return blocks, sections
 
-    prediction_analysis = extract_prediction_analysis_block(response)
+def parse_llm_response(response):
+    """Parse the LLM response into sections for structured display
+    
+    Retried or repeated responses are served from a small LRU keyed on the
+    response text; callers get their own copy of the (flat) result dict.
+    """
+    # Guard the one input error the parser can hit (e.g. None from a failed LLM call) up front
+    if not isinstance(response, str):
+        return {"full_response": "" if response is None else str(response)}
+    return dict(_parse_llm_response_cached(response))
 
+@lru_cache(maxsize=512)
+def _parse_llm_response_cached(response):
     parsed = {
-        "prediction_price": prediction_analysis["prediction_price"],
-        "analysis": prediction_analysis["analysis"],
-        "positive_developments": extract_block("Positive Developments", response),
-        "potential_concerns": extract_block("Potential Concerns", response)
+        "prediction_price": "",
+        "analysis": "",
+        "positive_developments": "",
+        "potential_concerns": ""
     }
 
+    # Headers need a "[" or a ":" somewhere; skip the scan entirely otherwise
+    if '[' in response or ':' in response:
+        blocks, sections = _scan_headers(response)
+        for label, body in blocks:
+            handler = _BLOCK_HANDLERS.get(label.lower())
+            if handler:
+                handler(parsed, body)
+        # Sections are applied after blocks, so they win where both set a field
+        for header, body in sections:
+            parsed[_SECTION_KEYS[header]] = body
+
+    # Keep the prediction and target price consistent with each other
+    prediction = parsed.get('prediction')
+    if prediction:
+        if not parsed.get('target_price'):
+            # Most predictions quote no dollar amount; the substring test skips the regex for those
+            price = _PRICE_RE.search(prediction) if '$' in prediction else None
+            if price:
+                parsed['target_price'] = price.group(0)
+        elif parsed['target_price'] not in prediction:
+            parsed['prediction'] = f"{prediction} Target price: {parsed['target_price']}"
+
     # If nothing was extracted, fall back
     if not any(parsed.values()):
         logger.warning("No structured content parsed from response.")
@@ -945,6 +1597,23 @@ def parse_llm_response(response):
 
     return parsed
 
+def _format_chat_history(chat_history, symbol, limit=3):
+    """Format up to limit history entries about symbol as Previous Question/Answer pairs for a prompt"""
+    parts = []
+    for entry in chat_history:
+        # Newer entries carry symbol as a top-level attribute; older ones only in the metadata JSON
+        symbol_in_metadata = entry.get('symbol')
+        if symbol_in_metadata is None and entry.get('metadata'):
+            try:
+                symbol_in_metadata = orjson.loads(entry['metadata']).get('symbol')
+            except Exception as e:
+                logger.warning("Could not parse metadata: %s", e)
+        if symbol_in_metadata == symbol:
+            parts.append(f"Previous Question: {entry.get('query', '')}\nPrevious Answer: {entry.get('response', '')}\n\n")
+            if len(parts) == limit:
+                break
+    return ''.join(parts)
+
 def create_followup_prompt(user_id, symbol, user_query):
     """Create a prompt for follow-up questions that includes chat history
     
@@ -960,64 +1629,34 @@ def create_followup_prompt(user_id, symbol, user_query):
     chat_history_text = ""
     
     try:
-        history_result = chat_history_service.get_chat_history(user_id, limit=3)
+        history_result = chat_history_service.get_chat_history(user_id, limit=3, symbol=symbol)
         
         if history_result.get('status') == 'success' and history_result.get('data'):
             chat_history = history_result.get('data', [])
-            
-            # Format chat history for the prompt
-            for i, entry in enumerate(chat_history):
-                symbol_in_metadata = None
-                if 'metadata' in entry and entry['metadata']:
-                    try:
-                        metadata = json.loads(entry['metadata'])
-                        symbol_in_metadata = metadata.get('symbol')
-                    except Exception as e:
-                        logger.warning(f"Could not parse metadata: {e}")
-                if symbol_in_metadata == symbol:
-                    chat_history_text += f"Previous Question: {entry.get('query', '')}\n"
-                    chat_history_text += f"Previous Answer: {entry.get('response', '')}\n\n"
+            logger.info("Raw chat history entries: %s", chat_history)
+            chat_history_text = _format_chat_history(chat_history, symbol)
     except Exception as e:
-        logger.warning(f"Error retrieving chat history: {str(e)}")
-        chat_history_text = "Error: Could not retrieve previous conversation context."
+        logger.warning("Error retrieving chat history: %s", e)
     
     # Log the chat history for debugging
-    logger.info(f"Chat history text: {chat_history_text}")
+    logger.info("Chat history text: %s", chat_history_text)
     # Generate a prompt with chat history included
     history_section = f"PREVIOUS CONVERSATION HISTORY:\n{chat_history_text}\n\n" if chat_history_text else ""
     
-    prompt = f"""
-    You are an AI financial analyst and stock market expert specializing in providing insights about publicly traded companies.
-    
-    Answer the following question about {symbol} stock with accurate, up-to-date information.
-    
-    IMPORTANT INSTRUCTIONS:
-    - If the chat history contains any previous price predictions or target prices, do NOT contradict or change these values.
-    - Maintain consistency with all previously predicted values and analysis.
-    - Your task is to CLARIFY and EXPAND upon previous predictions, not to revise them.
-    - If asked specifically about predictions, refer to the ones already made in the previous conversation.
-    
-    Format your response in a clear, conversational manner. Include:
-    - Direct answers to the query
-    - Relevant market context if appropriate
-    - Any potential caveats or uncertainties
-    - For any price predictions, ALWAYS include a section labeled "TARGET PRICE:" followed by the EXACT same dollar amount from previous predictions.
-    
-    {history_section}Current Question about {symbol}: {user_query}
-    
-    Answer:
-    Your answer format should be as follows:\n\n[Positive Developments]:\n1. ...\n\n[Potential Concerns]:\n1. ...\n\n[Prediction Price]: ...\n[Analysis]: ...
-    """
-    
-    return prompt
+    return FOLLOWUP_PROMPT_TEMPLATE.format(
+        symbol=symbol,
+        history_section=history_section,
+        user_query=user_query
+    )
 
-def process_followup_response(symbol, user_query, llm_response):
+def process_followup_response(symbol, user_query, llm_response, now_iso=None):
     """Process the LLM response from a followup query
     
     Args:
         symbol: The stock symbol
         user_query: The user's question
         llm_response: The raw response from the LLM
+        now_iso: Request timestamp to reuse; defaults to the current time
         
     Returns:
         A dictionary with the processed results
@@ -1035,17 +1674,110 @@ def process_followup_response(symbol, user_query, llm_response):
             'user_query': user_query,
             'llm_response': llm_response,
             'sections': sections,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso or datetime.now().isoformat()
         }
         
         return result
     except Exception as e:
-        logger.error(f"Error processing followup response: {str(e)}")
+        logger.error("Error processing followup response: %s", e)
         return {
             'status': 'error',
             'message': f"Error processing followup response: {str(e)}"
         }
 
+# Follow-up chats are written by a background thread, up to CHAT_WRITE_BATCH_SIZE per DynamoDB batch
+# (its BatchWriteItem limit), waiting at most CHAT_WRITE_BATCH_WAIT seconds for a batch to fill
+CHAT_WRITE_BATCH_SIZE = 25
+CHAT_WRITE_BATCH_WAIT = 0.1
+# How long process exit waits for queued chats to be written
+CHAT_WRITE_SHUTDOWN_TIMEOUT = 10
+
+_CHAT_WRITE_Q = queue.Queue()
+_chat_writer_lock = threading.Lock()
+_chat_writer = None
+
+def _drain_chat_writes():
+    """Worker loop: block for one queued chat, gather whatever else arrives shortly after, store them together"""
+    while True:
+        batch = [_CHAT_WRITE_Q.get()]
+        deadline = time.monotonic() + CHAT_WRITE_BATCH_WAIT
+        while len(batch) < CHAT_WRITE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_CHAT_WRITE_Q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            result = chat_history_service.store_chats(batch)
+            if result.get('status') != 'success':
+                logger.warning("Could not store chat history: %s", result.get('message'))
+        except Exception as chat_error:
+            logger.warning("Could not store chat history: %s", chat_error)
+        finally:
+            for _ in batch:
+                _CHAT_WRITE_Q.task_done()
+
+def flush_chat_writes(timeout=None):
+    """Block until every queued follow-up chat has been written, or timeout seconds pass
+    
+    Returns True when the queue is drained. Called at process exit (and by tests, to make
+    the background writes observable).
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with _CHAT_WRITE_Q.all_tasks_done:
+        while _CHAT_WRITE_Q.unfinished_tasks:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                logger.warning("Gave up waiting for %d queued chat writes", _CHAT_WRITE_Q.unfinished_tasks)
+                return False
+            _CHAT_WRITE_Q.all_tasks_done.wait(remaining)
+    return True
+
+# Daemon threads keep running while atexit handlers do, so this lets queued chats reach DynamoDB
+# before a worker exits
+atexit.register(flush_chat_writes, CHAT_WRITE_SHUTDOWN_TIMEOUT)
+
+def _store_followup_chat(user_id, symbol, user_query, response, now_iso):
+    """Queue a follow-up exchange for the background chat-history writer; returns immediately"""
+    global _chat_writer
+    if _chat_writer is None:
+        # Started on first use rather than at import, so it lives in the serving process
+        with _chat_writer_lock:
+            if _chat_writer is None:
+                _chat_writer = threading.Thread(target=_drain_chat_writes, name='chat-writer', daemon=True)
+                _chat_writer.start()
+    _CHAT_WRITE_Q.put({
+        'user_id': user_id,
+        'query': user_query,
+        'response': response,
+        'metadata': {
+            'symbol': symbol,
+            'timestamp': now_iso,
+            'analysis_type': 'followup'
+        }
+    })
+
+def _followup_payload(symbol, user_query, response, now_iso, include_raw=True):
+    """Body of a /followup response; the answer is parsed once and its sections reused for target_price
+    
+    include_raw=False leaves out llm_response for clients that only read the sections.
+    """
+    sections = parse_llm_response(response)
+    payload = {
+        'status': 'success',
+        'symbol': symbol,
+        'user_query': user_query,
+        'llm_response': response,
+        'sections': sections,
+        'target_price': sections.get('target_price', ''),
+        'timestamp': now_iso
+    }
+    if not include_raw:
+        del payload['llm_response']
+    return payload
+
 # Create a separate blueprint for followup endpoint
 followup_bp = Blueprint('followup', __name__)
 
@@ -1055,7 +1787,7 @@ def followup_prediction():
     """Simple follow-up endpoint that takes a user query and sends it directly to the LLM"""
     try:
         # Parse request
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({
                 'status': 'error',
@@ -1071,89 +1803,55 @@ def followup_prediction():
                 'status': 'error',
                 'message': 'Symbol and user_query are required'
             }), 400
+        
+        user_query, error = _check_query_input(symbol, user_query)
+        if error:
+            return error
             
         # Get user ID from request.user (set by the jwt_required decorator)
         # This is always the Cognito sub (UUID) due to our new convention
         user_id = request.user['user_id']
-        
-        logger.info(f"Processing follow-up prediction for {symbol}, query: '{user_query}' (user_id: {user_id})")
-        
-        # Fetch user's recent chat history for context
-        chat_history_text = ""
-        try:
-            history_result = chat_history_service.get_chat_history(user_id, limit=3)
+        # One timestamp for the stored chat row and the response
+        now_iso = datetime.now().isoformat()
+        # ?include_raw=0 drops the raw answer text from the response; the chat row still stores it
+        include_raw = request.args.get('include_raw', '1') != '0'
+        
+        logger.info("Processing follow-up prediction for %s, query: '%s' (user_id: %s)", symbol, user_query, user_id)
+        
+        # Prompt with the recent conversation about this symbol
+        prompt = create_followup_prompt(user_id, symbol, user_query)
+        
+        # Clients that accept text/event-stream get tokens as they arrive instead of waiting for the full answer
+        if request.accept_mimetypes.best == 'text/event-stream':
+            def generate():
+                chunks = []
+                try:
+                    for chunk in stream_followup_response_from_groq(prompt):
+                        chunks.append(chunk)
+                        yield _sse({'chunk': chunk})
+                    yield _sse({**_followup_payload(symbol, user_query, ''.join(chunks).strip(), now_iso, include_raw), 'done': True})
+                finally:
+                    # Stored after the stream ends, including when the client disconnects part-way
+                    if chunks:
+                        _store_followup_chat(user_id, symbol, user_query, ''.join(chunks).strip(), now_iso)
             
-            if history_result.get('status') == 'success' and history_result.get('data'):
-                chat_history = history_result.get('data', [])
-                logger.info(f"Raw chat history entries: {chat_history}")
-                # Format chat history for the prompt
-                for i, entry in enumerate(chat_history):
-                    symbol_in_metadata = None
-                    if 'metadata' in entry and entry['metadata']:
-                        try:
-                            metadata = json.loads(entry['metadata'])
-                            symbol_in_metadata = metadata.get('symbol')
-                        except Exception as e:
-                            logger.warning(f"Could not parse metadata: {e}")
-                    if symbol_in_metadata == symbol:
-                        chat_history_text += f"Previous Question: {entry.get('query', '')}\n"
-                        chat_history_text += f"Previous Answer: {entry.get('response', '')}\n\n"
-        except Exception as e:
-            logger.warning(f"Error retrieving chat history: {str(e)}")
-        
-        # Log the chat history for debugging
-        logger.info(f"Chat history text: {chat_history_text}")
-        # Generate a prompt with chat history included
-        history_section = f"PREVIOUS CONVERSATION HISTORY:\n{chat_history_text}\n\n" if chat_history_text else ""
-        
-        prompt = f"""
-        You are an AI financial analyst and stock market expert specializing in providing insights about publicly traded companies.
-        
-        Answer the following question about {symbol} stock with accurate, up-to-date information.
-        
-        IMPORTANT INSTRUCTIONS:
-        - If the chat history contains any previous price predictions or target prices, do NOT contradict or change these values.
-        - Maintain consistency with all previously predicted values and analysis.
-        - Your task is to CLARIFY and EXPAND upon previous predictions, not to revise them.
-        - If asked specifically about predictions, refer to the ones already made in the previous conversation.
-        
-        Refer to this conversation history: 
-        <conversation history>{history_section}</conversation history>
-        
-        Current Question about {symbol}: {user_query}
-        
-        Answer:
-        """
+            return Response(
+                stream_with_context(generate()),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
         
         # Send the prompt directly to the LLM
         response = get_followup_response_from_groq(prompt)
         
-        # Store in chat history if available (always using Cognito sub as user_id)
-        try:
-            chat_history_service.store_chat(
-                user_id,
-                user_query,
-                response,
-                metadata={
-                    'symbol': symbol,
-                    'timestamp': datetime.now().isoformat(),
-                    'analysis_type': 'followup'
-                }
-            )
-        except Exception as chat_error:
-            logger.warning(f"Could not store chat history: {str(chat_error)}")
-        
+        # Queued for the background chat-history writer (always using Cognito sub as user_id)
+        _store_followup_chat(user_id, symbol, user_query, response, now_iso)
             
         # Return the response without including the prompt
-        return jsonify({
-            'status': 'success',
-            'symbol': symbol,
-            'user_query': user_query,
-            'llm_response': response
-        })
+        return jsonify(_followup_payload(symbol, user_query, response, now_iso, include_raw))
         
     except Exception as e:
-        logger.error(f"Error in followup prediction: {str(e)}")
+        logger.error("Error in followup prediction: %s", e)
         return jsonify({
             'status': 'error',
             'message': str(e)
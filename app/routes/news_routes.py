@@ -5,13 +5,13 @@ import os
 from dotenv import load_dotenv  # Load environment variables
 import xmltodict
 from app import cache  # ✅ Import cache from app/__init__.py
-from app.services.news_service import NewsService
-import logging
+from app.services.news_service import NewsService, http_session
+from app.services.registry import get_service
+from app.log import get_logger
 from app.routes.user_routes import jwt_required
-from app.scheduler import daily_news_update
+from app.http_cache import cached_json
 
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # Load API Keys from .env file
 load_dotenv()
@@ -20,7 +20,7 @@ ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 # ✅ Define Blueprint before using it
 news_bp = Blueprint('news', __name__)
 
-news_service = NewsService()
+news_service = get_service(NewsService)
 
 # ✅ Alpha Vantage News API
 @news_bp.route('/alpha_vantage', methods=['GET'])
@@ -33,7 +33,7 @@ def fetch_alpha_vantage_news():
     url = f"https://www.alphavantage.co/query?function=NEWS_SENTIMENT&tickers={symbol}&apikey={ALPHA_VANTAGE_API_KEY}"
 
     try:
-        response = requests.get(url)
+        response = http_session.get(url, timeout=10)
         news_data = response.json()
         
         if "feed" not in news_data:
@@ -64,7 +64,7 @@ def fetch_google_news(query):
     url = f"https://news.google.com/rss/search?q={query}+stock"
     
     try:
-        response = requests.get(url, timeout=10)
+        response = http_session.get(url, timeout=10)
         response.raise_for_status()
 
         # Parse XML to JSON
@@ -121,6 +121,7 @@ def get_company_news(symbol):
         }), 500
 
 @news_bp.route('/stored/<symbol>', methods=['GET'])
+@cached_json(ttl=30)
 def get_stored_news(symbol):
     """Get stored news for a specific company from vector DB (last 3 days only)"""
     try:
@@ -135,6 +136,7 @@ def get_stored_news(symbol):
         }), 500
 
 @news_bp.route('/search', methods=['GET'])
+@cached_json(ttl=30)
 def search_similar_news():
     """Search for similar news items (last 3 days only)"""
     try:
@@ -175,7 +177,8 @@ def cleanup_old_news():
 def trigger_news_update():
     """Manually trigger the daily news update job"""
     try:
-        # Call the scheduler job function directly
+        # Call the scheduler job function directly (imported here to keep APScheduler off the import path)
+        from app.scheduler import daily_news_update
         daily_news_update()
         
         return jsonify({
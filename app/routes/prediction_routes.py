@@ -4,15 +4,15 @@ from app.services.news_service import NewsService
 from app.services.social_service import SocialService
 from app.services.llm_service import LLMService
 from app.routes.finnhub_routes import FinnhubService
+from app.services.registry import get_service
 from app.services.chat_history_service import chat_history_service
-import logging
+from app.log import get_logger
 from typing import Dict, Optional
 from datetime import datetime, timedelta
 from app.services.llm_endpoint import generate_prediction
 from app.routes.user_routes import jwt_required  # Import the jwt_required decorator
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 prediction_bp = Blueprint('prediction', __name__)
 
@@ -25,7 +25,7 @@ def process_prediction_query():
         user_id = request.user['user_id']
 
         # Validate request
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({
                 'status': 'error',
@@ -41,12 +41,16 @@ def process_prediction_query():
                 'message': 'Symbol and query are required'
             }), 400
 
-        # Initialize services
-        stock_service = StockService()
-        news_service = NewsService()
-        social_service = SocialService()
-        finnhub_service = FinnhubService()
-        llm_service = LLMService()
+        # Shared service instances (created on first use)
+        stock_service = get_service(StockService)
+        news_service = get_service(NewsService)
+        social_service = get_service(SocialService)
+        finnhub_service = get_service(FinnhubService)
+        llm_service = get_service(LLMService)
+
+        # One clock read per request, reused for the news window and all timestamps
+        now = datetime.now()
+        now_iso = now.isoformat()
 
         # Step 1: Data Fetching
         logger.info(f"Fetching data for {symbol}")
@@ -63,7 +67,7 @@ def process_prediction_query():
         finnhub_news_data = finnhub_service.get_stored_finnhub_news(symbol, limit=10)
         
         # Check if we have enough recent Finnhub news data (at least covering the past 3 weeks)
-        three_weeks_ago = (datetime.now() - timedelta(weeks=3)).isoformat()
+        three_weeks_ago = (now - timedelta(weeks=3)).isoformat()
         has_enough_data = False
         
         if finnhub_news_data['status'] == 'success' and finnhub_news_data['data']:
@@ -128,7 +132,7 @@ def process_prediction_query():
             'prediction': llm_response,
             'metadata': {
                 'steps_completed': ['data_fetch', 'sentiment_analysis', 'prompt_generation', 'llm_prediction'],
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': now_iso,
                 'raw_data': {
                     'historical': historical_data.get('data', {}),
                     'finnhub_news': finnhub_news_data.get('data', []),
@@ -146,7 +150,7 @@ def process_prediction_query():
                 llm_response,
                 metadata={
                     'symbol': symbol,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': now_iso
                 }
             )
             logger.info(f"Stored chat history for user {user_id}")
@@ -177,8 +181,11 @@ def get_chat_history():
         # Get limit parameter (default to 10)
         limit = request.args.get('limit', default=10, type=int)
         
+        # Optional symbol filter, applied by the chat store rather than the client
+        symbol = request.args.get('symbol') or None
+        
         # Get chat history
-        result = chat_history_service.get_chat_history(user_id, limit)
+        result = chat_history_service.get_chat_history(user_id, limit, symbol=symbol)
         
         return jsonify(result)
     except Exception as e:
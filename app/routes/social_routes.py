@@ -1,13 +1,13 @@
 from flask import Blueprint, jsonify, request
 from app.services.social_service import SocialService
-import logging
+from app.services.registry import get_service
+from app.log import get_logger
 
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # ✅ Define Blueprint
 social_bp = Blueprint('social', __name__)
-social_service = SocialService()
+social_service = get_service(SocialService)
 
 @social_bp.route('/fetch/<symbol>', methods=['GET'])
 def fetch_social_data(symbol: str):
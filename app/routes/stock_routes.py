@@ -3,10 +3,9 @@ from app.services.stock_service import StockService
 from alpha_vantage.timeseries import TimeSeries
 from alpha_vantage.fundamentaldata import FundamentalData
 from app.config import Config
-import logging
+from app.log import get_logger
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 stock_bp = Blueprint('stock', __name__)
 
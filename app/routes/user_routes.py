@@ -1,15 +1,18 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, g
 from app.services.user_service import UserService
 from functools import wraps
+from collections import OrderedDict
+import hashlib
+import threading
+import time
 import jwt
 from app.config import Config
-import logging
+from app.log import get_logger
 import json
 from datetime import datetime, timedelta
 import requests
 
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 user_bp = Blueprint('user', __name__)
 user_service = UserService()
@@ -20,6 +23,37 @@ jwks_cache = {
     'last_updated': None
 }
 
+# RSA public keys parsed from the JWKS, by kid; cleared whenever the JWKS is refetched
+_public_keys = {}
+
+# Verified token payloads keyed by a hash of the raw token, so a client stepping through
+# several endpoints pays for one RS256 verify; entries are dropped once the token expires
+VERIFIED_TOKENS_MAX = 4096
+_verified_tokens = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
+def _token_key(token):
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _get_verified_token(token):
+    """Return the cached payload for token if it was verified before and has not expired"""
+    key = _token_key(token)
+    with _verified_tokens_lock:
+        payload = _verified_tokens.get(key)
+        if payload is None:
+            return None
+        if payload.get('exp', 0) <= time.time():
+            del _verified_tokens[key]
+            return None
+        _verified_tokens.move_to_end(key)
+        return payload
+
+def _remember_verified_token(token, payload):
+    with _verified_tokens_lock:
+        _verified_tokens[_token_key(token)] = payload
+        if len(_verified_tokens) > VERIFIED_TOKENS_MAX:
+            _verified_tokens.popitem(last=False)
+
 def validate_request_data(*required_fields):
     """Decorator to validate required fields in request data"""
     def decorator(f):
@@ -69,6 +103,7 @@ def get_cognito_jwks():
         # Cache the keys
         jwks_cache['keys'] = jwks
         jwks_cache['last_updated'] = datetime.now()
+        _public_keys.clear()
         
         return jwks
     except Exception as e:
@@ -78,6 +113,10 @@ def get_cognito_jwks():
 def verify_jwt_token(token):
     """Verify the JWT token from Cognito"""
     try:
+        payload = _get_verified_token(token)
+        if payload is not None:
+            return payload
+        
         # Get the key id from the token header
         header = jwt.get_unverified_header(token)
         kid = header['kid']
@@ -87,19 +126,22 @@ def verify_jwt_token(token):
         if not jwks:
             return None
             
-        # Find the key matching the kid
-        key = None
-        for k in jwks['keys']:
-            if k['kid'] == kid:
-                key = k
-                break
+        public_key = _public_keys.get(kid)
+        if public_key is None:
+            # Find the key matching the kid
+            key = None
+            for k in jwks['keys']:
+                if k['kid'] == kid:
+                    key = k
+                    break
+                    
+            if not key:
+                logger.error(f"No matching key found for kid: {kid}")
+                return None
                 
-        if not key:
-            logger.error(f"No matching key found for kid: {kid}")
-            return None
-            
-        # Convert the key to PEM format
-        public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
+            # Convert the key to PEM format
+            public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
+            _public_keys[kid] = public_key
         
         # Verify the token
         payload = jwt.decode(
@@ -110,6 +152,7 @@ def verify_jwt_token(token):
             audience=Config.COGNITO_APP_CLIENT_ID
         )
         
+        _remember_verified_token(token, payload)
         return payload
     except jwt.ExpiredSignatureError:
         logger.warning("Token has expired")
@@ -135,6 +178,11 @@ def jwt_required(f):
                 'email': 'test@example.com',
                 'token_payload': {}
             }
+            g.user_id = request.user['user_id']
+            return f(*args, **kwargs)
+        
+        # Already verified for this request (e.g. nested decorated calls)
+        if getattr(request, 'user', None) and g.get('user_id'):
             return f(*args, **kwargs)
         
         # Get token from Authorization header
@@ -165,6 +213,7 @@ def jwt_required(f):
         # Use 'user_id' from payload if present, else fallback to 'sub'
         user_id = payload.get('user_id') or payload.get('sub')
         logger.info(f"jwt_required: Using user_id: {user_id}")
+        g.user_id = user_id
         request.user = {
             'user_id': user_id,
             'username': payload.get('username', payload.get('cognito:username')),
@@ -1,16 +1,28 @@
 from flask_apscheduler import APScheduler
 import logging
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.services.news_service import NewsService
 from app.routes.finnhub_routes import FinnhubService
+from app.services.registry import get_service
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize scheduler
 scheduler = APScheduler()
 
+# Concurrent company fetches; kept well under Finnhub's 60 requests/minute limit
+UPDATE_MAX_WORKERS = 8
+
+def _fetch_company_sources(news_service, finnhub_service, symbol):
+    """Fetch one company's news from Google News (via NewsService) and Finnhub"""
+    logger.info(f"[SCHEDULED-TASK] Fetching news for {symbol}")
+    google_result = news_service.get_company_news(symbol)
+    # Only get 1 week of articles; storage is batched across companies by the caller
+    finnhub_result = finnhub_service.fetch_company_news(symbol, weeks=1, defer_store=True)
+    return google_result, finnhub_result
+
 def daily_news_update():
     """Fetch and update news for all companies in the watchlist daily"""
     try:
@@ -18,8 +30,8 @@ def daily_news_update():
         logger.info(f"[SCHEDULED-TASK] Starting daily news update at {current_time}")
         
         # Initialize services
-        news_service = NewsService()
-        finnhub_service = FinnhubService()
+        news_service = get_service(NewsService)
+        finnhub_service = get_service(FinnhubService)
         
         # First, clean up articles older than 3 days
         try:
@@ -38,36 +50,45 @@ def daily_news_update():
         failure_count = 0
         articles_count = 0
         
-        # Process each company
-        for symbol in companies:
-            try:
-                logger.info(f"[SCHEDULED-TASK] Fetching news for {symbol}")
-                
-                # Fetch from both Google News (via NewsService) and Finnhub
-                google_result = news_service.get_company_news(symbol)
-                finnhub_result = finnhub_service.fetch_company_news(symbol, weeks=1)  # Only get 1 week of articles
-                
-                # Log results from Google News
-                if google_result['status'] == 'success':
-                    google_count = len(google_result.get('data', []))
-                    logger.info(f"[SCHEDULED-TASK] {symbol}: Retrieved {google_count} articles from Google News")
-                    articles_count += google_count
-                    success_count += 1
-                else:
-                    logger.error(f"[SCHEDULED-TASK] {symbol}: Failed to fetch from Google News - {google_result.get('message')}")
+        # Fetch companies concurrently (I/O-bound); counters are only touched in this loop
+        pending_finnhub = {}
+        with ThreadPoolExecutor(max_workers=UPDATE_MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(_fetch_company_sources, news_service, finnhub_service, symbol): symbol
+                for symbol in companies
+            }
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    google_result, finnhub_result = future.result()
+                    
+                    # Log results from Google News
+                    if google_result['status'] == 'success':
+                        google_count = len(google_result.get('data', []))
+                        logger.info(f"[SCHEDULED-TASK] {symbol}: Retrieved {google_count} articles from Google News")
+                        articles_count += google_count
+                        success_count += 1
+                    else:
+                        logger.error(f"[SCHEDULED-TASK] {symbol}: Failed to fetch from Google News - {google_result.get('message')}")
+                        failure_count += 1
+                    
+                    # Log results from Finnhub
+                    if finnhub_result['status'] == 'success':
+                        finnhub_count = len(finnhub_result.get('data', []))
+                        logger.info(f"[SCHEDULED-TASK] {symbol}: Retrieved {finnhub_count} articles from Finnhub")
+                        articles_count += finnhub_count
+                        if finnhub_result.get('to_store'):
+                            pending_finnhub[symbol] = finnhub_result['to_store']
+                    else:
+                        logger.error(f"[SCHEDULED-TASK] {symbol}: Failed to fetch from Finnhub - {finnhub_result.get('message')}")
+                    
+                except Exception as e:
+                    logger.error(f"[SCHEDULED-TASK] Error processing {symbol}: {str(e)}")
                     failure_count += 1
-                
-                # Log results from Finnhub
-                if finnhub_result['status'] == 'success':
-                    finnhub_count = len(finnhub_result.get('data', []))
-                    logger.info(f"[SCHEDULED-TASK] {symbol}: Retrieved {finnhub_count} articles from Finnhub")
-                    articles_count += finnhub_count
-                else:
-                    logger.error(f"[SCHEDULED-TASK] {symbol}: Failed to fetch from Finnhub - {finnhub_result.get('message')}")
-                
-            except Exception as e:
-                logger.error(f"[SCHEDULED-TASK] Error processing {symbol}: {str(e)}")
-                failure_count += 1
+        
+        # Write all new Finnhub articles in a single VectorDB batch
+        stored_count = finnhub_service.store_deferred(pending_finnhub, weeks=1)
+        logger.info(f"[SCHEDULED-TASK] Stored {stored_count} new Finnhub articles in VectorDB")
         
         # Run a final cleanup to ensure we only have the last 3 days of articles
         try:
@@ -104,7 +125,7 @@ def init_scheduler(app):
     # This ensures we always have a clean database before the new articles arrive
     scheduler.add_job(
         id='daily_news_cleanup',
-        func=lambda: NewsService().cleanup_old_news(),
+        func=lambda: get_service(NewsService).cleanup_old_news(),
         trigger='cron',
         hour=6,
         minute=45,
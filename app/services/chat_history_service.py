@@ -33,8 +33,33 @@ class ChatHistoryService:
                 'message': f'Failed to store chat history: {str(e)}'
             }
     
-    def get_chat_history(self, user_id, limit=10):
-        """Get chat history for a user. user_id is always the Cognito sub (UUID)."""
+    def store_chats(self, chats):
+        """Store a batch of chat interactions; chats for users that do not exist are skipped"""
+        try:
+            # Each distinct user is checked once per batch
+            known_users = {user_id for user_id in {chat['user_id'] for chat in chats} if self._verify_user_exists(user_id)}
+            valid_chats = [chat for chat in chats if chat['user_id'] in known_users]
+            
+            if len(valid_chats) < len(chats):
+                logger.warning(f"Skipping {len(chats) - len(valid_chats)} chats for non-existent users")
+            if not valid_chats:
+                return {
+                    'status': 'success',
+                    'count': 0,
+                    'message': 'No chats to store'
+                }
+            
+            return dynamodb_service.store_chats(valid_chats)
+            
+        except Exception as e:
+            logger.error(f"Error storing chat history batch: {str(e)}")
+            return {
+                'status': 'error',
+                'message': f'Failed to store chat history: {str(e)}'
+            }
+    
+    def get_chat_history(self, user_id, limit=10, symbol=None):
+        """Get chat history for a user, optionally filtered to one symbol. user_id is always the Cognito sub (UUID)."""
         try:
             # Verify the user exists in the MySQL database by cognito_sub
             user_exists = self._verify_user_exists(user_id)
@@ -47,7 +72,7 @@ class ChatHistoryService:
                 }
             
             # Get chat history from DynamoDB
-            result = dynamodb_service.get_chat_history(user_id, limit)
+            result = dynamodb_service.get_chat_history(user_id, limit, symbol=symbol)
             return result
             
         except Exception as e:
@@ -6,9 +6,13 @@ import uuid
 from datetime import datetime
 from app.config import Config
 from decimal import Decimal
+from boto3.dynamodb.conditions import Key, Attr
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on pages read when filtering chat history by symbol
+CHAT_HISTORY_MAX_PAGES = 5
+
 def _convert_floats_to_decimal(item):
     if isinstance(item, float):
         return Decimal(str(item))
@@ -72,28 +76,32 @@ class DynamoDBService:
             logger.error(f"Error creating DynamoDB table: {str(e)}")
             raise
             
+    def _chat_item(self, user_id, query, response, metadata, now):
+        """Build the DynamoDB item for one chat interaction at time now"""
+        item = {
+            'user_id': str(user_id),
+            'timestamp': int(now * 1000),  # Milliseconds
+            'chat_id': str(uuid.uuid4()),
+            'query': query,
+            'response': response,
+            'date': datetime.fromtimestamp(now).isoformat()
+        }
+        
+        # Add metadata if provided; symbol is also a top-level attribute so reads can filter on it
+        if metadata:
+            item['metadata'] = json.dumps(metadata)
+            if metadata.get('symbol'):
+                item['symbol'] = metadata['symbol']
+            
+        # Convert all floats to Decimal
+        return _convert_floats_to_decimal(item)
+    
     def store_chat(self, user_id, query, response, metadata=None):
         """Store a chat interaction in DynamoDB"""
         try:
-            timestamp = int(time.time() * 1000)  # Current time in milliseconds
-            chat_id = str(uuid.uuid4())
-            
-            # Prepare item to store
-            item = {
-                'user_id': str(user_id),
-                'timestamp': timestamp,
-                'chat_id': chat_id,
-                'query': query,
-                'response': response,
-                'date': datetime.now().isoformat()
-            }
-            
-            # Add metadata if provided
-            if metadata:
-                item['metadata'] = json.dumps(metadata)
-                
-            # Convert all floats to Decimal
-            item = _convert_floats_to_decimal(item)
+            # One clock read, so the sort key and the readable date agree
+            item = self._chat_item(user_id, query, response, metadata, time.time())
+            chat_id = item['chat_id']
             
             # Store in DynamoDB
             self.table.put_item(Item=item)
@@ -111,17 +119,70 @@ class DynamoDBService:
                 'status': 'error',
                 'message': f'Failed to store chat: {str(e)}'
             }
+    
+    def store_chats(self, chats):
+        """Store several chat interactions with one batch writer
+        
+        Args:
+            chats: Iterable of dicts with user_id, query, response and optional metadata
+        """
+        try:
+            now = time.time()
+            last_timestamp = {}
+            count = 0
+            with self.table.batch_writer() as batch:
+                for chat in chats:
+                    item = self._chat_item(chat['user_id'], chat['query'], chat['response'], chat.get('metadata'), now)
+                    # (user_id, timestamp) is the key, so chats for one user in the same millisecond get consecutive timestamps
+                    previous = last_timestamp.get(item['user_id'])
+                    if previous is not None and item['timestamp'] <= previous:
+                        item['timestamp'] = previous + 1
+                    last_timestamp[item['user_id']] = item['timestamp']
+                    batch.put_item(Item=item)
+                    count += 1
+            
+            logger.info(f"Stored {count} chats in one batch")
+            return {
+                'status': 'success',
+                'count': count,
+                'message': 'Chats stored successfully'
+            }
             
-    def get_chat_history(self, user_id, limit=10):
-        """Retrieve chat history for a user"""
+        except Exception as e:
+            logger.error(f"Error storing chats in DynamoDB: {str(e)}")
+            return {
+                'status': 'error',
+                'message': f'Failed to store chats: {str(e)}'
+            }
+    
+    def get_chat_history(self, user_id, limit=10, symbol=None):
+        """Retrieve chat history for a user, optionally only entries about one symbol
+        
+        The symbol filter runs in DynamoDB. Limit caps items read per page before
+        filtering, so pages are followed until enough matches are found.
+        """
         try:
-            response = self.table.query(
-                KeyConditionExpression=boto3.dynamodb.conditions.Key('user_id').eq(str(user_id)),
-                ScanIndexForward=False,  # Sort descending (newest first)
-                Limit=limit
-            )
+            query_kwargs = {
+                'KeyConditionExpression': Key('user_id').eq(str(user_id)),
+                'ScanIndexForward': False,  # Sort descending (newest first)
+                'Limit': limit
+            }
+            if symbol:
+                # Older items only carry the symbol inside the metadata JSON string
+                query_kwargs['FilterExpression'] = (
+                    Attr('symbol').eq(symbol) |
+                    Attr('metadata').contains(json.dumps({'symbol': symbol})[1:-1])
+                )
             
-            chats = response.get('Items', [])
+            chats = []
+            for _ in range(CHAT_HISTORY_MAX_PAGES):
+                response = self.table.query(**query_kwargs)
+                chats.extend(response.get('Items', []))
+                last_key = response.get('LastEvaluatedKey')
+                if len(chats) >= limit or not last_key or not symbol:
+                    break
+                query_kwargs['ExclusiveStartKey'] = last_key
+            chats = chats[:limit]
             
             logger.info(f"Retrieved {len(chats)} chat entries for user {user_id}")
             return {
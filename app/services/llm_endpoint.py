@@ -1,12 +1,13 @@
 import os
 import json
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 import os.path
 from app.config import Config
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # First try to use Config class values
@@ -43,6 +44,10 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+# Keep-alive session so repeated predictions reuse the TLS connection to the endpoint
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 def generate_prediction(prompt, max_new_tokens=1024):
     """
     Sends the generated prompt to the LLM API and returns the raw response.
@@ -79,7 +84,7 @@ def generate_prediction(prompt, max_new_tokens=1024):
         # Log the exact payload for debugging
         logger.info(f"Payload: {json.dumps(payload)}")
         
-        response = requests.post(API_URL, headers=HEADERS, json=payload, timeout=120)  # Increased timeout too
+        response = _session.post(API_URL, headers=HEADERS, json=payload, timeout=120)  # Increased timeout too
         
         # Log the response status
         logger.info(f"Response status code: {response.status_code}")
@@ -91,7 +96,7 @@ def generate_prediction(prompt, max_new_tokens=1024):
         response.raise_for_status()  # raises HTTPError if response is bad
         
         # Extract the generated text from the response
-        result = response.json()
+        result = orjson.loads(response.content)
         logger.info(f"Raw response type: {type(result)}")
         
         if isinstance(result, list) and result:
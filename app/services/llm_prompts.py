@@ -2,30 +2,9 @@
 Prompt templates for LLM interactions
 """
 from datetime import datetime
-import textwrap
 
-def get_multistep_prediction_prompt(symbol, historical_summary, news_summary, sentiment_summary, 
-                                    user_query, chat_history=""):
-    """
-    Generate an enhanced prompt template for the multi-step analysis process.
-    This prompt is structured to provide detailed instructions to the LLM on how to analyze
-    the various data sources and generate a comprehensive prediction.
-    
-    Args:
-        symbol: Stock symbol
-        historical_summary: Summary of historical price data
-        news_summary: Summary of relevant news
-        sentiment_summary: Summary of social media sentiment
-        user_query: The user's question
-        chat_history: Previous conversation history (optional)
-    
-    Returns:
-        Structured prompt for the LLM
-    """
-    # Get current date dynamically in the format "Month Day, Year"
-    current_date = datetime.now().strftime('%B %d, %Y')
-    
-    prompt = f"""
+# Static prompt text lives in module-level templates; each call only fills in the placeholders
+MULTISTEP_PROMPT_TEMPLATE = """
 You are FinanceGPT, a specialized stock market analysis assistant trained on financial data through 2025.
 Today is {current_date}.
 
@@ -45,15 +24,7 @@ I'll provide you with three key sources of information:
 ===== SOCIAL MEDIA SENTIMENT =====
 {sentiment_summary}
 
-"""
-
-    if chat_history:
-        prompt += f"""
-===== PREVIOUS CONVERSATION HISTORY =====
-{chat_history}
-"""
-
-    prompt += f"""
+{history_section}
 ===== ANALYSIS INSTRUCTIONS =====
 1. Analyze the historical price data first - identify key trends, patterns, and anomalies
 2. Cross-reference price movements with news events - look for correlations
@@ -63,5 +34,41 @@ I'll provide you with three key sources of information:
 
 Keep your analysis professional, nuanced and data-driven. Avoid generic advice and be specific to {symbol}.
 """
+
+MULTISTEP_HISTORY_TEMPLATE = """
+===== PREVIOUS CONVERSATION HISTORY =====
+{chat_history}
+"""
+
+def get_multistep_prediction_prompt(symbol, historical_summary, news_summary, sentiment_summary, 
+                                    user_query, chat_history=""):
+    """
+    Generate an enhanced prompt template for the multi-step analysis process.
+    This prompt is structured to provide detailed instructions to the LLM on how to analyze
+    the various data sources and generate a comprehensive prediction.
+    
+    Args:
+        symbol: Stock symbol
+        historical_summary: Summary of historical price data
+        news_summary: Summary of relevant news
+        sentiment_summary: Summary of social media sentiment
+        user_query: The user's question
+        chat_history: Previous conversation history (optional)
+    
+    Returns:
+        Structured prompt for the LLM
+    """
+    # Get current date dynamically in the format "Month Day, Year"
+    current_date = datetime.now().strftime('%B %d, %Y')
+    
+    history_section = MULTISTEP_HISTORY_TEMPLATE.format(chat_history=chat_history) if chat_history else ""
     
-    return textwrap.dedent(prompt).strip() 
\ No newline at end of file
+    return MULTISTEP_PROMPT_TEMPLATE.format(
+        current_date=current_date,
+        symbol=symbol,
+        user_query=user_query,
+        historical_summary=historical_summary,
+        news_summary=news_summary,
+        sentiment_summary=sentiment_summary,
+        history_section=history_section
+    ).strip()
@@ -1,13 +1,21 @@
 import logging
+import heapq
 from typing import Dict
 import os
 from app.services.chat_history_service import chat_history_service
 from datetime import datetime, timedelta
 from app.services.llm_prompts import get_multistep_prediction_prompt
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _top_posts(posts, n):
+    """The n highest-scoring posts, in the order sorted(..., reverse=True)[:n] gives, without a full sort"""
+    return heapq.nlargest(n, (post for post in posts if isinstance(post, dict)), key=lambda post: post.get('score', 0))
+
+def _newest(articles, n):
+    """The n most recently published articles, newest first, without a full sort"""
+    return heapq.nlargest(n, articles, key=lambda article: article.get('published', ''))
+
 class LLMService:
     def __init__(self):
         logger.info("LLMService initialized")
@@ -133,7 +141,7 @@ class LLMService:
             avg_subjectivity = sum(post['sentiment']['subjectivity'] for post in posts) / total_posts
 
             # Get top discussions
-            top_posts = sorted(posts, key=lambda x: x['score'], reverse=True)[:3]
+            top_posts = _top_posts(posts, 3)
             discussions = "\n".join([f"- {post['title']} (Score: {post['score']})" for post in top_posts])
 
             return f"""
@@ -215,13 +223,11 @@ class LLMService:
             # Process Finnhub news
             if finnhub_news and isinstance(finnhub_news, list) and len(finnhub_news) > 0:
                 # Sort by publication date (newest first)
+                # Take top 10 news items (reduced from 25)
                 try:
-                    finnhub_news = sorted(finnhub_news, key=lambda x: x.get('published', ''), reverse=True)
+                    recent_news = _newest(finnhub_news, 10)
                 except:
-                    pass
-                
-                # Take top 10 news items (reduced from 25)
-                recent_news = finnhub_news[:10]
+                    recent_news = finnhub_news[:10]
                 
                 news_summary = "\nRecent Finnhub News Headlines:\n"
                 for item in recent_news:
@@ -264,8 +270,7 @@ class LLMService:
                     posts = sentiment.get('posts', [])
                     if posts and isinstance(posts, list):
                         # Sort by score
-                        sorted_posts = sorted(posts, key=lambda x: x.get('score', 0) if isinstance(x, dict) else 0, reverse=True)
-                        top_posts = sorted_posts[:5]
+                        top_posts = _top_posts(posts, 5)
                         
                         for post in top_posts:
                             if isinstance(post, dict):
@@ -359,8 +364,7 @@ class LLMService:
             
             posts = sentiment.get('posts', [])
             if posts and isinstance(posts, list):
-                sorted_posts = sorted(posts, key=lambda x: x.get('score', 0) if isinstance(x, dict) else 0, reverse=True)
-                top_posts = sorted_posts[:3]
+                top_posts = _top_posts(posts, 3)
                 
                 for post in top_posts:
                     if isinstance(post, dict):
@@ -476,11 +480,13 @@ class LLMService:
             avg_volume = sum(recent_volumes) / len(recent_volumes) if recent_volumes else 0
             
             # Format the historical data summary
-            result = f"===== HISTORICAL DATA =====\n"
-            result += f"Current Price: ${current_price:.2f}\n"
-            result += f"Price Change (last 15 days): {price_change:.2f}%\n"
-            result += f"Average Daily Volume: {int(avg_volume):,}\n\n"
-            result += "Daily Prices (last 15 days):\n"
+            parts = [
+                "===== HISTORICAL DATA =====\n",
+                f"Current Price: ${current_price:.2f}\n",
+                f"Price Change (last 15 days): {price_change:.2f}%\n",
+                f"Average Daily Volume: {int(avg_volume):,}\n\n",
+                "Daily Prices (last 15 days):\n"
+            ]
             
             # Add daily price data in reverse chronological order (newest first)
             for i in range(len(recent_dates)-1, -1, -1):
@@ -488,9 +494,9 @@ class LLMService:
                     date = recent_dates[i]
                     price = recent_prices[i]
                     volume = recent_volumes[i] if i < len(recent_volumes) else 0
-                    result += f"- {date}: ${price:.2f} (Volume: {int(volume):,})\n"
+                    parts.append(f"- {date}: ${price:.2f} (Volume: {int(volume):,})\n")
             
-            return result
+            return ''.join(parts)
         except Exception as e:
             logger.error(f"Error formatting historical data: {str(e)}")
             return "Error processing historical data."
@@ -501,16 +507,14 @@ class LLMService:
             if not news_data or not isinstance(news_data, list):
                 return "No recent news available."
                 
-            result = ""
+            parts = []
             
             # Sort news by publication date (newest first)
+            # Take top 5 news items
             try:
-                sorted_news = sorted(news_data, key=lambda x: x.get('published', ''), reverse=True)
+                top_news = _newest(news_data, 5)
             except:
-                sorted_news = news_data
-            
-            # Take top 5 news items
-            top_news = sorted_news[:5]
+                top_news = news_data[:5]
             
             for i, article in enumerate(top_news, 1):
                 title = article.get('title', 'No title')
@@ -518,11 +522,9 @@ class LLMService:
                 summary = article.get('summary', 'No summary available')
                 source = article.get('source', 'Unknown source')
                 
-                result += f"{i}. {title}\n"
-                result += f"   Source: {source}, Published: {published}\n"
-                result += f"   Summary: {summary}\n\n"
+                parts.append(f"{i}. {title}\n   Source: {source}, Published: {published}\n   Summary: {summary}\n\n")
             
-            return result
+            return ''.join(parts)
         except Exception as e:
             logger.error(f"Error formatting news data: {str(e)}")
             return "Error processing news data."
@@ -533,27 +535,28 @@ class LLMService:
             if not social_data:
                 return "No social media data available."
                 
-            result = ""
+            parts = []
             
             # Format sentiment summary
             sentiment_summary = social_data.get('sentiment_summary', {})
             if sentiment_summary:
-                result += "Overall Sentiment Metrics:\n"
-                result += f"- Average Post Polarity: {sentiment_summary.get('avg_post_polarity', 0):.2f}\n"
-                result += f"- Average Post Subjectivity: {sentiment_summary.get('avg_post_subjectivity', 0):.2f}\n"
-                result += f"- Average Comment Polarity: {sentiment_summary.get('avg_comment_polarity', 0):.2f}\n"
-                result += f"- Average Comment Subjectivity: {sentiment_summary.get('avg_comment_subjectivity', 0):.2f}\n"
-                result += f"- Total Posts Analyzed: {sentiment_summary.get('post_count', 0)}\n"
-                result += f"- Total Comments Analyzed: {sentiment_summary.get('comment_count', 0)}\n\n"
+                parts += [
+                    "Overall Sentiment Metrics:\n",
+                    f"- Average Post Polarity: {sentiment_summary.get('avg_post_polarity', 0):.2f}\n",
+                    f"- Average Post Subjectivity: {sentiment_summary.get('avg_post_subjectivity', 0):.2f}\n",
+                    f"- Average Comment Polarity: {sentiment_summary.get('avg_comment_polarity', 0):.2f}\n",
+                    f"- Average Comment Subjectivity: {sentiment_summary.get('avg_comment_subjectivity', 0):.2f}\n",
+                    f"- Total Posts Analyzed: {sentiment_summary.get('post_count', 0)}\n",
+                    f"- Total Comments Analyzed: {sentiment_summary.get('comment_count', 0)}\n\n"
+                ]
             
             # Format top posts
             posts = social_data.get('posts', [])
             if posts and isinstance(posts, list):
                 # Sort by score (highest first)
-                sorted_posts = sorted(posts, key=lambda x: x.get('score', 0) if isinstance(x, dict) else 0, reverse=True)
-                top_posts = sorted_posts[:5]  # Top 5 posts
+                top_posts = _top_posts(posts, 5)  # Top 5 posts
                 
-                result += "Top Reddit Discussions:\n"
+                parts.append("Top Reddit Discussions:\n")
                 for i, post in enumerate(top_posts, 1):
                     if isinstance(post, dict):
                         title = post.get('title', 'No title')
@@ -561,19 +564,17 @@ class LLMService:
                         created = post.get('created', 'Unknown date')
                         polarity = post.get('sentiment', {}).get('polarity', 0)
                         
-                        result += f"{i}. {title}\n"
-                        result += f"   Score: {score}, Created: {created}\n"
-                        result += f"   Sentiment: {polarity:.2f}\n"
+                        parts.append(f"{i}. {title}\n   Score: {score}, Created: {created}\n   Sentiment: {polarity:.2f}\n")
                         
                         # Add a snippet of content if available
                         content = post.get('body', '')
                         if content:
                             snippet = content[:150] + '...' if len(content) > 150 else content
-                            result += f"   Content: {snippet}\n\n"
+                            parts.append(f"   Content: {snippet}\n\n")
                         else:
-                            result += "\n"
+                            parts.append("\n")
             
-            return result
+            return ''.join(parts)
         except Exception as e:
             logger.error(f"Error formatting social data: {str(e)}")
             return "Error processing social media data." 
\ No newline at end of file
@@ -1,8 +1,12 @@
 import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 import logging
 from typing import List, Dict, Optional
 from app.services.vector_service import VectorService
+from app.services.registry import get_service
 from textblob import TextBlob
 import os
 from dotenv import load_dotenv
@@ -11,10 +15,18 @@ import hashlib
 # Load environment variables
 load_dotenv()
 
-# Set logging level to INFO to reduce debug noise
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keep-alive session for news feeds and APIs so TLS handshakes are reused across fetches
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+)
+http_session.mount('http://', _http_adapter)
+http_session.mount('https://', _http_adapter)
+
 class NewsService:
     # List of top companies across various sectors
     TRACKED_COMPANIES = [
@@ -24,7 +36,7 @@ class NewsService:
     ]
 
     def __init__(self):
-        self.vector_service = VectorService()
+        self.vector_service = get_service(VectorService)
         self.news_cache = {}
         logger.info("NewsService initialized with VectorService")
 
@@ -43,15 +55,21 @@ class NewsService:
             
             # Fetch fresh news
             logger.info(f"Fetching fresh news for {symbol} from Google News RSS")
-            feed = feedparser.parse(f'https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en')
+            response = http_session.get(
+                f'https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en',
+                timeout=(3.05, 10)
+            )
             
-            if feed.status != 200:
-                logger.error(f"Failed to fetch news feed for {symbol}, status: {feed.status}")
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch news feed for {symbol}, status: {response.status_code}")
                 return {
                     'status': 'error',
                     'message': f'Failed to fetch news for {symbol}'
                 }
             
+            # feedparser only parses here; fetching through the pooled session keeps the connection alive
+            feed = feedparser.parse(response.content)
+            
             logger.info(f"Found {len(feed.entries)} raw entries for {symbol}")
             
             articles = []
@@ -213,6 +231,23 @@ class NewsService:
                 'message': str(e)
             }
 
+    def search_similar_news_batch(self, queries: List[str], symbol: Optional[str] = None, limit: int = 5) -> Dict:
+        """Search for similar news items for several queries in one vector DB request"""
+        try:
+            results = self.vector_service.search_similar_news_batch(queries, symbol, limit)
+            logger.info(f"SEMANTIC-SEARCH: Batch search for {len(queries)} queries returned {sum(len(r) for r in results)} articles")
+            return {
+                'status': 'success',
+                'data': results,
+                'message': f'Searched {len(queries)} queries'
+            }
+        except Exception as e:
+            logger.error(f"Error in batch similar news search: {str(e)}")
+            return {
+                'status': 'error',
+                'message': str(e)
+            }
+
     def cleanup_old_news(self) -> Dict:
         """Remove news items older than 3 days"""
         try:
@@ -0,0 +1,16 @@
+import threading
+
+# Shared service instances, one per class, so callers reuse clients, sessions, caches and models
+_services = {}
+# Reentrant: a service constructor may itself call get_service for its dependencies
+_services_lock = threading.RLock()
+
+def get_service(service_cls):
+    """Return the shared instance of a service class, creating it on first use"""
+    instance = _services.get(service_cls)
+    if instance is None:
+        with _services_lock:
+            instance = _services.get(service_cls)
+            if instance is None:
+                instance = _services[service_cls] = service_cls()
+    return instance
@@ -11,8 +11,6 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Set logging level to INFO to reduce debug noise
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SocialService:
@@ -79,15 +77,21 @@ class SocialService:
         
         return search_terms
 
+    @staticmethod
+    def _post_score(post: Dict) -> int:
+        return post.get('score', 0)
+
     def fetch_reddit_posts(self, symbol: str, limit: int = 10) -> Dict[str, Any]:
         """
         Fetch recent posts from Reddit related to a specific stock symbol.
         If Reddit credentials are not available, returns mock data.
+        Posts are returned ordered by score, highest first.
         """
         if not self.has_credentials or not self.reddit:
             logger.warning("Using mock data due to missing Reddit credentials")
             # Create mock posts for testing
             mock_posts = self._get_mock_posts(symbol)
+            mock_posts.sort(key=self._post_score, reverse=True)
             
             # Return analyzed sentiment data instead of just posts
             analyzed_data = self.analyze_sentiment(mock_posts)
@@ -104,6 +108,7 @@ class SocialService:
             subreddits = ['stocks', 'investing', 'wallstreetbets']
             
             all_posts = []
+            seen_ids = set()
             limit_per_search = math.ceil(limit / (len(search_terms) * len(subreddits)))
             
             # Search each subreddit with each search term
@@ -111,13 +116,14 @@ class SocialService:
                 subreddit = self.reddit.subreddit(subreddit_name)
                 
                 for term in search_terms:
-                    # Search for posts containing the term
-                    search_results = subreddit.search(term, time_filter='week', limit=limit_per_search)
+                    # Search for posts containing the term; Reddit returns the week's top-scored posts first
+                    search_results = subreddit.search(term, sort='top', time_filter='week', limit=limit_per_search)
                     
                     for post in search_results:
                         # Skip duplicates
-                        if any(p['id'] == post.id for p in all_posts):
+                        if post.id in seen_ids:
                             continue
+                        seen_ids.add(post.id)
                             
                         # Process comments
                         comments = []
@@ -153,6 +159,9 @@ class SocialService:
             
             logger.info(f"Found {len(all_posts)} relevant Reddit posts for {symbol}")
             
+            # Highest score first, once here, so callers can slice the top posts
+            all_posts.sort(key=self._post_score, reverse=True)
+            
             # Analyze sentiment
             analyzed_data = self.analyze_sentiment(all_posts)
             
@@ -6,7 +6,6 @@ from app.config import Config
 import logging
 import time
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StockService:
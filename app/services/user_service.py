@@ -73,23 +73,22 @@ class UserService:
                 logger.info(f"User already exists in RDS with cognito_sub: {cognito_sub}")
                 return
                 
-            # Insert user into RDS
-            user_id = db.insert(
-                "INSERT INTO users (cognito_sub, username, email) VALUES (%s, %s, %s)",
-                (cognito_sub, username, email)
-            )
-            
-            if user_id:
-                logger.info(f"User stored in RDS with ID: {user_id}")
+            # Insert the user and default preferences in one transaction, so a failure leaves neither
+            with db.transaction() as cursor:
+                cursor.execute(
+                    "INSERT INTO users (cognito_sub, username, email) VALUES (%s, %s, %s)",
+                    (cognito_sub, username, email)
+                )
+                user_id = cursor.lastrowid
                 
                 # Create default preferences
-                db.insert(
+                cursor.execute(
                     "INSERT INTO user_preferences (user_id, theme, email_notifications) VALUES (%s, %s, %s)",
                     (user_id, 'light', False)
                 )
-                logger.info(f"Default preferences created for user ID: {user_id}")
-            else:
-                logger.error(f"Failed to store user in RDS: {username}")
+            
+            logger.info(f"User stored in RDS with ID: {user_id}")
+            logger.info(f"Default preferences created for user ID: {user_id}")
                 
         except Exception as e:
             logger.error(f"Error storing user in RDS: {str(e)}")
@@ -1,15 +1,21 @@
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
 import logging
+from functools import lru_cache
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import os
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class VectorService:
     def __init__(self):
+        # Same model Chroma uses by default; kept so query embeddings can be computed and cached here
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        # Repeated and retried queries skip the transformer forward pass
+        self._embed_query = lru_cache(maxsize=2048)(self._compute_query_embedding)
+        
         # Initialize ChromaDB client with persistent storage
         try:
             # Get ChromaDB directory from environment variable or use default
@@ -28,7 +34,8 @@ class VectorService:
             # Create or get the news collection
             self.news_collection = self.client.get_or_create_collection(
                 name="stock_news",
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=self.embedding_function
             )
             
             logger.info("VectorService initialized with ChromaDB persistent storage")
@@ -43,7 +50,8 @@ class VectorService:
                 # Create or get the news collection
                 self.news_collection = self.client.get_or_create_collection(
                     name="stock_news",
-                    metadata={"hnsw:space": "cosine"}
+                    metadata={"hnsw:space": "cosine"},
+                    embedding_function=self.embedding_function
                 )
                 logger.warning("VectorService using in-memory fallback (data will not persist)")
             except Exception as fallback_error:
@@ -65,6 +73,9 @@ class VectorService:
             ids = []
             documents = []
             metadatas = []
+            
+            # One storage timestamp for the whole batch
+            now_iso = datetime.now().isoformat()
 
             for item in news_items:
                 # Create a unique ID for each news item
@@ -81,7 +92,7 @@ class VectorService:
                     'title': item['title'],
                     'published': item['published'],
                     'source': item.get('source', 'Unknown'),
-                    'timestamp': item.get('timestamp', datetime.now().isoformat())
+                    'timestamp': item.get('timestamp', now_iso)
                 }
                 
                 # Handle url/link field variations
@@ -140,6 +151,126 @@ class VectorService:
             logger.error(f"Error retrieving news for {symbol}: {str(e)}")
             return []
 
+    def _compute_query_embedding(self, query: str) -> tuple:
+        """Embed a search query; wrapped in an LRU cache as _embed_query"""
+        return tuple(float(x) for x in self.embedding_function([query])[0])
+
+    def _format_hits(self, results: Dict, row: int, limit: int, query: str) -> List[Dict]:
+        """Filter, de-duplicate and format one query row of a Chroma query result"""
+        similar_news = []
+        seen_titles = set()  # Track seen titles for deduplication
+        seen_content = set()  # Track seen content for deduplication
+        
+        if results and 'ids' in results and results['ids'] and len(results['ids'][row]) > 0:
+            # Get current time for filtering - use last 7 days instead of 3 to be more lenient
+            now = datetime.now()
+            cutoff_date = now - timedelta(days=7)  # Increased from 3 to 7 days
+            logger.info(f"VECTOR-SEARCH: Using cutoff date {cutoff_date.isoformat()} for article filtering")
+            
+            # Track articles we're processing
+            total_articles = len(results['ids'][row])
+            filtered_out = 0
+            processing_errors = 0
+            duplicates_removed = 0
+            
+            for i in range(len(results['ids'][row])):
+                try:
+                    # Extract critical fields for debugging
+                    article_id = results['ids'][row][i]
+                    article_title = results['metadatas'][row][i].get('title', 'No title')
+                    published_str = results['metadatas'][row][i].get('published', '')
+                    article_summary = results['metadatas'][row][i].get('summary', '')
+                    
+                    logger.info(f"VECTOR-SEARCH: Processing article {i+1}/{total_articles}: '{article_title[:50]}...' (published: {published_str})")
+                    
+                    # Skip articles with missing published date
+                    if not published_str:
+                        logger.warning(f"VECTOR-SEARCH: Skipping article with missing published date: {article_id}")
+                        filtered_out += 1
+                        continue
+                        
+                    # Verify published date format, handle multiple formats
+                    try:
+                        # First try ISO format
+                        published_date = datetime.fromisoformat(published_str)
+                        logger.info(f"VECTOR-SEARCH: Successfully parsed ISO date: {published_str}")
+                    except ValueError:
+                        try:
+                            # Try Unix timestamp
+                            published_date = datetime.fromtimestamp(float(published_str))
+                            logger.info(f"VECTOR-SEARCH: Successfully parsed Unix timestamp: {published_str}")
+                        except ValueError:
+                            # IMPORTANT CHANGE: Instead of filtering out, use current date
+                            logger.warning(f"VECTOR-SEARCH: Could not parse date '{published_str}', using recent date")
+                            published_date = now - timedelta(days=1)  # Assume it's recent
+                    
+                    # Skip articles older than cutoff date but log it clearly
+                    if published_date < cutoff_date:
+                        logger.info(f"VECTOR-SEARCH: Filtering out old article from {published_date.isoformat()} (cutoff: {cutoff_date.isoformat()})")
+                        filtered_out += 1
+                        continue
+                    
+                    # Deduplication check
+                    title_lower = article_title.lower().strip()
+                    content_lower = (article_title + " " + article_summary).lower().strip()
+                    
+                    if title_lower in seen_titles or content_lower in seen_content:
+                        logger.info(f"VECTOR-SEARCH: Skipping duplicate article: '{article_title[:50]}...'")
+                        duplicates_removed += 1
+                        continue
+                        
+                    # Add to seen sets
+                    seen_titles.add(title_lower)
+                    seen_content.add(content_lower)
+                        
+                    # Extract link or URL
+                    link = "#"
+                    if 'url' in results['metadatas'][row][i]:
+                        link = results['metadatas'][row][i]['url']
+                    elif 'link' in results['metadatas'][row][i]:
+                        link = results['metadatas'][row][i]['link']
+                    
+                    # Log the distance/similarity score
+                    similarity_score = results['distances'][row][i] if 'distances' in results else 0
+                    logger.info(f"VECTOR-SEARCH: Article similarity score: {similarity_score}")
+                        
+                    article = {
+                        'id': article_id,
+                        'title': article_title,
+                        'url': link,
+                        'published': published_str,
+                        'source': results['metadatas'][row][i].get('source', 'Unknown'),
+                        'symbol': results['metadatas'][row][i]['symbol'],
+                        'similarity': similarity_score,
+                        'link': link,
+                        'summary': article_summary
+                    }
+                    similar_news.append(article)
+                    logger.info(f"VECTOR-SEARCH: Added article to results: '{article_title[:50]}...'")
+                    
+                    # Break if we have enough unique articles
+                    if len(similar_news) >= limit:
+                        break
+                        
+                except Exception as e:
+                    processing_errors += 1
+                    logger.warning(f"VECTOR-SEARCH: Error formatting article: {str(e)}")
+                    continue
+            
+            # Log summary statistics
+            logger.info(f"VECTOR-SEARCH: Processing summary: Total={total_articles}, Accepted={len(similar_news)}, Filtered={filtered_out}, Duplicates={duplicates_removed}, Errors={processing_errors}")
+            
+            if similar_news:
+                logger.info(f"VECTOR-SEARCH: Formatted {len(similar_news)} articles for response")
+                logger.info(f"VECTOR-SEARCH: First result title: '{similar_news[0]['title']}' similarity: {similar_news[0]['similarity']}")
+            else:
+                logger.warning(f"VECTOR-SEARCH: No articles passed filtering criteria")
+        else:
+            logger.warning(f"VECTOR-SEARCH: No similar articles found for query '{query}'")
+
+        # Return the most relevant articles first (lowest distance score = most similar)
+        return sorted(similar_news, key=lambda x: x.get('similarity', 1.0))
+
     def search_similar_news(self, query: str, symbol: Optional[str] = None, limit: int = 5) -> List[Dict]:
         """Search for similar news items based on a query"""
         try:
@@ -164,132 +295,54 @@ class VectorService:
                 
             # Proceed with semantic search
             results = self.news_collection.query(
-                query_texts=[query],
+                query_embeddings=[list(self._embed_query(query))],
                 where=where_clause,
                 n_results=limit * 2  # Request more results to account for deduplication
             )
             
             logger.info(f"VECTOR-SEARCH: Query returned {len(results['ids'][0]) if results and 'ids' in results and results['ids'] else 0} results")
 
-            # Format results
-            similar_news = []
-            seen_titles = set()  # Track seen titles for deduplication
-            seen_content = set()  # Track seen content for deduplication
-            
-            if results and 'ids' in results and results['ids'] and len(results['ids'][0]) > 0:
-                # Get current time for filtering - use last 7 days instead of 3 to be more lenient
-                now = datetime.now()
-                cutoff_date = now - timedelta(days=7)  # Increased from 3 to 7 days
-                logger.info(f"VECTOR-SEARCH: Using cutoff date {cutoff_date.isoformat()} for article filtering")
-                
-                # Track articles we're processing
-                total_articles = len(results['ids'][0])
-                filtered_out = 0
-                processing_errors = 0
-                duplicates_removed = 0
-                
-                for i in range(len(results['ids'][0])):
-                    try:
-                        # Extract critical fields for debugging
-                        article_id = results['ids'][0][i]
-                        article_title = results['metadatas'][0][i].get('title', 'No title')
-                        published_str = results['metadatas'][0][i].get('published', '')
-                        article_summary = results['metadatas'][0][i].get('summary', '')
-                        
-                        logger.info(f"VECTOR-SEARCH: Processing article {i+1}/{total_articles}: '{article_title[:50]}...' (published: {published_str})")
-                        
-                        # Skip articles with missing published date
-                        if not published_str:
-                            logger.warning(f"VECTOR-SEARCH: Skipping article with missing published date: {article_id}")
-                            filtered_out += 1
-                            continue
-                            
-                        # Verify published date format, handle multiple formats
-                        try:
-                            # First try ISO format
-                            published_date = datetime.fromisoformat(published_str)
-                            logger.info(f"VECTOR-SEARCH: Successfully parsed ISO date: {published_str}")
-                        except ValueError:
-                            try:
-                                # Try Unix timestamp
-                                published_date = datetime.fromtimestamp(float(published_str))
-                                logger.info(f"VECTOR-SEARCH: Successfully parsed Unix timestamp: {published_str}")
-                            except ValueError:
-                                # IMPORTANT CHANGE: Instead of filtering out, use current date
-                                logger.warning(f"VECTOR-SEARCH: Could not parse date '{published_str}', using recent date")
-                                published_date = now - timedelta(days=1)  # Assume it's recent
-                        
-                        # Skip articles older than cutoff date but log it clearly
-                        if published_date < cutoff_date:
-                            logger.info(f"VECTOR-SEARCH: Filtering out old article from {published_date.isoformat()} (cutoff: {cutoff_date.isoformat()})")
-                            filtered_out += 1
-                            continue
-                        
-                        # Deduplication check
-                        title_lower = article_title.lower().strip()
-                        content_lower = (article_title + " " + article_summary).lower().strip()
-                        
-                        if title_lower in seen_titles or content_lower in seen_content:
-                            logger.info(f"VECTOR-SEARCH: Skipping duplicate article: '{article_title[:50]}...'")
-                            duplicates_removed += 1
-                            continue
-                            
-                        # Add to seen sets
-                        seen_titles.add(title_lower)
-                        seen_content.add(content_lower)
-                            
-                        # Extract link or URL
-                        link = "#"
-                        if 'url' in results['metadatas'][0][i]:
-                            link = results['metadatas'][0][i]['url']
-                        elif 'link' in results['metadatas'][0][i]:
-                            link = results['metadatas'][0][i]['link']
-                        
-                        # Log the distance/similarity score
-                        similarity_score = results['distances'][0][i] if 'distances' in results else 0
-                        logger.info(f"VECTOR-SEARCH: Article similarity score: {similarity_score}")
-                            
-                        article = {
-                            'id': article_id,
-                            'title': article_title,
-                            'url': link,
-                            'published': published_str,
-                            'source': results['metadatas'][0][i].get('source', 'Unknown'),
-                            'symbol': results['metadatas'][0][i]['symbol'],
-                            'similarity': similarity_score,
-                            'link': link,
-                            'summary': article_summary
-                        }
-                        similar_news.append(article)
-                        logger.info(f"VECTOR-SEARCH: Added article to results: '{article_title[:50]}...'")
-                        
-                        # Break if we have enough unique articles
-                        if len(similar_news) >= limit:
-                            break
-                            
-                    except Exception as e:
-                        processing_errors += 1
-                        logger.warning(f"VECTOR-SEARCH: Error formatting article: {str(e)}")
-                        continue
-                
-                # Log summary statistics
-                logger.info(f"VECTOR-SEARCH: Processing summary: Total={total_articles}, Accepted={len(similar_news)}, Filtered={filtered_out}, Duplicates={duplicates_removed}, Errors={processing_errors}")
-                
-                if similar_news:
-                    logger.info(f"VECTOR-SEARCH: Formatted {len(similar_news)} articles for response")
-                    logger.info(f"VECTOR-SEARCH: First result title: '{similar_news[0]['title']}' similarity: {similar_news[0]['similarity']}")
-                else:
-                    logger.warning(f"VECTOR-SEARCH: No articles passed filtering criteria")
-            else:
-                logger.warning(f"VECTOR-SEARCH: No similar articles found for query '{query}'")
-
-            # Return the most relevant articles first (lowest distance score = most similar)
-            return sorted(similar_news, key=lambda x: x.get('similarity', 1.0))
+            return self._format_hits(results, 0, limit, query)
 
         except Exception as e:
             logger.error(f"VECTOR-SEARCH: Error searching similar news: {str(e)}")
             return []
 
+    def search_similar_news_batch(self, queries: List[str], symbol: Optional[str] = None, limit: int = 5) -> List[List[Dict]]:
+        """Run several semantic searches in a single Chroma query
+        
+        Args:
+            queries: Query strings; each gets its own result list
+            symbol: Optional symbol filter shared by all queries
+            limit: Maximum results per query
+            
+        Returns:
+            One list of formatted articles per query, in query order
+        """
+        if not queries:
+            return []
+        try:
+            where_clause = {"symbol": symbol} if symbol else {}
+            
+            check_results = self.news_collection.get(where=where_clause, limit=1)
+            if not check_results or len(check_results['ids']) == 0:
+                logger.warning(f"VECTOR-SEARCH: No articles found matching the filter criteria")
+                return [[] for _ in queries]
+            
+            # One request embeds nothing new for cached queries and shares the filter across rows
+            results = self.news_collection.query(
+                query_embeddings=[list(self._embed_query(query)) for query in queries],
+                where=where_clause,
+                n_results=limit * 2
+            )
+            logger.info(f"VECTOR-SEARCH: Batch query ran {len(queries)} queries")
+            
+            return [self._format_hits(results, row, limit, query) for row, query in enumerate(queries)]
+            
+        except Exception as e:
+            logger.error(f"VECTOR-SEARCH: Error in batch similar news search: {str(e)}")
+            return [[] for _ in queries]
+
     def cleanup_old_news(self, days: int = 3):
         """Remove news items older than specified days (default 3 days)"""
         try:
@@ -322,6 +375,9 @@ class VectorService:
             ids = []
             documents = []
             metadatas = []
+            
+            # One storage timestamp for the whole batch
+            now_iso = datetime.now().isoformat()
 
             for item in social_data:
                 # Create a unique ID for each post
@@ -340,7 +396,7 @@ class VectorService:
                     'created_utc': item['created_utc'],
                     'sentiment': item['sentiment'],
                     'comment_count': len(item['comments']),
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': now_iso
                 }
 
                 ids.append(post_id)
@@ -2,6 +2,7 @@ import sys
 import os
 import json
 import logging
+import re
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 
@@ -20,6 +21,9 @@ logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Numeric part of a target price such as "$175.50"; compiled once at import
+_TARGET_PRICE_RE = re.compile(r'[\$]?([0-9]+(?:\.[0-9]+)?)')
+
 class BacktestingService:
     """
     Service for backtesting stock price predictions against historical data
@@ -186,8 +190,7 @@ class BacktestingService:
                 # Handle different formats of target price
                 if isinstance(target_price, str):
                     # Try to extract the numeric value
-                    import re
-                    price_match = re.search(r'[\$]?([0-9]+(?:\.[0-9]+)?)', target_price)
+                    price_match = _TARGET_PRICE_RE.search(target_price)
                     if price_match:
                         predicted_price = float(price_match.group(1))
                 elif isinstance(target_price, (int, float)):
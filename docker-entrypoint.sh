@@ -10,5 +10,5 @@ if [ "$FLASK_ENV" = "development" ]; then
   python -m flask run --host=0.0.0.0
 else
   echo "Starting production server with gunicorn..."
-  gunicorn --bind 0.0.0.0:5000 'app:create_app()'
+  gunicorn -c gunicorn.conf.py 'app:create_app()'
 fi 
\ No newline at end of file
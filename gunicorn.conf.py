@@ -0,0 +1,25 @@
+import os
+import sys
+
+# Threaded workers: each process serves several requests while others wait on Finnhub/LLM/DB I/O
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+# Handlers mostly wait on Groq/Finnhub/DynamoDB, so threads are cheap relative to the work they wait on
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '300'))
+
+def pre_fork(server, worker):
+    """Give each worker the lowest free slot index; runs in the master so respawns reuse the slot"""
+    used = {getattr(w, 'slot', None) for w in server.WORKERS.values()}
+    worker.slot = next(i for i in range(len(used) + 1) if i not in used)
+
+def post_fork(server, worker):
+    """Expose the slot to create_app so only worker 0 starts the scheduler"""
+    os.environ['GUNICORN_WORKER_ID'] = str(worker.slot)
+
+def worker_exit(server, worker):
+    """Write any follow-up chats still queued in memory before the worker goes away"""
+    routes = sys.modules.get('app.routes.multistep_prediction_routes')
+    if routes is not None:
+        routes.flush_chat_writes(routes.CHAT_WRITE_SHUTDOWN_TIMEOUT)
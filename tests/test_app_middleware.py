@@ -0,0 +1,65 @@
+import unittest
+from unittest.mock import patch
+from flask import Flask, session
+from flask_caching import Cache
+from app import _PreflightShortCircuit, _FastPathSessionInterface, _CORS_HEADERS, configure_cache_and_sessions
+from app.config import Config
+
+class TestPreflightShortCircuit(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test'
+        self.app.wsgi_app = _PreflightShortCircuit(self.app.wsgi_app, _CORS_HEADERS)
+        self.app.session_interface = _FastPathSessionInterface(self.app.session_interface)
+        self.hits = 0
+        
+        @self.app.route('/api/data', methods=['GET', 'POST'])
+        def data():
+            self.hits += 1
+            session['seen'] = True
+            return {'status': 'success'}
+        
+        self.client = self.app.test_client()
+    
+    def test_preflight_answered_without_routing(self):
+        response = self.client.options('/api/data', headers={
+            'Origin': 'http://thestockai.online',
+            'Access-Control-Request-Method': 'POST'
+        })
+        
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.get_data(), b'')
+        for name, value in _CORS_HEADERS:
+            self.assertEqual(response.headers[name], value)
+        self.assertEqual(self.hits, 0)
+        self.assertNotIn('Set-Cookie', response.headers)
+    
+    def test_plain_options_reaches_flask_without_session(self):
+        # No Access-Control-Request-Method, so this is not a preflight
+        response = self.client.options('/api/data')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Set-Cookie', response.headers)
+    
+    def test_other_methods_pass_through(self):
+        response = self.client.get('/api/data')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'status': 'success'})
+        self.assertEqual(self.hits, 1)
+        self.assertIn('Set-Cookie', response.headers)
+
+class TestRedisConfiguration(unittest.TestCase):
+    def test_cache_and_sessions_share_one_bounded_pool(self):
+        app = Flask(__name__)
+        with patch('app.Config', Config._replace(REDIS_URL='redis://localhost:6379/0')):
+            configure_cache_and_sessions(app)
+        cache = Cache(app)
+        
+        pool = app.extensions['redis'].connection_pool
+        self.assertIs(cache.cache._write_client.connection_pool, pool)
+        self.assertIs(app.session_interface.client.connection_pool, pool)
+        self.assertEqual(pool.max_connections, 32)
+
+if __name__ == '__main__':
+    unittest.main()
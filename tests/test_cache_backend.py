@@ -0,0 +1,47 @@
+import unittest
+import pickle
+from datetime import datetime
+from app.cache_backend import JSONRedisSerializer, JSONRedisCache
+
+class TestJSONRedisSerializer(unittest.TestCase):
+    def setUp(self):
+        self.serializer = JSONRedisSerializer()
+    
+    def roundtrip(self, value):
+        return self.serializer.loads(self.serializer.dumps(value))
+    
+    def test_json_values_stored_as_json(self):
+        for value in ({'status': 'success', 'data': [1, 2.5, None]}, ['a', 'b'], 'text'):
+            dumped = self.serializer.dumps(value)
+            self.assertTrue(dumped.startswith(b'j'))
+            self.assertEqual(self.serializer.loads(dumped), value)
+    
+    def test_bytes_stored_as_is(self):
+        dumped = self.serializer.dumps(b'\x28\xb5\x2f\xfd payload')
+        
+        self.assertEqual(dumped, b'b\x28\xb5\x2f\xfd payload')
+        self.assertEqual(self.serializer.loads(dumped), b'\x28\xb5\x2f\xfd payload')
+    
+    def test_non_json_values_fall_back_to_pickle(self):
+        # A datetime would come back from JSON as a string, so it must be pickled
+        value = {'timestamp': datetime(2023, 1, 3, 12, 0)}
+        
+        self.assertTrue(self.serializer.dumps(value).startswith(b'!'))
+        self.assertEqual(self.roundtrip(value), value)
+        self.assertEqual(self.roundtrip((1, 2)), (1, 2))
+    
+    def test_integers_and_none(self):
+        self.assertEqual(self.roundtrip(42), 42)
+        self.assertIsNone(self.serializer.loads(None))
+    
+    def test_reads_values_written_by_the_pickle_serializer(self):
+        # Entries written before the switch are plain cachelib pickles
+        legacy = b'!' + pickle.dumps({'status': 'success'})
+        
+        self.assertEqual(self.serializer.loads(legacy), {'status': 'success'})
+    
+    def test_cache_uses_serializer(self):
+        self.assertIsInstance(JSONRedisCache.serializer, JSONRedisSerializer)
+
+if __name__ == '__main__':
+    unittest.main()
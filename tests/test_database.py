@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from app import database
+from app.database import db
+from app.services.user_service import UserService
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.lastrowid = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.execute(sql)
+
+class FakeConnection:
+    """A pooled connection with autocommit on: statements commit immediately unless a transaction was started"""
+    def __init__(self):
+        self.committed = []
+        self.pending = []
+        self.in_transaction = False
+        self.fail_on = None
+
+    def begin(self):
+        # DBUtils' begin() over mysqlclient: bookkeeping only, nothing reaches the server
+        pass
+
+    def cursor(self, *args):
+        return FakeCursor(self)
+
+    def execute(self, sql):
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"{self.fail_on} failed")
+        if sql in ("START TRANSACTION", "BEGIN"):
+            self.in_transaction = True
+        elif self.in_transaction:
+            self.pending.append(sql)
+        else:
+            self.committed.append(sql)
+
+    def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+        self.in_transaction = False
+
+    def rollback(self):
+        self.pending = []
+        self.in_transaction = False
+
+    def close(self):
+        pass
+
+class TestDatabaseTransaction(unittest.TestCase):
+    def setUp(self):
+        self.connection = FakeConnection()
+        patcher = patch.object(db, '_get_connection', return_value=self.connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Model mysqlclient, whose connections have no begin()
+        driver_patcher = patch.object(database, '_DRIVER_BEGINS_TRANSACTION', False)
+        driver_patcher.start()
+        self.addCleanup(driver_patcher.stop)
+
+    def test_rollback_discards_writes(self):
+        with self.assertRaises(ValueError):
+            with db.transaction() as cursor:
+                cursor.execute("INSERT INTO portfolios VALUES (1)")
+                cursor.execute("INSERT INTO portfolio_stocks VALUES (1)")
+                raise ValueError("second step failed")
+
+        self.assertEqual(self.connection.committed, [])
+        self.assertEqual(self.connection.pending, [])
+
+    def test_commit_keeps_writes(self):
+        with db.transaction() as cursor:
+            cursor.execute("INSERT INTO portfolios VALUES (1)")
+            cursor.execute("INSERT INTO portfolio_stocks VALUES (1)")
+
+        self.assertEqual(self.connection.committed, [
+            "INSERT INTO portfolios VALUES (1)",
+            "INSERT INTO portfolio_stocks VALUES (1)"
+        ])
+
+    def test_store_user_without_preferences_is_rolled_back(self):
+        self.connection.fail_on = "user_preferences"
+        with patch.object(db, 'query', return_value=[]):
+            UserService._store_user_in_rds(MagicMock(), 'sub-123', 'alice', 'alice@example.com')
+
+        # The user insert is undone along with the failed preferences insert
+        self.assertEqual(self.connection.committed, [])
+        self.assertEqual(self.connection.pending, [])
+
+    def test_store_user_commits_user_and_preferences(self):
+        with patch.object(db, 'query', return_value=[]):
+            UserService._store_user_in_rds(MagicMock(), 'sub-123', 'alice', 'alice@example.com')
+
+        self.assertEqual(len(self.connection.committed), 2)
+        self.assertIn("INSERT INTO users", self.connection.committed[0])
+        self.assertIn("INSERT INTO user_preferences", self.connection.committed[1])
+
+if __name__ == '__main__':
+    unittest.main()
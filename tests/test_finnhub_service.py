@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import threading
+import time
+from app.routes.finnhub_routes import FinnhubService, ETAG_CACHE_MAX, MAX_NEWS_WEEKS
+
+class TestFinnhubServiceConcurrency(unittest.TestCase):
+    """The scheduler and request threads share one FinnhubService through the registry"""
+    def setUp(self):
+        with patch('app.routes.finnhub_routes.get_service', return_value=MagicMock()):
+            self.service = FinnhubService()
+        self.upstream_calls = []
+        self.release = threading.Event()
+        
+        def slow_fetch(symbol, weeks, defer_store=False):
+            self.upstream_calls.append((symbol, weeks, defer_store))
+            self.release.wait(timeout=5)
+            return {'status': 'success', 'data': [{'headline': f'{symbol} news'}], 'articles_stored': 1}
+        
+        patcher = patch.object(self.service, '_fetch_company_news', side_effect=slow_fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def _fetch_concurrently(self, calls):
+        results = [None] * len(calls)
+        def run(i, args):
+            results[i] = self.service.fetch_company_news(*args)
+        threads = [threading.Thread(target=run, args=(i, args)) for i, args in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+        # Let every caller reach the in-flight check before the upstream call returns
+        time.sleep(0.2)
+        self.release.set()
+        for thread in threads:
+            thread.join(timeout=5)
+        return results
+    
+    def test_identical_fetches_share_one_upstream_call(self):
+        results = self._fetch_concurrently([('AAPL', 2)] * 6)
+        
+        self.assertEqual(self.upstream_calls, [('AAPL', 2, False)])
+        self.assertTrue(all(result['data'] == [{'headline': 'AAPL news'}] for result in results))
+        # Each caller gets its own dict
+        self.assertEqual(len({id(result) for result in results}), 6)
+        self.assertEqual(self.service._inflight, {})
+    
+    def test_different_keys_and_deferred_fetches_are_not_shared(self):
+        self._fetch_concurrently([('AAPL', 2), ('MSFT', 2), ('AAPL', 3)])
+        self.service.fetch_company_news('AAPL', 2, defer_store=True)
+        
+        self.assertEqual(sorted(self.upstream_calls), [
+            ('AAPL', 2, False), ('AAPL', 2, True), ('AAPL', 3, False), ('MSFT', 2, False)
+        ])
+    
+    def test_weeks_are_clamped_to_shared_keys(self):
+        self.release.set()
+        self.service.fetch_company_news('AAPL', 10000)
+        self.service.fetch_company_news('AAPL', -5)
+        
+        self.assertEqual(self.upstream_calls, [('AAPL', MAX_NEWS_WEEKS, False), ('AAPL', 1, False)])
+    
+    def test_etag_cache_is_bounded(self):
+        with self.service._etags_lock:
+            for i in range(ETAG_CACHE_MAX + 50):
+                self.service._etags[(f'SYM{i}', 3)] = ('etag', [])
+        
+        self.assertEqual(len(self.service._etags), ETAG_CACHE_MAX)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from flask import Flask, jsonify
+from app import cache
+from app.http_cache import cached_json, no_store
+
+class TestHttpCache(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        self.app.config['CACHE_TYPE'] = 'SimpleCache'
+        cache.init_app(self.app)
+        self.calls = 0
+        
+        @self.app.route('/read')
+        @cached_json(ttl=30)
+        def read():
+            self.calls += 1
+            return jsonify({'status': 'success', 'data': [1, 2, 3]})
+        
+        @self.app.route('/broken')
+        @cached_json(ttl=30)
+        def broken():
+            self.calls += 1
+            return jsonify({'status': 'error', 'message': 'upstream down'})
+        
+        @self.app.route('/refresh')
+        @no_store
+        def refresh():
+            self.calls += 1
+            return jsonify({'status': 'success'})
+        
+        self.client = self.app.test_client()
+    
+    def tearDown(self):
+        with self.app.app_context():
+            cache.clear()
+    
+    def test_cached_body_and_headers(self):
+        first = self.client.get('/read')
+        second = self.client.get('/read')
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_data(), second.get_data())
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(first.headers['Cache-Control'].startswith('public, max-age=30'))
+        self.assertIsNotNone(first.headers.get('ETag'))
+    
+    def test_matching_etag_returns_304(self):
+        etag = self.client.get('/read').headers['ETag']
+        
+        response = self.client.get('/read', headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+    
+    def test_error_body_not_cached(self):
+        self.client.get('/broken')
+        self.client.get('/broken')
+        
+        self.assertEqual(self.calls, 2)
+    
+    def test_no_store_runs_every_time(self):
+        first = self.client.get('/refresh')
+        self.client.get('/refresh')
+        
+        self.assertEqual(first.headers['Cache-Control'], 'no-store')
+        self.assertIsNone(first.headers.get('ETag'))
+        self.assertEqual(self.calls, 2)
+
+if __name__ == '__main__':
+    unittest.main()
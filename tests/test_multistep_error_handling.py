@@ -3,6 +3,7 @@ from unittest.mock import patch, MagicMock
 import json
 from flask import Flask
 from app import create_app
+from app.routes.multistep_prediction_routes import clear_local_caches
 
 class TestMultistepErrorHandling(unittest.TestCase):
     def setUp(self):
@@ -12,6 +13,9 @@ class TestMultistepErrorHandling(unittest.TestCase):
         self.app.config['BYPASS_AUTH'] = True  # Bypass JWT authentication for testing
         self.app.config['CACHE_TYPE'] = 'simple'  # Use simple cache for testing
         
+        # The in-process caches outlive each app, so start every test empty
+        clear_local_caches()
+        
         # Create test client
         self.client = self.app.test_client()
         
@@ -295,6 +299,30 @@ class TestMultistepErrorHandling(unittest.TestCase):
         data = json.loads(response.data)
         self.assertEqual(data['status'], 'error')
     
+    def test_followup_malformed_json(self):
+        """Test /followup endpoint with a body that is not valid JSON"""
+        response = self.client.post(
+            '/api/prediction/multistep/followup',
+            data='{"symbol": "AAPL",',
+            content_type='application/json'
+        )
+        
+        self.assertEqual(response.status_code, 400)
+        data = json.loads(response.data)
+        self.assertEqual(data['status'], 'error')
+    
+    def test_followup_invalid_symbol(self):
+        """Test /followup endpoint with a symbol that is too long or not a ticker"""
+        for symbol in ('AAPLAAPLAAPL', 'AA PL'):
+            response = self.client.post(
+                '/api/prediction/multistep/followup',
+                json={'symbol': symbol, 'user_query': self.test_user_query}
+            )
+            
+            self.assertEqual(response.status_code, 400)
+            data = json.loads(response.data)
+            self.assertEqual(data['status'], 'error')
+    
     @patch('app.routes.multistep_prediction_routes.generate_prediction')
     def test_followup_llm_service_error(self, mock_generate_prediction):
         """Test /followup endpoint when LLM service fails"""
@@ -2,12 +2,43 @@ import unittest
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 import pytest
+import orjson
+from flask import Flask
 from app.routes.multistep_prediction_routes import (
     fetch_historical_data, fetch_news_data, fetch_social_data,
     generate_prediction_from_data, get_cache_key,
-    cache_step_data, get_cached_step_data, clear_step_data
+    cache_step_data, get_cached_step_data, clear_step_data, update_step_data,
+    _store_followup_chat, flush_chat_writes
 )
 
+class FakeRedis:
+    """Just enough of redis-py's hash API for the step-data helpers"""
+    def __init__(self):
+        self.hashes = {}
+        self.expiry = {}
+    
+    def pipeline(self):
+        return self
+    
+    def execute(self):
+        return []
+    
+    def delete(self, key):
+        self.hashes.pop(key, None)
+    
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update({field.encode(): value for field, value in mapping.items()})
+    
+    def expire(self, key, seconds):
+        self.expiry[key] = seconds
+    
+    def hmget(self, key, fields):
+        stored = self.hashes.get(key, {})
+        return [stored.get(field.encode()) for field in fields]
+    
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
 class TestMultistepHelpers(unittest.TestCase):
     def setUp(self):
         # Common test data
@@ -304,7 +335,7 @@ class TestMultistepHelpers(unittest.TestCase):
         expected_key = f"multistep_prediction:{self.test_user_id}:{self.test_symbol}"
         
         mock_cache.set.assert_called_once_with(
-            expected_key, test_data, timeout=900  # 900 seconds = 15 minutes
+            expected_key, orjson.dumps(test_data), timeout=900  # 900 seconds = 15 minutes
         )
     
     @patch('app.routes.multistep_prediction_routes.cache')
@@ -318,7 +349,7 @@ class TestMultistepHelpers(unittest.TestCase):
                 'prices': [150.0, 152.5, 153.75]
             }
         }
-        mock_cache.get.return_value = test_data
+        mock_cache.get.return_value = orjson.dumps(test_data)
         
         # Call the function
         result = get_cached_step_data(self.test_user_id, self.test_symbol)
@@ -338,6 +369,73 @@ class TestMultistepHelpers(unittest.TestCase):
         # Verify cache.delete was called correctly
         expected_key = f"multistep_prediction:{self.test_user_id}:{self.test_symbol}"
         mock_cache.delete.assert_called_once_with(expected_key)
+    
+    @patch('app.routes.multistep_prediction_routes.chat_history_service')
+    def test_store_followup_chat_batches_writes(self, mock_chat_history):
+        mock_chat_history.store_chats.return_value = {'status': 'success', 'count': 3}
+        
+        # Queue several follow-ups back to back
+        for i in range(3):
+            _store_followup_chat(self.test_user_id, self.test_symbol, f"question {i}", f"answer {i}", '2023-01-03T00:00:00')
+        
+        # Flush before the patch ends so the background writer only sees the mock
+        self.assertTrue(flush_chat_writes(timeout=5))
+        
+        stored = [chat for call in mock_chat_history.store_chats.call_args_list for chat in call[0][0]]
+        self.assertEqual([chat['query'] for chat in stored], ['question 0', 'question 1', 'question 2'])
+        self.assertTrue(all(chat['metadata']['timestamp'] == '2023-01-03T00:00:00' for chat in stored))
+        mock_chat_history.store_chat.assert_not_called()
+    
+    @patch('app.routes.multistep_prediction_routes.chat_history_service')
+    def test_store_followup_chat_error_still_drains(self, mock_chat_history):
+        mock_chat_history.store_chats.side_effect = Exception("DynamoDB unavailable")
+        
+        _store_followup_chat(self.test_user_id, self.test_symbol, self.test_user_query, "answer", '2023-01-03T00:00:00')
+        
+        # A failed batch is logged and dropped, so the queue still empties
+        self.assertTrue(flush_chat_writes(timeout=5))
+        mock_chat_history.store_chats.assert_called_once()
+    
+    def test_step_data_redis_hash(self):
+        redis_client = FakeRedis()
+        app = Flask(__name__)
+        app.extensions['redis'] = redis_client
+        historical = {
+            'dates': ['2023-01-02', '2023-01-03', '2023-01-05'],
+            'prices': [150.0, 152.5, 153.75],
+            'volumes': [1000000, 1200000, 900000]
+        }
+        
+        with app.app_context():
+            cache_step_data(self.test_user_id, self.test_symbol, {
+                'symbol': self.test_symbol,
+                'user_query': self.test_user_query,
+                'historical': historical
+            })
+            hash_key = f"sai:step:multistep_prediction:{self.test_user_id}:{self.test_symbol}"
+            self.assertEqual(set(redis_client.hashes[hash_key]), {b'symbol', b'user_query', b'historical'})
+            # Dates are stored as offsets and restored on read
+            self.assertIn(b'day_offsets', redis_client.hashes[hash_key][b'historical'])
+            
+            # Reading selected fields only transfers those fields
+            self.assertEqual(
+                get_cached_step_data(self.test_user_id, self.test_symbol, fields=('symbol',)),
+                {'symbol': self.test_symbol}
+            )
+            
+            # Updating writes just the new field and keeps the others
+            step_data = {'symbol': self.test_symbol}
+            update_step_data(self.test_user_id, self.test_symbol, step_data, news=[{'title': 'Earnings beat'}])
+            self.assertEqual(step_data['news'], [{'title': 'Earnings beat'}])
+            
+            full = get_cached_step_data(self.test_user_id, self.test_symbol)
+            self.assertEqual(full['historical'], historical)
+            self.assertEqual(full['news'], [{'title': 'Earnings beat'}])
+            self.assertEqual(full['user_query'], self.test_user_query)
+            self.assertEqual(redis_client.expiry[hash_key], 900)
+            
+            clear_step_data(self.test_user_id, self.test_symbol)
+            self.assertIsNone(get_cached_step_data(self.test_user_id, self.test_symbol))
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
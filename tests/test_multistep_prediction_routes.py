@@ -7,7 +7,8 @@ from flask import Flask
 from app import create_app
 from app.routes.multistep_prediction_routes import (
     get_cache_key, parse_llm_response, multistep_prediction_bp, followup_bp,
-    create_followup_prompt, process_followup_response
+    create_followup_prompt, process_followup_response, flush_chat_writes,
+    clear_local_caches
 )
 
 class TestMultistepPredictionRoutes(unittest.TestCase):
@@ -18,6 +19,9 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
         self.app.config['BYPASS_AUTH'] = True  # Bypass JWT authentication for testing
         self.app.config['CACHE_TYPE'] = 'simple'  # Use simple cache for testing
         
+        # The in-process caches outlive each app, so start every test empty
+        clear_local_caches()
+        
         # Create test client
         self.client = self.app.test_client()
         
@@ -71,6 +75,47 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
             # Verify cache was set
             mock_cache.set.assert_called_once()
     
+    @patch('app.routes.multistep_prediction_routes._prefetch')
+    @patch('app.routes.multistep_prediction_routes.cache')
+    @patch('app.routes.multistep_prediction_routes.get_historical')
+    def test_historical_etag_changes_with_prices(self, mock_get_historical, mock_cache, mock_prefetch):
+        request_body = {'symbol': self.test_symbol, 'user_query': self.test_user_query}
+        mock_get_historical.return_value = {
+            'status': 'success',
+            'data': {
+                'dates': ['2023-01-03', '2023-01-02', '2023-01-01'],
+                'prices': [153.75, 152.5, 150.0],
+                'volumes': [900000, 1200000, 1000000]
+            }
+        }
+        
+        first = self.client.post('/api/prediction/multistep/historical', json=request_body)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        
+        # Unchanged data: the client's copy is still current
+        response = self.client.post(
+            '/api/prediction/multistep/historical', json=request_body, headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        
+        # Today's bar refreshed: same dates, new price and volume
+        mock_get_historical.return_value = {
+            'status': 'success',
+            'data': {
+                'dates': ['2023-01-03', '2023-01-02', '2023-01-01'],
+                'prices': [155.10, 152.5, 150.0],
+                'volumes': [1400000, 1200000, 1000000]
+            }
+        }
+        response = self.client.post(
+            '/api/prediction/multistep/historical', json=request_body, headers={'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        data = json.loads(response.data)
+        self.assertEqual(data['data']['historical_prices'][0]['price'], 155.10)
+    
     @patch('app.routes.multistep_prediction_routes.cache')
     @patch('app.routes.multistep_prediction_routes.NewsService')
     @patch('app.routes.multistep_prediction_routes.FinnhubService')
@@ -86,11 +131,11 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
             }
         }
         
-        # Setup mock return value for NewsService.search_similar_news
+        # Setup mock return value for NewsService.search_similar_news_batch (one hit list per query)
         mock_news_instance = mock_news.return_value
-        mock_news_instance.search_similar_news.return_value = {
+        mock_news_instance.search_similar_news_batch.return_value = {
             'status': 'success',
-            'data': [
+            'data': [[
                 {
                     'title': 'Apple Reports Record Earnings',
                     'published': '2023-01-02T14:30:00Z',
@@ -105,7 +150,7 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
                     'link': 'https://financedaily.com/apple-ai',
                     'summary': 'Apple stock surged after announcing new AI features.'
                 }
-            ]
+            ], [], []]
         }
         
         # Make the request
@@ -126,10 +171,14 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
         self.assertEqual(data['data_source'], 'semantic_search')
         
         # Verify NewsService was called correctly
-        mock_news_instance.search_similar_news.assert_called_once_with(
-            self.test_user_query, self.test_symbol, limit=5
+        mock_news_instance.search_similar_news_batch.assert_called_once_with(
+            [self.test_user_query, f'{self.test_symbol} earnings', f'{self.test_symbol} news'],
+            self.test_symbol, limit=5
         )
         
+        # A semantic hit makes no Finnhub request
+        mock_finnhub.return_value.fetch_company_news.assert_not_called()
+        
         # Verify cache was updated
         mock_cache.set.assert_called_once()
     
@@ -211,12 +260,45 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
         mock_cache.set.assert_called_once()
     
     @patch('app.routes.multistep_prediction_routes.cache')
-    @patch('app.routes.multistep_prediction_routes.LLMService')
-    @patch('app.routes.multistep_prediction_routes.generate_prediction')
-    @patch('app.routes.multistep_prediction_routes.chat_history_service')
-    def test_result_endpoint(self, mock_chat_history, mock_generate_prediction, mock_llm, mock_cache):
-        # Setup mock for cache.get
-        mock_cache.get.return_value = {
+    @patch('app.routes.multistep_prediction_routes.FinnhubService')
+    @patch('app.routes.multistep_prediction_routes.get_social')
+    @patch('app.routes.multistep_prediction_routes.get_news_search')
+    @patch('app.routes.multistep_prediction_routes.get_historical')
+    def test_prepare_endpoint_uses_shared_caches(self, mock_historical, mock_news, mock_social, mock_finnhub, mock_cache):
+        mock_historical.return_value = {
+            'status': 'success',
+            'data': {'dates': ['2023-01-02', '2023-01-01'], 'prices': [152.5, 150.0]}
+        }
+        mock_news.return_value = {
+            'status': 'success',
+            'data': [{'title': 'Apple Reports Record Earnings', 'published': '2023-01-02T14:30:00Z'}]
+        }
+        mock_social.return_value = {'posts': [{'title': 'AAPL to the moon!'}], 'sentiment_summary': {}}
+        
+        response = self.client.post(
+            '/api/prediction/multistep/prepare',
+            json={
+                'symbol': self.test_symbol,
+                'user_query': self.test_user_query
+            }
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['data']['article_count'], 1)
+        self.assertEqual(data['data']['news_source'], 'semantic_search')
+        self.assertEqual(data['data']['post_count'], 1)
+        
+        # Same cached lookups as the single-step routes; no Finnhub request on a semantic hit
+        mock_historical.assert_called_once_with(self.test_symbol)
+        mock_news.assert_called_once_with(self.test_symbol, self.test_user_query)
+        mock_social.assert_called_once_with(self.test_symbol)
+        mock_finnhub.return_value.fetch_company_news.assert_not_called()
+        mock_cache.set.assert_called_once()
+    
+    def _result_step_data(self):
+        """Cached data from the three earlier steps, as /result reads it"""
+        return {
             'symbol': self.test_symbol,
             'user_query': self.test_user_query,
             'timestamp': datetime.now().isoformat(),
@@ -246,25 +328,32 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
                 }
             }
         }
+    
+    def _mock_step_cache(self, mock_cache):
+        """Serve the step data for its own key only; prompt and LLM caches start empty"""
+        step_data = self._result_step_data()
+        mock_cache.get.side_effect = (
+            lambda key: step_data if key.startswith('multistep_prediction:') else None
+        )
+    
+    @patch('app.routes.multistep_prediction_routes.cache')
+    @patch('app.routes.multistep_prediction_routes.LLMService')
+    @patch('app.routes.multistep_prediction_routes.refine_with_groq')
+    @patch('app.routes.multistep_prediction_routes._fetch_current_price')
+    @patch('app.routes.multistep_prediction_routes.chat_history_service')
+    def test_result_endpoint(self, mock_chat_history, mock_price, mock_refine, mock_llm, mock_cache):
+        self._mock_step_cache(mock_cache)
         
         # Setup mock for LLMService.generate_multistep_prompt
         mock_llm_instance = mock_llm.return_value
         mock_llm_instance.generate_multistep_prompt.return_value = "Test prompt for prediction"
         
-        # Setup mock for generate_prediction
-        mock_generate_prediction.return_value = """
-        SUMMARY: Apple's stock is likely to increase next week.
-        PRICE ANALYSIS: Recent price trends show upward momentum.
-        NEWS IMPACT: Positive earnings report will drive growth.
-        SENTIMENT ANALYSIS: Social sentiment is overwhelmingly positive.
-        PREDICTION: AAPL will increase by 5-7% next week.
-        TARGET PRICE: $175.50
-        CONFIDENCE LEVEL: High
-        RISK FACTORS: Market volatility could impact performance.
-        """
-        
-        # Setup mock for chat_history_service
-        mock_chat_history.store_chat = MagicMock()
+        # Setup mock for the structured Groq output and the current price API
+        mock_refine.return_value = {
+            'summary': "Apple's stock is likely to increase next week.",
+            'predicted_percentage_change': '5%'
+        }
+        mock_price.return_value = {'currentPrice': 170.0}
         
         # Make the request
         response = self.client.post(
@@ -281,17 +370,19 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
         self.assertEqual(data['status'], 'success')
         self.assertEqual(data['data']['symbol'], self.test_symbol)
         self.assertEqual(data['data']['user_query'], self.test_user_query)
-        self.assertTrue('prediction' in data['data'])
-        self.assertTrue('sections' in data['data'])
-        self.assertEqual(data['data']['target_price'], '$175.50')
+        self.assertEqual(data['data']['currentPrice'], 170.0)
+        
+        # The predicted price is recalculated from the current price
+        self.assertEqual(data['data']['structured_output']['predicted_price'], '178.5')
         
         # Verify LLMService was called correctly
         mock_llm_instance.generate_multistep_prompt.assert_called_once()
         
-        # Verify generate_prediction was called
-        mock_generate_prediction.assert_called_once_with(
-            "Test prompt for prediction", max_new_tokens=2048
-        )
+        # Verify Groq was called with the built prompt
+        mock_refine.assert_called_once_with("Test prompt for prediction")
+        
+        # Chat history is read only by the prompt builder, not by the route
+        mock_chat_history.get_chat_history.assert_not_called()
         
         # Verify chat history was stored
         mock_chat_history.store_chat.assert_called_once()
@@ -299,8 +390,59 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
         # Verify cache was deleted after completion
         mock_cache.delete.assert_called_once()
     
+    @staticmethod
+    def _sse_events(response):
+        """Decode the JSON payload of every server-sent event in a streamed response"""
+        return [
+            json.loads(frame[len('data: '):])
+            for frame in response.get_data(as_text=True).split('\n\n')
+            if frame.startswith('data: ')
+        ]
+    
+    @patch('app.routes.multistep_prediction_routes.cache')
+    @patch('app.routes.multistep_prediction_routes.LLMService')
+    @patch('app.routes.multistep_prediction_routes.stream_refine_with_groq')
+    @patch('app.routes.multistep_prediction_routes._fetch_current_price')
+    @patch('app.routes.multistep_prediction_routes.chat_history_service')
+    def test_result_endpoint_stream(self, mock_chat_history, mock_price, mock_stream, mock_llm, mock_cache):
+        self._mock_step_cache(mock_cache)
+        mock_llm.return_value.generate_multistep_prompt.return_value = "Test prompt for prediction"
+        mock_stream.return_value = iter(['{"summary": "Up", ', '"predicted_percentage_change": "5%"}'])
+        mock_price.return_value = {'currentPrice': 170.0}
+        
+        response = self.client.post(
+            '/api/prediction/multistep/result',
+            json={
+                'symbol': self.test_symbol,
+                'user_query': self.test_user_query
+            },
+            headers={'Accept': 'text/event-stream'}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = self._sse_events(response)
+        
+        # Each Groq chunk is forwarded as it arrives
+        self.assertEqual(
+            [event['delta'] for event in events[:-1]],
+            ['{"summary": "Up", ', '"predicted_percentage_change": "5%"}']
+        )
+        
+        # The final event carries the same payload as the JSON response
+        final = events[-1]
+        self.assertEqual(final['status'], 'success')
+        self.assertEqual(final['data']['structured_output']['predicted_price'], '178.5')
+        self.assertEqual(final['data']['currentPrice'], 170.0)
+        
+        # The parsed result is cached, stored and the step data cleared
+        mock_stream.assert_called_once_with("Test prompt for prediction")
+        self.assertTrue(any(call.args[0].startswith('llm:') for call in mock_cache.set.call_args_list))
+        mock_chat_history.store_chat.assert_called_once()
+        mock_cache.delete.assert_called_once()
+    
     @patch('app.routes.multistep_prediction_routes.chat_history_service')
-    @patch('app.routes.multistep_prediction_routes.generate_prediction')
+    @patch('app.routes.multistep_prediction_routes.get_followup_response_from_groq')
     def test_followup_endpoint(self, mock_generate_prediction, mock_chat_history):
         # Setup mock for chat_history_service.get_chat_history
         mock_chat_history.get_chat_history.return_value = {
@@ -314,8 +456,8 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
             ]
         }
         
-        # Setup mock for chat_history_service.store_chat
-        mock_chat_history.store_chat = MagicMock()
+        # Setup mock for chat_history_service.store_chats (follow-ups are written in batches)
+        mock_chat_history.store_chats.return_value = {'status': 'success', 'count': 1}
         
         # Setup mock for generate_prediction
         mock_generate_prediction.return_value = """
@@ -350,14 +492,86 @@ class TestMultistepPredictionRoutes(unittest.TestCase):
         
         # Verify chat_history_service.get_chat_history was called
         mock_chat_history.get_chat_history.assert_called_once_with(
-            self.test_user_id, limit=3
+            self.test_user_id, limit=3, symbol=self.test_symbol
         )
         
         # Verify generate_prediction was called with the correct prompt
         mock_generate_prediction.assert_called_once()
         
-        # Verify chat history was stored
-        mock_chat_history.store_chat.assert_called_once()
+        # Verify chat history was stored by the background writer, while the mock is still in place
+        self.assertTrue(flush_chat_writes(timeout=5))
+        mock_chat_history.store_chats.assert_called_once()
+        stored = mock_chat_history.store_chats.call_args[0][0]
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(stored[0]['metadata']['symbol'], self.test_symbol)
+        self.assertEqual(stored[0]['metadata']['analysis_type'], 'followup')
+    
+    @patch('app.routes.multistep_prediction_routes.chat_history_service')
+    @patch('app.routes.multistep_prediction_routes.stream_followup_response_from_groq')
+    def test_followup_endpoint_stream(self, mock_stream, mock_chat_history):
+        mock_chat_history.get_chat_history.return_value = {'status': 'success', 'data': []}
+        mock_chat_history.store_chats.return_value = {'status': 'success', 'count': 1}
+        mock_stream.return_value = iter(['SUMMARY: Apple should rise ', 'on strong earnings.\n', 'TARGET PRICE: $175.00'])
+        
+        response = self.client.post(
+            '/api/prediction/multistep/followup',
+            json={
+                'symbol': self.test_symbol,
+                'user_query': 'Why do you think Apple stock will rise?'
+            },
+            headers={'Accept': 'text/event-stream'}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = self._sse_events(response)
+        
+        # Each Groq chunk is forwarded as it arrives
+        self.assertEqual(
+            [event['chunk'] for event in events[:-1]],
+            ['SUMMARY: Apple should rise ', 'on strong earnings.\n', 'TARGET PRICE: $175.00']
+        )
+        
+        # The final event carries the same payload as the JSON response
+        final = events[-1]
+        self.assertTrue(final['done'])
+        self.assertEqual(final['status'], 'success')
+        self.assertEqual(final['llm_response'], 'SUMMARY: Apple should rise on strong earnings.\nTARGET PRICE: $175.00')
+        self.assertTrue(final['target_price'].startswith('$175.00'))
+        
+        # The full answer is stored once the stream ends
+        self.assertTrue(flush_chat_writes(timeout=5))
+        mock_chat_history.store_chats.assert_called_once()
+        stored = mock_chat_history.store_chats.call_args[0][0]
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(stored[0]['response'], final['llm_response'])
+    
+    @patch('app.routes.multistep_prediction_routes.chat_history_service')
+    @patch('app.routes.multistep_prediction_routes.stream_followup_response_from_groq')
+    def test_followup_stream_disconnect_stores_partial(self, mock_stream, mock_chat_history):
+        mock_chat_history.get_chat_history.return_value = {'status': 'success', 'data': []}
+        mock_chat_history.store_chats.return_value = {'status': 'success', 'count': 1}
+        mock_stream.return_value = iter(['Apple should rise', ' on strong earnings.'])
+        
+        response = self.client.post(
+            '/api/prediction/multistep/followup',
+            json={
+                'symbol': self.test_symbol,
+                'user_query': 'Why do you think Apple stock will rise?'
+            },
+            headers={'Accept': 'text/event-stream'},
+            buffered=False
+        )
+        
+        # Read the first event, then drop the connection
+        next(iter(response.response))
+        response.close()
+        
+        # What was streamed before the disconnect is still stored
+        self.assertTrue(flush_chat_writes(timeout=5))
+        mock_chat_history.store_chats.assert_called_once()
+        stored = mock_chat_history.store_chats.call_args[0][0]
+        self.assertEqual(stored[0]['response'], 'Apple should rise')
     
     def test_parse_llm_response(self):
         # Test standard format with section headers
@@ -0,0 +1,62 @@
+import unittest
+import threading
+import time
+from app.services.registry import get_service, _services
+
+class Dependency:
+    instances = 0
+
+    def __init__(self):
+        Dependency.instances += 1
+
+class Dependent:
+    """Mirrors NewsService/FinnhubService, which fetch VectorService in their constructors"""
+    def __init__(self):
+        self.dependency = get_service(Dependency)
+
+class SlowService:
+    instances = 0
+
+    def __init__(self):
+        SlowService.instances += 1
+        time.sleep(0.05)
+
+class TestServiceRegistry(unittest.TestCase):
+    def setUp(self):
+        for cls in (Dependency, Dependent, SlowService):
+            _services.pop(cls, None)
+        Dependency.instances = 0
+        SlowService.instances = 0
+
+    def _in_thread(self, fn):
+        """Run fn in a thread and fail instead of hanging if it deadlocks"""
+        result = {}
+        thread = threading.Thread(target=lambda: result.setdefault('value', fn()), daemon=True)
+        thread.start()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive(), 'get_service did not return')
+        return result['value']
+
+    def test_constructor_can_get_service(self):
+        """A constructor that calls get_service itself does not deadlock"""
+        dependent = self._in_thread(lambda: get_service(Dependent))
+
+        self.assertIs(dependent.dependency, get_service(Dependency))
+        self.assertIs(dependent, get_service(Dependent))
+        self.assertEqual(Dependency.instances, 1)
+
+    def test_concurrent_first_use_builds_one_instance(self):
+        """Threads racing on first use all get the same, singly-constructed instance"""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(get_service(SlowService))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(SlowService.instances, 1)
+
+if __name__ == '__main__':
+    unittest.main()